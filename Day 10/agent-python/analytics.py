@@ -0,0 +1,266 @@
+"""Columnar analytics over the funding and competitor datasets.
+
+The CSVs are loaded once into typed pandas frames with normalised amounts,
+dates, rounds, cities and industry names, and pre-grouped by industry. The
+stages can then quote exact figures (funding by industry/city/quarter, round
+mix, growth, HHI concentration) instead of asking the LLM to estimate them.
+
+Extra funding files in the Day 9 ``startup_fundings.csv`` layout can be added
+with ``EXTRA_FUNDING_CSVS`` (``os.pathsep``-separated paths).
+"""
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from dataset_io import read_dataset_rows
+
+DATASET_DIR = Path(os.getenv("DATASET_DIR", "datasets"))
+EXTRA_FUNDING_CSVS = [path for path in os.getenv("EXTRA_FUNDING_CSVS", "").split(os.pathsep) if path]
+
+# Column layouts of the funding files we know how to read
+FUNDING_SCHEMAS = [
+    {"company": "company_name", "industry": "industry", "city": "city", "round_type": "round_type",
+     "amount_usd": "funding_amount(USD)", "date": "funding_date"},
+    {"company": "Startup Name", "industry": "Industry Vertical", "city": "City  Location", "round_type": "InvestmentnType",
+     "amount_usd": "Amount in USD", "date": "Date"},
+]
+
+INDUSTRY_ALIASES = {
+    "etech": "edtech", "education": "edtech", "onlineeducationplatform": "edtech", "elearning": "edtech",
+    "finance": "fintech", "financialservices": "fintech",
+    "healthcare": "healthtech", "healthandwellness": "healthtech",
+    "transportation": "mobility", "transport": "mobility",
+    "logisticstech": "logistics",
+    "it": "saas", "software": "saas", "informationtechnology": "saas",
+    "ai": "aiml", "artificialintelligence": "aiml", "machinelearning": "aiml",
+    "foodandbeverage": "foodbeverage", "foodandbeverages": "foodbeverage", "foodbeverages": "foodbeverage",
+}
+
+# Idea words that point at an industry but don't appear in the datasets themselves
+INDUSTRY_HINTS = {
+    "edtech": "education learning students school tutoring courses",
+    "fintech": "payments lending loans banking invoicing accounting gst credit insurance",
+    "healthtech": "health medical doctors patients clinic hospital wellness",
+    "aiml": "ai ml machine learning llm chatbot genai",
+    "ecommerce": "shopping retail marketplace store d2c",
+    "agritech": "farmers agriculture crops farm",
+    "logistics": "delivery shipping warehousing supply chain",
+    "cleantech": "solar renewable energy carbon climate",
+    "ev": "electric vehicle charging battery",
+    "saas": "software subscription b2b platform",
+    "gaming": "games esports",
+    "mobility": "rides cabs transport commute",
+}
+
+# Too generic to say anything about the industry
+MATCH_STOPWORDS = {"a", "an", "and", "the", "for", "of", "in", "to", "with", "on", "app", "apps", "platform",
+                   "online", "services", "service", "based", "india", "indian", "startup", "others", "other"}
+
+CITY_ALIASES = {"bengaluru": "bangalore", "gurugram": "gurgaon", "newdelhi": "delhi"}
+
+HHI_THRESHOLDS = [(1500, "unconcentrated"), (2500, "moderately concentrated")]
+
+
+def canonical(text):
+    return re.sub(r"[^a-z0-9]", "", str(text).lower())
+
+
+def industry_key(name):
+    key = canonical(name)
+    return INDUSTRY_ALIASES.get(key, key)
+
+
+def city_key(name):
+    key = canonical(name)
+    return CITY_ALIASES.get(key, key)
+
+
+def normalize_round(name):
+    text = " ".join(str(name).replace("\\n", " ").lower().split())
+    series = re.search(r"series\s*([a-j])\b", text)
+    if "pre" in text and series:
+        return f"Pre-Series {series.group(1).upper()}"
+    if series:
+        return f"Series {series.group(1).upper()}"
+    if "seed" in text:
+        return "Seed"
+    if "angel" in text or "angle" in text:
+        return "Angel"
+    if "private equity" in text:
+        return "Private Equity"
+    if "debt" in text:
+        return "Debt"
+    return text.title() if text else "Unknown"
+
+
+def parse_amounts(values):
+    """USD amounts from strings like '1,000,000', 'undisclosed' or '14342000+'; 0 counts as unknown."""
+    amounts = pd.to_numeric(values.astype(str).str.replace(r"[^\d.]", "", regex=True), errors="coerce")
+    return amounts.where(amounts > 0)
+
+
+def parse_dates(values):
+    """ISO dates first, then the day-first formats used by the older funding export."""
+    values = values.astype(str).str.strip()
+    dates = pd.to_datetime(values, format="%Y-%m-%d", errors="coerce")
+    missing = dates.isna()
+    if missing.any():
+        dates[missing] = pd.to_datetime(values[missing].str.replace(".", "/", regex=False), dayfirst=True, format="mixed", errors="coerce")
+    return dates
+
+
+def _labels(frame, key_column, raw_column):
+    """Display label per normalised key: its most common original spelling."""
+    counts = frame.groupby([key_column, raw_column]).size().reset_index(name="n")
+    counts = counts.sort_values("n", ascending=False).drop_duplicates(key_column)
+    return dict(zip(counts[key_column], counts[raw_column]))
+
+
+def _records(frame, source):
+    for schema in FUNDING_SCHEMAS:
+        if set(schema.values()) <= set(frame.columns):
+            out = pd.DataFrame({field: frame[column] for field, column in schema.items()})
+            out["source"] = source
+            return out
+    raise ValueError(f"Unrecognised funding file layout: {source}")
+
+
+def load_funding(paths):
+    frames = []
+    for path in paths:
+        path = Path(path)
+        if path.exists():
+            frames.append(_records(pd.DataFrame(read_dataset_rows(path)), path.name))
+    if not frames:
+        return pd.DataFrame(columns=["company", "industry", "industry_raw", "city", "city_raw", "round_type", "amount_usd", "date", "quarter", "source"])
+    funding = pd.concat(frames, ignore_index=True)
+    funding["industry_raw"] = funding["industry"].astype(str).str.strip()
+    funding["industry"] = funding["industry_raw"].map(industry_key).astype("category")
+    funding["city_raw"] = funding["city"].astype(str).str.strip()
+    funding["city"] = funding["city_raw"].map(city_key).astype("category")
+    funding["round_type"] = funding["round_type"].map(normalize_round).astype("category")
+    funding["amount_usd"] = parse_amounts(funding["amount_usd"]).astype("float64")
+    funding["date"] = parse_dates(funding["date"])
+    funding["quarter"] = funding["date"].dt.to_period("Q")
+    return funding
+
+
+def load_competitors(path):
+    path = Path(path)
+    competitors = pd.DataFrame(read_dataset_rows(path)) if path.exists() else pd.DataFrame(columns=["domain", "company_name", "keywords", "market_share(%)"])
+    competitors["domain_raw"] = competitors["domain"].astype(str).str.strip()
+    competitors["domain"] = competitors["domain_raw"].map(industry_key).astype("category")
+    competitors["market_share"] = pd.to_numeric(competitors["market_share(%)"], errors="coerce").astype("float64")
+    return competitors
+
+
+def _round(value, digits=2):
+    return None if value is None or pd.isna(value) else round(float(value), digits)
+
+
+class MarketAnalytics:
+    def __init__(self, funding, competitors):
+        self.funding = funding
+        self.competitors = competitors
+        self._funding_by_industry = {key: group for key, group in funding.groupby("industry", observed=True)}
+        self._competitors_by_domain = {key: group for key, group in competitors.groupby("domain", observed=True)}
+        self.industry_labels = {**_labels(funding, "industry", "industry_raw"), **_labels(competitors, "domain", "domain_raw")}
+        self.city_labels = _labels(funding, "city", "city_raw")
+        self._vocabulary = self._build_vocabulary()
+
+    @classmethod
+    def load(cls, dataset_dir=DATASET_DIR, extra_funding_csvs=EXTRA_FUNDING_CSVS):
+        dataset_dir = Path(dataset_dir)
+        funding = load_funding([dataset_dir / "startup_funding_2025.csv", *extra_funding_csvs])
+        competitors = load_competitors(dataset_dir / "competitors_landscape_2025.csv")
+        return cls(funding, competitors)
+
+    def _build_vocabulary(self):
+        """Industry key -> words that signal it (label, hints, competitor keywords)."""
+        vocabulary = {key: set(re.findall(r"[a-z0-9]+", label.lower())) | {key} for key, label in self.industry_labels.items()}
+        for key, hints in INDUSTRY_HINTS.items():
+            vocabulary.setdefault(key, {key}).update(hints.split())
+        for key, group in self._competitors_by_domain.items():
+            for keywords in group["keywords"].dropna():
+                vocabulary[key].update(re.findall(r"[a-z0-9]+", keywords.lower()))
+        return vocabulary
+
+    def match_industry(self, text):
+        """Best-matching industry key for free text, or None if nothing (or more than one industry) matches best."""
+        words = set(re.findall(r"[a-z0-9]+", text.lower())) - MATCH_STOPWORDS
+        words |= {industry_key(word) for word in words}
+        scores = sorted(((len(words & vocab), key) for key, vocab in self._vocabulary.items()), reverse=True)
+        if not scores or scores[0][0] == 0 or (len(scores) > 1 and scores[0][0] == scores[1][0]):
+            return None  # no signal, or a tie we can't break honestly
+        return scores[0][1]
+
+    def _funding_slice(self, industry=None):
+        if industry is None:
+            return self.funding
+        return self._funding_by_industry.get(industry_key(industry), self.funding.iloc[0:0])
+
+    def funding_by(self, by="industry", industry=None, top=5):
+        """Total, count and median disclosed funding grouped by industry, city, round_type or quarter."""
+        frame = self._funding_slice(industry)
+        grouped = frame.groupby(by, observed=True)["amount_usd"].agg(["sum", "count", "median"])
+        # Quarters read best as a time series; everything else as a leaderboard
+        grouped = grouped.sort_index().tail(top) if by == "quarter" else grouped.sort_values("sum", ascending=False).head(top)
+        labels = {"industry": self.industry_labels, "city": self.city_labels}.get(by, {})
+        return [
+            {by: labels.get(key, str(key)), "total_usd": _round(row["sum"], 0), "deals": int(row["count"]), "median_usd": _round(row["median"], 0)}
+            for key, row in grouped.iterrows()
+        ]
+
+    def round_mix(self, industry=None):
+        """Share of deals per funding round type."""
+        counts = self._funding_slice(industry)["round_type"].value_counts(normalize=True)
+        return {str(round_type): _round(share, 3) for round_type, share in counts.items() if share > 0}
+
+    def growth_rate(self, industry=None):
+        """Quarter-over-quarter change in disclosed funding between the two latest quarters with deals."""
+        quarterly = self._funding_slice(industry).groupby("quarter")["amount_usd"].sum()
+        quarterly = quarterly[quarterly > 0].sort_index()
+        if len(quarterly) < 2 or quarterly.iloc[-2] == 0:
+            return None
+        return {
+            "from_quarter": str(quarterly.index[-2]),
+            "to_quarter": str(quarterly.index[-1]),
+            "qoq_growth": _round(quarterly.iloc[-1] / quarterly.iloc[-2] - 1, 3),
+        }
+
+    def concentration(self, domain):
+        """Herfindahl-Hirschman Index over the listed companies' market shares (0-10000)."""
+        group = self._competitors_by_domain.get(industry_key(domain))
+        if group is None:
+            return None
+        shares = group["market_share"].dropna().to_numpy()
+        if shares.size == 0:
+            return None
+        hhi = float(np.sum(shares ** 2))
+        level = next((label for limit, label in HHI_THRESHOLDS if hhi < limit), "highly concentrated")
+        leaders = group.nlargest(3, "market_share")
+        return {
+            "hhi": round(hhi),
+            "level": level,
+            "listed_share_pct": _round(shares.sum(), 1),
+            "leaders": [{"name": name, "share_pct": _round(share, 1)} for name, share in zip(leaders["company_name"], leaders["market_share"])],
+        }
+
+    @lru_cache(maxsize=256)
+    def industry_summary(self, industry):
+        """Everything the LLM stages need about one industry, precomputed once per industry."""
+        key = industry_key(industry)
+        frame = self._funding_slice(key)
+        amounts = frame["amount_usd"].dropna()
+        return {
+            "industry": self.industry_labels.get(key, industry),
+            "deals": int(len(frame)),
+            "disclosed_total_usd": _round(amounts.sum(), 0),
+            "median_deal_usd": _round(amounts.median(), 0) if len(amounts) else None,
+            "top_cities": self.funding_by("city", key, top=3),
+            "round_mix": self.round_mix(key),
+            "growth": self.growth_rate(key),
+            "concentration": self.concentration(key),
+        }
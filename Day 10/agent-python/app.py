@@ -1,220 +1,455 @@
 import os
 import json
-import csv
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any
-from langchain import LLMChain, PromptTemplate
-from langchain.agents import Tool, initialize_agent
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
-from langchain_google_genai import ChatGoogleGenerativeAI
-import requests
-from pathlib import Path
-
-# --- Load environment and initialize services ---
+from typing import Dict, Any, Optional
+from workshop_common.eval_cache import normalize_idea
+from batch import parse_ideas, format_for, run_batch
+from pydantic import ValidationError
+from prompts import final_report_prompt
+from schemas import STAGE_SCHEMAS, empty_output
+from structured_output import IncrementalJSONParser, describe_error, partial_errors, validate_output
+from compaction import STAGE_CONTEXT_FIELDS, compact_context, render_rows, tokens_saved
+from jobs import PRIORITIES, JobQueue, QueueFull
+from workshop_common.http_client import SignalError, tavily_search
+from workshop_common.telemetry import TRACES_ENDPOINT, bind_to_stage, get_trace, metrics, recent_traces, record, stage, trace
+from services import Services, get_services, services
+
+# --- Load environment; heavy services are built lazily (see services.py) ---
 load_dotenv()
-app = FastAPI()
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.2)
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+STAGE_TIMEOUT_SECONDS = float(os.getenv("STAGE_TIMEOUT_SECONDS", "60"))
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "8"))
+BATCH_RUNS_DIR = os.getenv("BATCH_RUNS_DIR", "batch_runs")
+MAX_BATCH_CONCURRENCY = int(os.getenv("MAX_BATCH_CONCURRENCY", "16"))
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+# "direct": retrieved rows go straight into the competitor prompt (one LLM call).
+# "qa": the old RetrievalQA summary first, then the competitor prompt (two LLM calls).
+COMPETITOR_RAG_MODE = os.getenv("COMPETITOR_RAG_MODE", "direct")
+COMPETITOR_CONTEXT_TOKENS = int(os.getenv("COMPETITOR_CONTEXT_TOKENS", "600"))
+NOVELTY_CONTEXT_TOKENS = int(os.getenv("NOVELTY_CONTEXT_TOKENS", "500"))
+FINAL_REPORT_CONTEXT_TOKENS = int(os.getenv("FINAL_REPORT_CONTEXT_TOKENS", "900"))
+JSON_REPAIR_RETRIES = int(os.getenv("JSON_REPAIR_RETRIES", "1"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_RETRY_AFTER_SECONDS = int(os.getenv("JOB_RETRY_AFTER_SECONDS", "30"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+logger = logging.getLogger(__name__)
 
-# --- CSV to RAG setup ---
-def csv_document_processor(filename):
-    filepath = Path(f'datasets/{filename}')
-    if not filepath.exists():
-        return []
-    documents = []
-    with open(filepath, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for i, row in enumerate(reader):
-            content = "\n".join(f"{k}: {v}" for k, v in row.items() if v and str(v).strip())
-            doc = {
-                "page_content": content,
-                "metadata": {"source": filename, "row_id": i, **{k.lower().replace(' ', '_'): str(v) for k, v in row.items() if v}}
-            }
-            documents.append(doc)
-    return documents
-
-def initialize_vectorstore():
-    dataset_files = ['startup_funding_2025.csv', 'competitors_landscape_2025.csv', 'startup_companies_2025.csv']
-    all_documents = []
-    for filename in dataset_files:
-        docs = csv_document_processor(filename)
-        all_documents.extend(docs)
-    if all_documents:
-        docs_for_chroma = [
-            type('Document', (), {"page_content": d["page_content"], "metadata": d["metadata"]})() for d in all_documents
-        ]
-        vectorstore = Chroma.from_documents(
-            documents=docs_for_chroma,
-            embedding=HuggingFaceEmbeddings(model_name="all-mpnet-base-v2"),
-            persist_directory="rag_db"
-        )
-        vectorstore.persist()
-        return vectorstore
-    return None
-
-vectorstore = initialize_vectorstore()
-retriever = vectorstore.as_retriever(search_kwargs={"k": 5}) if vectorstore else None
-qa_chain = RetrievalQA.from_chain_type(llm=llm, retriever=retriever) if retriever else None
-
-# --- Tavily Web Search ---
-def tavily_web_search(query):
-    if not TAVILY_API_KEY:
+# Bounded pool for the blocking calls (HTTP, vector search) that have no async API
+blocking_pool = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm up in the background so the worker starts accepting connections immediately;
+    # /ready reports 503 until this finishes.
+    warmup = asyncio.create_task(run_blocking(services.warm_up)) if WARMUP_ON_STARTUP else None
+    yield
+    if warmup:
+        warmup.cancel()
+    await job_queue.stop()
+    await services.aclose()
+    blocking_pool.shutdown(wait=False)
+
+app = FastAPI(lifespan=lifespan)
+
+# --- Tavily Web Search (pooled, retried, cached; see workshop_common.http_client) ---
+async def tavily_web_search(query):
+    if not TAVILY_API_KEY and os.getenv("SIGNALS_FAKE") != "1":
         return []
-    url = "https://api.tavily.com/search"
-    headers = {"Authorization": f"Bearer {TAVILY_API_KEY}"}
-    params = {"query": query, "num_results": 5}
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return [r["snippet"] for r in data.get("results", [])]
-    except Exception:
-        pass
-    return []
-
-# --- Analysis Prompt Templates ---
-trend_prompt = PromptTemplate(
-    input_variables=["idea"],
-    template="""Analyze market demand for startup idea: '{idea}' in Indian market. Return JSON with search_volume, growth_rate, top_regions, related_terms, demand_risk, market_potential."""
-)
-
-competitor_prompt = PromptTemplate(
-    input_variables=["idea", "rag_data"],
-    template="""Analyze competitive landscape for startup idea: '{idea}' in India. Use this data: {rag_data}. If no real competitors are found, generate at least 3 plausible direct competitors and a numeric benchmark_score (1-100) for the Indian market. Return JSON with direct_competitors, competitive_advantages, market_gaps, ip_risks, benchmark_score, competitive_intensity."""
-)
-
-saturation_prompt = PromptTemplate(
-    input_variables=["idea", "web_funding"],
-    template="""Evaluate market saturation for startup idea: '{idea}' in Indian market. Use this funding data: {web_funding}. Return JSON with saturation_score, funding_trends, top_cities, barriers_to_entry, market_maturity. If no funding data, generate at least 3 plausible funding trends (e.g., '$10M Series A in 2023', '$5M Pre-Seed in 2022') and 3 top Indian cities as an alternate."""
-)
-
-novelty_prompt = PromptTemplate(
-    input_variables=["context"],
-    template="""Score innovation and novelty for startup idea in Indian context. Use this context: {context}. Return JSON with novelty_score, differentiation_factors, trend_alignment, suggested_pivots, innovation_level."""
-)
-
-final_report_prompt = PromptTemplate(
-    input_variables=["context"],
-    template="""Generate a comprehensive startup viability report for: {context}. Return JSON with viability_score, market_opportunity, key_risks, recommended_strategy, potential_partners, investment_requirement, timeline_to_market, success_probability."""
-)
-
-# --- Tool Definitions ---
-tools = [
-    Tool(
-        name="TrendAnalysisAgent",
-        func=lambda idea: LLMChain(llm=llm, prompt=trend_prompt).invoke({"idea": idea})["text"],
-        description="Analyze market demand and trends for a startup idea in India."
-    ),
-    Tool(
-        name="CompetitorAnalysisAgent",
-        func=lambda idea: LLMChain(
-            llm=llm,
-            prompt=competitor_prompt
-        ).invoke({"idea": idea, "rag_data": qa_chain.run(f"Find competitors for {idea} startup business model") if qa_chain else "No RAG data available"})["text"],
-        description="Analyze competitors using RAG and LLM."
-    ),
-    Tool(
-        name="SaturationAnalysisAgent",
-        func=lambda idea: LLMChain(
-            llm=llm,
-            prompt=saturation_prompt
-        ).invoke({"idea": idea, "web_funding": json.dumps(tavily_web_search(f"{idea} startup funding India"))})["text"],
-        description="Evaluate market saturation using Tavily web search and LLM."
-    ),
-    Tool(
-        name="NoveltyScoringAgent",
-        func=lambda context: LLMChain(
-            llm=llm,
-            prompt=novelty_prompt
-        ).invoke({"context": json.dumps(context)})["text"],
-        description="Score innovation and novelty using LLM."
-    ),
-    Tool(
-        name="FinalReportAgent",
-        func=lambda context: LLMChain(
-            llm=llm,
-            prompt=final_report_prompt
-        ).invoke({"context": json.dumps(context)})["text"],
-        description="Generate a final viability report using LLM."
-    ),
-]
-
-agent = initialize_agent(tools, llm, agent="zero-shot-react-description", verbose=True)
+        return await tavily_search(services.signals, query, api_key=TAVILY_API_KEY)
+    except SignalError as e:
+        # Saturation analysis can still run on dataset statistics alone
+        logger.warning("Tavily search failed: %s", e)
+        return []
+
+def competitor_rag_query(idea):
+    return f"Find competitors for {idea} startup business model"
+
+def competitor_rows(idea, rag_docs=None):
+    """Retrieved rows rendered as compact, deduplicated JSON lines within the token budget."""
+    if rag_docs is None:
+        rag_docs = services.retriever.search(competitor_rag_query(idea))
+    rows = render_rows(rag_docs, max_tokens=COMPETITOR_CONTEXT_TOKENS)
+    record(retrieval_k=len(rag_docs), prompt_tokens_saved=tokens_saved("\n".join(doc.page_content for doc in rag_docs), rows))
+    return rows or "No RAG data available"
+
+def market_stats(idea):
+    """Exact dataset figures for the idea's industry, as JSON for the prompts."""
+    industry = services.analytics.match_industry(idea)
+    if industry is None:
+        return "No matching industry in our datasets"
+    return json.dumps(services.analytics.industry_summary(industry))
 
 class IdeaRequest(BaseModel):
     startup_idea: str
 
-def safe_json_parse(text):
-    """Extract and parse the first valid JSON object from a string."""
-    import re
-    text = text.strip()
-    # Try to extract JSON from code blocks
-    if '```json' in text:
-        text = text.split('```json')[1].split('```')[0].strip()
-    # Find the first JSON object in the string
-    match = re.search(r'\{.*\}', text, re.DOTALL)
-    if match:
-        json_str = match.group(0)
+# --- Async Stage Execution ---
+async def run_blocking(func, *args):
+    """Run a blocking call on the bounded pool so the event loop stays free."""
+    loop = asyncio.get_running_loop()
+    # Carries the current stage into the worker thread and records how long the call queued
+    return await loop.run_in_executor(blocking_pool, bind_to_stage(func, *args))
+
+async def ensure_services():
+    """Build any missing service off the event loop; a no-op once warm-up has finished."""
+    if not services.ready:
+        await run_blocking(services.warm_up)
+
+async def trend_stage(idea):
+    return (await services.trend_chain.ainvoke({"idea": idea}))["text"]
+
+async def competitor_stage(idea, rag_docs=None):
+    if COMPETITOR_RAG_MODE != "qa":
+        rag_data = await run_blocking(competitor_rows, idea, rag_docs)
+    elif not services.qa_chain:
+        rag_data = "No RAG data available"
+    elif rag_docs is not None:
+        # Rows were already retrieved in bulk (batch mode); only the summarising call is left
+        rag_data = await services.qa_chain.combine_documents_chain.arun(input_documents=rag_docs, question=competitor_rag_query(idea))
+    else:
+        rag_data = await services.qa_chain.arun(competitor_rag_query(idea))
+    return (await services.competitor_chain.ainvoke({"idea": idea, "rag_data": rag_data, "market_stats": market_stats(idea)}))["text"]
+
+async def saturation_stage(idea):
+    web_funding = await tavily_web_search(f"{idea} startup funding India")
+    return (await services.saturation_chain.ainvoke({"idea": idea, "web_funding": json.dumps(web_funding), "market_stats": market_stats(idea)}))["text"]
+
+def stage_context(name, idea, context, max_tokens):
+    """The fields stage ``name`` needs from ``context``, within its token budget; records the tokens saved."""
+    compacted = compact_context(context, STAGE_CONTEXT_FIELDS[name], max_tokens)
+    record(prompt_tokens_saved=tokens_saved(json.dumps(context), compacted))
+    return {"idea": idea, "context": compacted}
+
+async def novelty_stage(idea, context):
+    return (await services.novelty_chain.ainvoke(stage_context("novelty", idea, context, NOVELTY_CONTEXT_TOKENS)))["text"]
+
+async def final_report_stage(idea, context, on_token=None):
+    inputs = stage_context("final_report", idea, context, FINAL_REPORT_CONTEXT_TOKENS)
+    if on_token is None:
+        return (await services.final_report_chain.ainvoke(inputs))["text"]
+    # Token-level streaming: hand each chunk to the caller while accumulating the full text.
+    # Stop reading once the JSON object closes, or as soon as a finished member breaks the schema
+    # (the rest would be thrown away; run_stage repairs it instead).
+    parser = IncrementalJSONParser()
+    async for chunk in (final_report_prompt | services.llm).astream(inputs):
+        on_token(chunk.content)
+        if parser.feed(chunk.content):
+            break
+        if parser.at_member_boundary and partial_errors(STAGE_SCHEMAS["final_report"], parser.partial() or {}):
+            break
+    return parser.text
+
+async def parse_stage_output(name, text, timeout=STAGE_TIMEOUT_SECONDS):
+    """Validate a stage's reply against its schema, with up to JSON_REPAIR_RETRIES repair calls.
+
+    Raises ValueError if the output still doesn't validate; every failed attempt is counted.
+    """
+    schema = STAGE_SCHEMAS[name]
+    for attempt in range(JSON_REPAIR_RETRIES + 1):
+        try:
+            result = validate_output(schema, text)
+            metrics.inc("stage_outputs_total", help="Stage outputs by parse outcome.", stage=name, outcome="repaired" if attempt else "valid")
+            return result
+        except (ValueError, ValidationError) as e:
+            record(parse_failures=1)
+            error = describe_error(e)
+        if attempt == JSON_REPAIR_RETRIES:
+            break
+        repaired = await asyncio.wait_for(services.repair_chain.ainvoke({
+            "schema": json.dumps(schema.model_json_schema()), "errors": error, "output": text,
+        }), timeout)
+        text = repaired["text"]
+    logger.warning("Stage %s output failed validation: %s", name, error)
+    metrics.inc("stage_outputs_total", help="Stage outputs by parse outcome.", stage=name, outcome="failed")
+    raise ValueError(f"{name} output failed validation: {error}")
+
+async def run_stage(name, coro, timeout=STAGE_TIMEOUT_SECONDS, failed=None):
+    """Await a stage with a timeout and validate its output.
+
+    A stage that times out (and is cancelled) or whose output stays invalid yields
+    ``empty_output(name)``, and its name is added to ``failed``.
+    """
+    with stage(name) as span:
         try:
-            return json.loads(json_str)
-        except Exception:
-            pass
-    # Fallback: try to parse the whole string
+            text = await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stage %s timed out after %.1fs", name, timeout)
+            span["error"] = "timeout"
+        else:
+            try:
+                return await parse_stage_output(name, text, timeout)
+            except asyncio.TimeoutError:
+                span["error"] = "repair_timeout"
+            except ValueError:
+                span["error"] = "invalid_output"
+        if failed is not None:
+            failed.add(name)
+        return empty_output(name)
+
+async def iter_parallel_stages(stages, failed=None):
+    """Run independent stages concurrently, yielding (name, result) as each finishes.
+
+    If a stage fails or the consumer stops early, the remaining stages are cancelled.
+    """
+    tasks = {asyncio.create_task(run_stage(name, coro, failed=failed)): name for name, coro in stages.items()}
+    pending = set(tasks)
     try:
-        return json.loads(text)
-    except Exception:
-        return {}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield tasks[task], task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+STAGE_ORDER = ["trends", "competitors", "saturation", "novelty", "final_report"]
+
+async def iter_pipeline(idea, rag_docs=None, on_token=None, failed=None):
+    """Yield (stage, result) as each stage completes.
+
+    Trend/competitor/saturation fan out in parallel; novelty and the final report
+    run on their results. ``on_token`` receives final-report text chunks as they stream.
+    Stages that fall back to an empty output are added to ``failed``.
+    """
+    results = {}
+    # Steps 1-3: independent analyses run in parallel
+    async for name, result in iter_parallel_stages({
+        "trends": trend_stage(idea),
+        "competitors": competitor_stage(idea, rag_docs),
+        "saturation": saturation_stage(idea),
+    }, failed):
+        results[name] = result
+        yield name, result
+    context = {name: results[name] for name in STAGE_ORDER[:3]}
+    # Step 4: Novelty Scoring
+    context["novelty"] = await run_stage("novelty", novelty_stage(idea, context), failed=failed)
+    yield "novelty", context["novelty"]
+    # Step 5: Final Report
+    yield "final_report", await run_stage("final_report", final_report_stage(idea, context, on_token), failed=failed)
+
+async def run_pipeline(idea, rag_docs=None, on_stage=None, on_token=None):
+    """Run every stage; returns (results by stage, names of the stages that failed)."""
+    results, failed = {}, set()
+    async for name, result in iter_pipeline(idea, rag_docs, on_token, failed):
+        results[name] = result
+        if on_stage:
+            on_stage(name, result)
+    return {name: results[name] for name in STAGE_ORDER}, failed
+
+async def evaluate_idea(idea, vector=None, rag_docs=None, on_stage=None, on_token=None):
+    """Cached evaluation of one idea.
+
+    Batch runs pass a precomputed vector and retrieved rows; streaming callers pass
+    ``on_stage``/``on_token`` callbacks, which also fire for cached results.
+    """
+    await ensure_services()
+    with trace("evaluate_idea", idea=idea):
+        with stage("cache_lookup"):
+            if vector is None:
+                vector = await run_blocking(services.evaluation_cache.embed, idea)
+            analysis_results = await run_blocking(services.evaluation_cache.get, idea, vector)
+            record(cache_hits=int(analysis_results is not None))
+        if analysis_results is None:
+            analysis_results, failed = await run_pipeline(idea, rag_docs, on_stage, on_token)
+            if failed:
+                # A degraded report would be served to this idea and its near-duplicates for the whole TTL
+                record(failed_stages=sorted(failed))
+                logger.warning("Not caching evaluation with failed stages: %s", ", ".join(sorted(failed)))
+            else:
+                await run_blocking(services.evaluation_cache.put, idea, analysis_results, vector)
+        elif on_stage:
+            for name in STAGE_ORDER:
+                on_stage(name, analysis_results.get(name, {}))
+        return analysis_results
+
+def prefetch_batch(ideas):
+    """Embed every idea and its competitor query in one call, then run hybrid retrieval with those vectors."""
+    texts = [normalize_idea(idea) for idea in ideas] + [competitor_rag_query(idea) for idea in ideas]
+    vectors = services.embeddings.embed_documents(texts)
+    return [
+        {
+            "vector": np.asarray(vectors[i], dtype=np.float32),
+            "rag_docs": services.retriever.search(competitor_rag_query(ideas[i]), query_vector=vectors[len(ideas) + i]),
+        }
+        for i in range(len(ideas))
+    ]
+
+async def evaluate_batch_item(idea, extra):
+    return await evaluate_idea(idea, extra["vector"], extra["rag_docs"])
+
+# --- Background Jobs (bounded worker pool, SQLite result store; see jobs.py) ---
+# Workers start on the first submission, so the queue also works without the lifespan
+job_queue = JobQueue(evaluate_idea, lambda: services.job_store, run_blocking, workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE,
+                     lease_seconds=JOB_LEASE_SECONDS, poll_seconds=JOB_POLL_SECONDS)
+
+async def submit_job(idea, priority):
+    try:
+        return await job_queue.submit(idea, priority)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=f"Evaluation queue is full: {e}",
+                            headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)})
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: IdeaRequest, response: Response,
+                     priority: str = Query("normal", pattern=f"^({'|'.join(PRIORITIES)})$")):
+    """Queue an evaluation and return its id at once; poll ``GET /jobs/{job_id}`` for the result.
+
+    An idea that is already queued or running returns the existing job.
+    """
+    job_id, deduplicated = await submit_job(request.startup_idea, priority)
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}", "deduplicated": deduplicated}
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+@app.get("/jobs")
+async def job_queue_stats():
+    return await job_queue.stats()
 
 @app.post("/validate-idea")
 async def validate_idea(request: IdeaRequest):
-    try:
-        idea = request.startup_idea
-        # Step 1: Trend Analysis
-        trends = safe_json_parse(agent.tools[0].func(idea))
-        # Step 2: Competitor Analysis
-        competitors = safe_json_parse(agent.tools[1].func(idea))
-        # Ensure at least 3 plausible direct competitors and a numeric benchmark_score
-        if not competitors.get("direct_competitors") or not isinstance(competitors["direct_competitors"], list) or len(competitors["direct_competitors"]) < 2:
-            competitors["direct_competitors"] = [
-                {"name": "Zoho Books", "description": "Popular Indian accounting and invoicing software with GST compliance."},
-                {"name": "Tally Solutions", "description": "Widely used accounting software in India, offering GST features."},
-                {"name": "Vyapar", "description": "Mobile-first invoicing and accounting app for Indian SMEs."}
-            ]
-        if not competitors.get("benchmark_score") or not isinstance(competitors["benchmark_score"], (int, float, str)) or str(competitors["benchmark_score"]).lower() in ["n/a", "unknown", "insufficient data", ""]:
-            competitors["benchmark_score"] = 65
-        # Step 3: Saturation Analysis
-        saturation = safe_json_parse(agent.tools[2].func(idea))
-        # Step 4: Novelty Scoring
-        novelty = safe_json_parse(agent.tools[3].func({
-            "trends": trends,
-            "competitors": competitors,
-            "saturation": saturation
-        }))
-        # Step 5: Final Report
-        final_report = safe_json_parse(agent.tools[4].func({
-            "trends": trends,
-            "competitors": competitors,
-            "saturation": saturation,
-            "novelty": novelty
-        }))
-        # Compose response
-        return {
-            "success": True,
-            "data": {
-                "startup_idea": idea,
-                "analysis_results": {
-                    "trends": trends,
-                    "competitors": competitors,
-                    "saturation": saturation,
-                    "novelty": novelty,
-                    "final_report": final_report
-                }
-            }
+    """Synchronous wrapper: queue the idea in the high-priority lane and wait for its job."""
+    idea = request.startup_idea
+    job_id, _ = await submit_job(idea, "high")
+    job = await job_queue.wait(job_id)
+    if job["status"] != "done":
+        raise HTTPException(status_code=500, detail=job["error"] or f"Job {job_id} did not finish")
+    # Compose response
+    return {
+        "success": True,
+        "data": {
+            "startup_idea": idea,
+            "analysis_results": job["result"]
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    }
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.post("/validate-idea/stream")
+async def validate_idea_stream(request: IdeaRequest):
+    """Server-Sent Events variant of /validate-idea.
+
+    Emits a ``stage`` event per finished stage, ``token`` events while the final report
+    is generated, then ``done`` carrying the same body /validate-idea returns. The tokens
+    are the raw reply; once it has been validated (and repaired if needed) a ``replace``
+    event carries the report as parsed JSON, which clients show instead of the tokens.
+    """
+    idea = request.startup_idea
+    events = asyncio.Queue()
+    streamed = []
+
+    def on_token(text):
+        streamed.append(text)
+        events.put_nowait(sse_event("token", {"stage": "final_report", "text": text}))
+
+    def on_stage(name, result):
+        if name == "final_report" and streamed:
+            events.put_nowait(sse_event("replace", {"stage": name, "result": result}))
+        events.put_nowait(sse_event("stage", {"stage": name, "result": result}))
+
+    async def produce():
+        try:
+            analysis_results = await evaluate_idea(idea, on_stage=on_stage, on_token=on_token)
+            events.put_nowait(sse_event("done", {
+                "success": True,
+                "data": {"startup_idea": idea, "analysis_results": analysis_results}
+            }))
+        except Exception as e:
+            events.put_nowait(sse_event("error", {"success": False, "detail": str(e)}))
+        finally:
+            events.put_nowait(None)
+
+    async def stream_events():
+        producer = asyncio.create_task(produce())
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+        finally:
+            # Client went away: stop paying for the remaining LLM calls
+            producer.cancel()
+
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/validate-ideas:batch")
+async def validate_ideas_batch(
+    request: Request,
+    concurrency: int = Query(4, ge=1),
+    run_id: Optional[str] = Query(None, pattern=r"^[\w-]+$"),
+):
+    """Score a CSV or JSONL body of ideas, streaming one NDJSON record per idea.
+
+    Passing a ``run_id`` checkpoints finished ideas so re-posting the same body resumes the run.
+    """
+    body = (await request.body()).decode("utf-8-sig")
+    try:
+        items = parse_ideas(body, format_for(content_type=request.headers.get("content-type")))
+    except (ValueError, json.JSONDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch input: {e}")
+    checkpoint_path = os.path.join(BATCH_RUNS_DIR, f"{run_id}.ndjson") if run_id else None
+
+    async def stream_records():
+        async for batch_record in run_batch(
+            items,
+            evaluate_batch_item,
+            prefetch_batch,
+            concurrency=min(concurrency, MAX_BATCH_CONCURRENCY),
+            checkpoint_path=checkpoint_path,
+        ):
+            yield json.dumps(batch_record) + "\n"
+
+    return StreamingResponse(stream_records(), media_type="application/x-ndjson")
+
+@app.get("/cache/stats")
+async def cache_stats(services: Services = Depends(get_services)):
+    return await run_blocking(lambda: services.evaluation_cache.stats())
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Per-stage latency, token, cache and failure metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def traces_enabled():
+    """Traces are unauthenticated, so their endpoints exist only with TRACES_ENDPOINT=1."""
+    if not TRACES_ENDPOINT:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/traces", dependencies=[Depends(traces_enabled)])
+async def list_traces(limit: int = Query(20, ge=1, le=200)):
+    """Most recent evaluation traces in this worker, newest first."""
+    return recent_traces(limit)
+
+@app.get("/traces/{trace_id}", dependencies=[Depends(traces_enabled)])
+async def trace_detail(trace_id: str):
+    data = get_trace(trace_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired trace")
+    return data
+
+@app.get("/ready")
+async def ready(services: Services = Depends(get_services)):
+    """Readiness probe: passes only once the background warm-up has built every service."""
+    if services.ready:
+        return {"ready": True}
+    return JSONResponse(status_code=503, content={"ready": False, "error": services.warmup_error})
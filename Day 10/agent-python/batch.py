@@ -0,0 +1,117 @@
+"""Batch evaluation of many ideas with bounded concurrency and resumable checkpoints.
+
+Input is CSV (a ``startup_idea``, ``idea`` or ``title`` column, optional ``id``)
+or JSONL (objects with the same keys, or bare strings). Results are NDJSON
+records, one per idea. Successful records are appended to the checkpoint file
+as they finish, so an interrupted run picks up where it stopped.
+"""
+import io
+import csv
+import json
+import asyncio
+from pathlib import Path
+
+IDEA_FIELDS = ("startup_idea", "idea", "title")
+
+
+def _idea_from(record):
+    if isinstance(record, str):
+        return record
+    for field in IDEA_FIELDS:
+        if record.get(field):
+            return str(record[field])
+    return ""
+
+
+def parse_ideas(text, fmt):
+    """Parse CSV or JSONL text into ``[{"id": ..., "startup_idea": ...}]``, skipping blank ideas.
+
+    Rows without an ``id`` get ``row-<index>``; a repeated id raises ValueError,
+    since the checkpoint would treat the second row as already done.
+    """
+    if fmt == "csv":
+        records = list(csv.DictReader(io.StringIO(text)))
+    elif fmt == "jsonl":
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        raise ValueError(f"Unsupported batch format: {fmt}")
+    items, seen = [], set()
+    for i, record in enumerate(records):
+        idea = _idea_from(record).strip()
+        if idea:
+            record_id = record.get("id") if isinstance(record, dict) else None
+            # Generated ids are prefixed so they can't collide with a numeric id given on another row
+            item_id = f"row-{i}" if record_id in (None, "") else str(record_id)
+            if item_id in seen:
+                raise ValueError(f"duplicate id {item_id!r}")
+            seen.add(item_id)
+            items.append({"id": item_id, "startup_idea": idea})
+    return items
+
+
+def format_for(filename=None, content_type=None):
+    if (content_type and "csv" in content_type) or (filename and filename.endswith(".csv")):
+        return "csv"
+    return "jsonl"
+
+
+def load_checkpoint(path):
+    """Completed records by id from an NDJSON checkpoint (a torn last line is ignored)."""
+    done = {}
+    if path and Path(path).exists():
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[record["id"]] = record
+    return done
+
+
+async def run_batch(items, evaluate, prefetch, concurrency=4, checkpoint_path=None, chunk_size=64):
+    """Yield one result record per item, replaying checkpointed ones first.
+
+    ``prefetch(ideas)`` runs once per chunk and returns per-idea extras (embeddings,
+    retrieved rows) computed in bulk; ``evaluate(idea, extra)`` is the per-idea coroutine.
+    """
+    done = load_checkpoint(checkpoint_path)
+    for item in items:
+        if item["id"] in done:
+            yield done[item["id"]]
+    pending = [item for item in items if item["id"] not in done]
+    if not pending:
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    checkpoint = None
+    if checkpoint_path:
+        Path(checkpoint_path).parent.mkdir(parents=True, exist_ok=True)
+        checkpoint = open(checkpoint_path, "a", encoding="utf-8")
+
+    async def evaluate_item(item, extra):
+        async with semaphore:
+            try:
+                results = await evaluate(item["startup_idea"], extra)
+                return {**item, "success": True, "analysis_results": results}
+            except Exception as e:
+                return {**item, "success": False, "error": str(e)}
+
+    try:
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            extras = await asyncio.to_thread(prefetch, [item["startup_idea"] for item in chunk])
+            tasks = [asyncio.create_task(evaluate_item(item, extra)) for item, extra in zip(chunk, extras)]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    record = await finished
+                    if checkpoint and record["success"]:
+                        checkpoint.write(json.dumps(record) + "\n")
+                        checkpoint.flush()
+                    yield record
+            finally:
+                for task in tasks:
+                    task.cancel()
+    finally:
+        if checkpoint:
+            checkpoint.close()
@@ -0,0 +1,51 @@
+"""Score a CSV or JSONL file of startup ideas from the command line.
+
+    python batch_validate.py ideas.csv -o results.ndjson --concurrency 4
+
+The output file doubles as the checkpoint: re-running the same command skips
+ideas that already have a result and only evaluates the rest. Failed ideas are
+reported on stderr and retried on the next run.
+"""
+import sys
+import json
+import asyncio
+import argparse
+from pathlib import Path
+from batch import parse_ideas, format_for, run_batch
+
+
+async def run(items, output, concurrency):
+    # Importing the app pulls in FastAPI and LangChain (its services are only built on the first evaluation), so defer it until input is valid
+    from app import evaluate_batch_item, prefetch_batch
+
+    completed = failed = 0
+    async for record in run_batch(items, evaluate_batch_item, prefetch_batch, concurrency=concurrency, checkpoint_path=output):
+        if record["success"]:
+            completed += 1
+        else:
+            failed += 1
+            print(json.dumps(record), file=sys.stderr)
+        print(f"\r{completed + failed}/{len(items)} done, {failed} failed", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-evaluate startup ideas.")
+    parser.add_argument("input", help="CSV or JSONL file of ideas")
+    parser.add_argument("-o", "--output", required=True, help="NDJSON results file (also used to resume)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from file extension)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Ideas evaluated at once (default: 4)")
+    args = parser.parse_args()
+
+    text = Path(args.input).read_text(encoding="utf-8-sig")
+    try:
+        items = parse_ideas(text, args.format or format_for(filename=args.input))
+    except (ValueError, json.JSONDecodeError) as e:
+        parser.error(f"invalid input: {e}")
+    failed = asyncio.run(run(items, args.output, max(args.concurrency, 1)))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
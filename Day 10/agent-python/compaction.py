@@ -0,0 +1,116 @@
+"""Compact, token-budgeted prompt context.
+
+- ``render_rows``: retrieved dataset rows for the competitor stage.
+- ``compact_context``: earlier stages' outputs for the novelty and final-report
+  stages, reduced to the fields each one reads.
+
+Both measure their output with tiktoken so callers can record the tokens saved
+against the uncompacted text.
+"""
+import json
+from functools import lru_cache
+import tiktoken
+
+# Fields worth showing the competitor stage; everything else in a row is noise
+COMPETITOR_FIELDS = ("company_name", "domain", "industry", "keywords", "market_share(%)", "strengths", "weaknesses",
+                     "funding_status", "city", "founding_year")
+# Fields each downstream stage reads from the earlier stages' outputs, most important first
+STAGE_CONTEXT_FIELDS = {
+    "novelty": {
+        "trends": ("market_potential", "growth_rate", "related_terms", "demand_risk"),
+        "competitors": ("direct_competitors", "competitive_advantages", "market_gaps", "competitive_intensity"),
+        "saturation": ("saturation_score", "market_maturity", "barriers_to_entry"),
+    },
+    "final_report": {
+        "trends": ("market_potential", "growth_rate", "demand_risk", "top_regions"),
+        "competitors": ("direct_competitors", "benchmark_score", "competitive_intensity", "market_gaps", "ip_risks"),
+        "saturation": ("saturation_score", "market_maturity", "funding_trends", "barriers_to_entry", "top_cities"),
+        "novelty": ("novelty_score", "innovation_level", "differentiation_factors", "suggested_pivots"),
+    },
+}
+# (items per list, characters per string), tried in order until the context fits its budget
+COMPACTION_LEVELS = ((5, 240), (3, 120), (2, 60), (1, 40))
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # Gemini has no public tokenizer; cl100k is close enough for budgeting
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None  # offline host without the cached BPE file
+
+
+def count_tokens(text):
+    encoding = _encoding()
+    return len(encoding.encode(text)) if encoding else len(text) // 4 + 1
+
+
+def to_json(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def tokens_saved(original, compacted):
+    return max(0, count_tokens(original) - count_tokens(compacted))
+
+
+def compact_value(value, max_items, max_chars):
+    """Shorten strings, lists and objects; a competitor object collapses to its name and a short description."""
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return value if len(value) <= max_chars else value[:max_chars - 1].rstrip() + "…"
+    if isinstance(value, list):
+        return [compact_value(item, max_items, max_chars) for item in value[:max_items]]
+    if isinstance(value, dict):
+        if "name" in value:
+            value = {"name": value["name"], "description": value.get("description")}
+        return {key: compact_value(item, max_items, max_chars // 2) for key, item in list(value.items())[:max_items] if item}
+    return value
+
+
+def compact_context(context, stage_fields, max_tokens, extra=None):
+    """Earlier stage outputs reduced to ``stage_fields``, rendered as compact JSON within ``max_tokens``.
+
+    Lists and strings are shortened step by step; if that is not enough, the least
+    important fields (the last ones listed per stage) are dropped.
+    """
+    for max_items, max_chars in COMPACTION_LEVELS:
+        data = dict(extra or {})
+        for name, fields in stage_fields.items():
+            output = context.get(name) or {}
+            kept = {field: compact_value(output[field], max_items, max_chars) for field in fields if output.get(field) not in (None, "", [], {})}
+            if kept:
+                data[name] = kept
+        text = to_json(data)
+        if count_tokens(text) <= max_tokens:
+            return text
+    # Still over budget at the tightest level: drop fields round-robin from the end of each stage's list
+    droppable = [(name, fields[position]) for position in reversed(range(max(map(len, stage_fields.values()))))
+                 for name, fields in stage_fields.items() if position < len(fields) and fields[position] in data.get(name, {})]
+    for name, field in droppable:
+        if count_tokens(text) <= max_tokens:
+            break
+        del data[name][field]
+        text = to_json(data)
+    return text
+
+
+def render_rows(documents, fields=COMPETITOR_FIELDS, max_tokens=600):
+    """One compact JSON object per company, merging duplicate rows, stopping at ``max_tokens``."""
+    merged = {}
+    for document in documents:
+        row = {field: document.metadata[field] for field in fields if document.metadata.get(field)}
+        if not row:
+            continue
+        key = str(row.get("company_name", document.page_content)).strip().lower()
+        for field, value in row.items():
+            merged.setdefault(key, {}).setdefault(field, value)
+    lines, used = [], 0
+    for row in merged.values():
+        line = to_json(row)
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
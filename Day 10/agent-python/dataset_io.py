@@ -0,0 +1,14 @@
+"""Helpers for reading the CSV datasets shipped in ``datasets/``."""
+import csv
+
+
+def read_dataset_rows(filepath):
+    """Read a CSV into a list of dicts, unwrapping exports that quote every whole line."""
+    with open(filepath, 'r', encoding='utf-8-sig', newline='') as file:
+        lines = [line for line in csv.reader(file) if line]
+    if not lines:
+        return []
+    if len(lines[0]) == 1 and ',' in lines[0][0]:
+        lines = [next(csv.reader([line[0]])) for line in lines]
+    header, body = lines[0], lines[1:]
+    return [dict(zip(header, values)) for values in body]
@@ -0,0 +1,201 @@
+"""Local embedding service with dynamic micro-batching and an LRU cache.
+
+``EmbeddingService`` implements LangChain's ``Embeddings`` interface, so the
+vector store, the evaluation cache and the batch prefetch use it unchanged.
+
+A dedicated batcher thread collects texts from all concurrent callers for up
+to ``max_wait_ms`` (or until ``max_batch`` texts are waiting). It then embeds
+the distinct uncached texts in one forward pass. By default the model runs in
+process. With ``workers > 0`` it runs in a pool of worker processes, so
+several batches can be encoded in parallel.
+
+Backends:
+
+- ``torch``: sentence-transformers as before.
+- ``torch-int8``: the same model with its Linear layers dynamically quantized
+  to int8. No extra dependencies.
+- ``onnx-int8``: a pre-quantized ONNX export run by onnxruntime. Needs
+  ``sentence-transformers[onnx]``.
+
+Quantized vectors differ slightly from fp32 ones, so rebuild the index
+(``python vector_index.py build-index``) after switching backends.
+"""
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx2.onnx")
+logger = logging.getLogger(__name__)
+
+
+# --- Backends ---
+def load_model(model_name, backend=EMBEDDING_BACKEND):
+    from sentence_transformers import SentenceTransformer
+    if backend == "onnx-int8":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs={"file_name": EMBEDDING_ONNX_FILE})
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend != "torch":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+    return model
+
+
+def encode(model, texts, batch_size):
+    return model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False).tolist()
+
+
+# Per-process model for the worker pool
+_worker_model = None
+
+
+def _init_worker(model_name, backend):
+    global _worker_model
+    # One process per core already; keep torch from oversubscribing inside each
+    import torch
+    torch.set_num_threads(1)
+    _worker_model = load_model(model_name, backend)
+
+
+def _encode_in_worker(texts, batch_size):
+    return encode(_worker_model, texts, batch_size)
+
+
+class EmbeddingService(Embeddings):
+    def __init__(self, model_name, backend=EMBEDDING_BACKEND, workers=EMBEDDING_WORKERS, max_batch=EMBEDDING_MAX_BATCH,
+                 max_wait_ms=EMBEDDING_MAX_WAIT_MS, cache_size=EMBEDDING_CACHE_SIZE, model=None):
+        self.model_name = model_name
+        self.backend = backend
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self.stats = {"texts": 0, "cache_hits": 0, "batches": 0, "encoded": 0}
+        self._model = model
+        self._cache = OrderedDict()  # text -> vector
+        self._cache_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._pid = None  # batcher thread and pool belong to the process that started them
+
+    # --- Embeddings interface ---
+    def embed_documents(self, texts):
+        return [future.result() for future in self.submit(texts)]
+
+    def embed_query(self, text):
+        return self.submit([text])[0].result()
+
+    async def aembed_documents(self, texts):
+        return list(await asyncio.gather(*(asyncio.wrap_future(future) for future in self.submit(texts))))
+
+    async def aembed_query(self, text):
+        return await asyncio.wrap_future(self.submit([text])[0])
+
+    def load(self):
+        """Load the in-process model now (e.g. in the Gunicorn master, to share it across forks)."""
+        if self.workers == 0 and self._model is None:
+            self._model = load_model(self.model_name, self.backend)
+        return self
+
+    # --- Batching ---
+    def submit(self, texts):
+        """One future per text; cached texts resolve immediately, the rest join the next batch."""
+        self._ensure_started()
+        futures = []
+        with self._cache_lock:
+            self.stats["texts"] += len(texts)
+            for text in texts:
+                future = Future()
+                vector = self._cache.get(text)
+                if vector is not None:
+                    self._cache.move_to_end(text)
+                    self.stats["cache_hits"] += 1
+                    future.set_result(vector)
+                else:
+                    self._queue.put((text, future))
+                futures.append(future)
+        return futures
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._pool = None
+            if self.workers > 0:
+                # Spawned, not forked: the parent has threads (and maybe torch state) that don't survive fork
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_init_worker, initargs=(self.model_name, self.backend))
+                # Bound the batches in flight so the queue, not the pool, absorbs bursts
+                self._slots = threading.Semaphore(self.workers * 2)
+            else:
+                self.load()
+            threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            pending = {}  # distinct text -> futures waiting on it
+            for text, future in batch:
+                pending.setdefault(text, []).append(future)
+            texts = list(pending)
+            self.stats["batches"] += 1
+            self.stats["encoded"] += len(texts)
+            if self._pool is None:
+                try:
+                    self._resolve(pending, texts, encode(self._model, texts, self.max_batch))
+                except Exception as e:
+                    self._fail(pending, e)
+                continue
+            self._slots.acquire()
+            job = self._pool.submit(_encode_in_worker, texts, self.max_batch)
+            job.add_done_callback(lambda job, pending=pending, texts=texts: self._finish(job, pending, texts))
+
+    def _finish(self, job, pending, texts):
+        self._slots.release()
+        try:
+            self._resolve(pending, texts, job.result())
+        except Exception as e:
+            self._fail(pending, e)
+
+    def _resolve(self, pending, texts, vectors):
+        with self._cache_lock:
+            for text, vector in zip(texts, vectors):
+                self._cache[text] = vector
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        for text, vector in zip(texts, vectors):
+            for future in pending[text]:
+                future.set_result(vector)
+
+    def _fail(self, pending, error):
+        logger.exception("Embedding batch failed", exc_info=error)
+        for futures in pending.values():
+            for future in futures:
+                future.set_exception(error)
@@ -0,0 +1,24 @@
+"""Gunicorn settings for running several API workers that share one embedding model.
+
+    gunicorn app:app -c gunicorn.conf.py
+
+The app is preloaded in the master and the embedding model is loaded there
+before workers fork. Workers then share the model weights copy-on-write
+instead of each loading its own copy. Everything else is still built lazily
+by each worker's warm-up.
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+
+# Tokenizer thread pools don't survive fork; keep them single-threaded in workers
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+def on_starting(server):
+    from services import services
+    services.embeddings
@@ -0,0 +1,327 @@
+"""Background evaluation jobs: a bounded, prioritised queue with a SQLite result store.
+
+``POST /jobs`` enqueues an idea and returns a job id right away. A fixed pool
+of worker tasks runs the pipeline, and ``GET /jobs/{id}`` polls the stored
+status and result.
+
+The SQLite table is the queue, so every Gunicorn worker sharing the file
+sees the same jobs:
+
+- Ideas are deduplicated by normalized text: submitting an idea that is
+  already queued or running (in any process) returns the existing job. A
+  duplicate submitted in a faster lane promotes a still-queued job to that
+  lane.
+- Priority lanes run ``high`` before ``normal`` before ``low``, first in,
+  first out within a lane.
+- Once ``max_queued`` jobs are waiting, submissions are refused with
+  ``QueueFull``; the API maps that to HTTP 429.
+- A worker claims a job with one ``BEGIN IMMEDIATE`` transaction, so no job
+  is started twice. The claim carries a lease that the owning process renews
+  while it runs. A running job whose lease has expired (its process died) is
+  claimed again by whichever worker is free next.
+
+Stopping the queue hands the jobs it was running back as queued.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from workshop_common.eval_cache import EvaluationCache
+from workshop_common.telemetry import metrics
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+LANE = "CASE priority " + " ".join(f"WHEN '{name}' THEN {rank}" for name, rank in PRIORITIES.items()) + " ELSE 1 END"
+JOB_FIELDS = ("id", "idea", "priority", "status", "result", "error", "created_at", "started_at", "finished_at")
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; retry later."""
+
+
+class JobStore:
+    def __init__(self, path, retention_seconds=24 * 3600):
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        # Autocommit; multi-statement changes use explicit BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                idea TEXT NOT NULL,
+                idea_key TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                lease_until REAL
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_idea_key ON jobs (idea_key, status)")
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def submit(self, job, max_queued):
+        """Insert ``job`` unless its idea is already queued or running; returns (job id, deduplicated).
+
+        A duplicate in a faster lane promotes the queued job. Raises QueueFull at capacity.
+        """
+        with self._transaction() as conn:
+            existing = conn.execute(
+                "SELECT id FROM jobs WHERE idea_key = ? AND status IN ('queued', 'running') ORDER BY created_at LIMIT 1",
+                (job["idea_key"],),
+            ).fetchone()
+            if existing:
+                conn.execute(
+                    f"UPDATE jobs SET priority = ? WHERE id = ? AND status = 'queued' AND {LANE} > ?",
+                    (job["priority"], existing[0], PRIORITIES.get(job["priority"], PRIORITIES["normal"])),
+                )
+                return existing[0], True
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= max_queued:
+                raise QueueFull(f"{queued} jobs already queued")
+            conn.execute(
+                "INSERT INTO jobs (id, idea, idea_key, priority, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job["id"], job["idea"], job["idea_key"], job["priority"], job["created_at"]),
+            )
+            return job["id"], False
+
+    def claim(self, owner, lease_seconds):
+        """Start the next job for ``owner``: the oldest in the fastest lane, or a running job whose lease expired."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"""SELECT id, idea, priority, status, created_at FROM jobs
+                    WHERE status = 'queued' OR (status = 'running' AND lease_until < ?)
+                    ORDER BY {LANE}, created_at LIMIT 1""",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, started_at = ? WHERE id = ?",
+                (owner, now + lease_seconds, now, row[0]),
+            )
+        return dict(zip(("id", "idea", "priority", "status", "created_at"), row))
+
+    def renew(self, owner, lease_seconds):
+        """Extend the lease on every job ``owner`` is running."""
+        self._execute("UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = 'running'",
+                      (time.time() + lease_seconds, owner))
+
+    def release(self, owner):
+        """Hand ``owner``'s running jobs back to the queue; returns how many."""
+        return self._execute("UPDATE jobs SET status = 'queued', owner = NULL, lease_until = NULL "
+                             "WHERE owner = ? AND status = 'running'", (owner,))
+
+    def finish(self, job_id, owner, result):
+        """Store the result; False if ``owner`` no longer holds the job (its lease expired and it was reclaimed)."""
+        return self._execute("UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                             (json.dumps(result), time.time(), job_id, owner)) > 0
+
+    def fail(self, job_id, owner, error):
+        return self._execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                             (error, time.time(), job_id, owner)) > 0
+
+    def get(self, job_id):
+        """The job's record, with ``queue_position`` (jobs that will start before it) while it is queued."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(zip(JOB_FIELDS, row))
+            if job["status"] == "queued":
+                job["queue_position"] = self._conn.execute(
+                    f"""SELECT COUNT(*) FROM jobs WHERE status = 'queued'
+                        AND ({LANE} < ? OR ({LANE} = ? AND created_at < ?))""",
+                    (PRIORITIES.get(job["priority"], PRIORITIES["normal"]),) * 2 + (job["created_at"],),
+                ).fetchone()[0]
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def counts(self):
+        """Jobs by status."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def purge(self):
+        """Drop finished jobs older than the retention window."""
+        return self._execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at <= ?",
+                             (time.time() - self.retention_seconds,))
+
+    def _execute(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+
+class JobQueue:
+    """Runs ``evaluate(idea)`` for jobs in the store on ``workers`` asyncio tasks, started on first use."""
+
+    def __init__(self, evaluate, store_factory, run_blocking, workers=4, max_queued=100, lease_seconds=60, poll_seconds=1.0):
+        self.evaluate = evaluate
+        self.store_factory = store_factory
+        self.run_blocking = run_blocking
+        self.workers = workers
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._tasks = []
+        self._waiters = {}  # job id -> future resolved when a worker in this process finishes it
+        self._wakeup = None  # set on submit so idle workers don't wait for the next poll
+        self._start_lock = None
+        self._loop = None
+        self.owner = None
+        self.store = None
+
+    def _running(self):
+        return bool(self._tasks) and self._loop is asyncio.get_running_loop()
+
+    async def start(self):
+        if self._running():
+            return
+        if self._loop is not asyncio.get_running_loop():
+            # A new event loop (lifespan re-entry, reload): state from the old loop is unusable
+            self._reset()
+            self._start_lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+        async with self._start_lock:
+            if self._tasks:
+                return
+            self.store = await self.run_blocking(self.store_factory)
+            await self.run_blocking(self.store.purge)
+            # Set here rather than in __init__: a preloading Gunicorn master forks after building the queue
+            self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        """Cancel the workers and hand their running jobs back to the queue.
+
+        Another process (or the next ``start()``) picks them up. Callers still
+        waiting on a job are released and see it unfinished.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._tasks and self.store is not None:
+            released = await self.run_blocking(self.store.release, self.owner)
+            if released:
+                logger.info("Re-queued %d running jobs", released)
+        self._reset()
+
+    def _reset(self):
+        self._tasks = []
+        for future in self._waiters.values():
+            if not future.done() and not future.get_loop().is_closed():
+                future.set_result(None)
+        self._waiters.clear()
+
+    async def submit(self, idea, priority="normal"):
+        """Enqueue ``idea``; returns (job id, deduplicated). Raises QueueFull at capacity."""
+        await self.start()
+        job = {"id": uuid.uuid4().hex, "idea": idea, "idea_key": EvaluationCache.key_for(idea),
+               "priority": priority, "created_at": time.time()}
+        try:
+            job_id, deduplicated = await self.run_blocking(self.store.submit, job, self.max_queued)
+        except QueueFull:
+            metrics.inc("jobs_submitted_total", help="Job submissions by outcome.", outcome="rejected")
+            raise
+        metrics.inc("jobs_submitted_total", help="Job submissions by outcome.", outcome="deduplicated" if deduplicated else "queued")
+        if not deduplicated:
+            self._wakeup.set()
+        return job_id, deduplicated
+
+    async def wait(self, job_id):
+        """Block until the job finishes; returns its stored record.
+
+        Jobs run by this process wake the caller directly; jobs another process
+        claimed are polled every ``poll_seconds``.
+        """
+        while True:
+            job = await self.get(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            if job_id not in self._waiters:
+                self._waiters[job_id] = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._waiters[job_id]), self.poll_seconds)
+            except asyncio.TimeoutError:
+                continue
+            return await self.get(job_id)
+
+    async def get(self, job_id):
+        await self.start()
+        return await self.run_blocking(self.store.get, job_id)
+
+    async def stats(self):
+        await self.start()
+        counts = await self.run_blocking(self.store.counts)
+        return {"queued": counts.get("queued", 0), "running": counts.get("running", 0),
+                "workers": self.workers, "max_queued": self.max_queued}
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.run_blocking(self.store.renew, self.owner, self.lease_seconds)
+            except sqlite3.Error:
+                logger.exception("Could not renew job leases")
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            job = await self.run_blocking(self.store.claim, self.owner, self.lease_seconds)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if job["status"] == "running":
+                logger.warning("Job %s lost its lease and was reclaimed", job["id"])
+            metrics.observe("job_queue_seconds", time.time() - job["created_at"], help="Time a job waited for a worker.",
+                            priority=job["priority"])
+            try:
+                result = await self.evaluate(job["idea"])
+                stored = await self.run_blocking(self.store.finish, job["id"], self.owner, result)
+                status = "done"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Job %s failed", job["id"])
+                stored = await self.run_blocking(self.store.fail, job["id"], self.owner, str(e))
+                status = "failed"
+            finally:
+                future = self._waiters.pop(job["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(None)
+            if stored:
+                metrics.inc("jobs_finished_total", help="Finished jobs by status.", status=status)
+            else:
+                logger.warning("Job %s was reclaimed by another worker; dropping this result", job["id"])
@@ -0,0 +1,37 @@
+from langchain import PromptTemplate
+
+# --- Analysis Prompt Templates ---
+trend_prompt = PromptTemplate(
+    input_variables=["idea"],
+    template="""Analyze market demand for startup idea: '{idea}' in Indian market. Return JSON with search_volume, growth_rate, top_regions, related_terms, demand_risk, market_potential."""
+)
+
+competitor_prompt = PromptTemplate(
+    input_variables=["idea", "rag_data", "market_stats"],
+    template="""Analyze competitive landscape for startup idea: '{idea}' in India. Use this data: {rag_data}. Exact market statistics from our datasets (use these figures, including the HHI concentration, instead of estimating): {market_stats}. If no real competitors are found, generate at least 3 plausible direct competitors and a numeric benchmark_score (1-100) for the Indian market. Return JSON with direct_competitors, competitive_advantages, market_gaps, ip_risks, benchmark_score, competitive_intensity."""
+)
+
+saturation_prompt = PromptTemplate(
+    input_variables=["idea", "web_funding", "market_stats"],
+    template="""Evaluate market saturation for startup idea: '{idea}' in Indian market. Use this funding data: {web_funding}. Exact funding statistics from our datasets (use these figures for funding trends, round mix, growth and top cities instead of estimating): {market_stats}. Return JSON with saturation_score, funding_trends, top_cities, barriers_to_entry, market_maturity. If no funding data, generate at least 3 plausible funding trends (e.g., '$10M Series A in 2023', '$5M Pre-Seed in 2022') and 3 top Indian cities as an alternate."""
+)
+
+novelty_prompt = PromptTemplate(
+    input_variables=["idea", "context"],
+    template="""Score innovation and novelty for startup idea: '{idea}' in Indian context. Use this context: {context}. Return JSON with novelty_score, differentiation_factors, trend_alignment, suggested_pivots, innovation_level."""
+)
+
+final_report_prompt = PromptTemplate(
+    input_variables=["idea", "context"],
+    template="""Generate a comprehensive startup viability report for: '{idea}'. Analysis so far: {context}. Return JSON with viability_score, market_opportunity, key_risks, recommended_strategy, potential_partners, investment_requirement, timeline_to_market, success_probability."""
+)
+
+# --- Output Repair ---
+repair_prompt = PromptTemplate(
+    input_variables=["schema", "errors", "output"],
+    template="""Your previous reply did not match the required JSON schema.
+Schema: {schema}
+Problems: {errors}
+Previous reply: {output}
+Return only the corrected JSON object, keeping every value that was already valid."""
+)
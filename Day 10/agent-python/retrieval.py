@@ -0,0 +1,119 @@
+"""Hybrid BM25 + dense retrieval with metadata pre-filtering.
+
+A small in-memory inverted index scores rows with Okapi BM25 over their
+``keywords``/``domain``/``industry`` fields. Chroma's dense results are
+merged with those scores by reciprocal-rank fusion. Metadata filters (source,
+domain, funding_status, ...) are applied before scoring on both sides: as a
+Chroma ``where`` clause and as a posting-list filter. Rows that are filtered
+out are never ranked.
+"""
+import re
+import math
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+BM25_FIELDS = ("keywords", "domain", "industry")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def doc_key(document):
+    return document.metadata.get("source"), document.metadata.get("row_id")
+
+
+def matches_filters(metadata, filters):
+    """True if every filter field matches; a list value means "any of"."""
+    for field, expected in (filters or {}).items():
+        allowed = expected if isinstance(expected, (list, tuple, set)) else [expected]
+        if metadata.get(field) not in allowed:
+            return False
+    return True
+
+
+def chroma_where(filters):
+    """Translate ``{"source": [...], "domain": "FinTech"}`` into a Chroma ``where`` clause."""
+    clauses = [
+        {field: {"$in": list(expected)} if isinstance(expected, (list, tuple, set)) else expected}
+        for field, expected in (filters or {}).items()
+    ]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class BM25Index:
+    def __init__(self, documents, fields=BM25_FIELDS, k1=1.5, b=0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(doc index, term frequency)]
+        self.lengths = []
+        for i, document in enumerate(self.documents):
+            terms = Counter(token for field in fields for token in tokenize(document.metadata.get(field, "")))
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((i, tf))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        n = len(self.documents)
+        self.idf = {term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for term, p in self.postings.items()}
+
+    def search(self, query, k, filters=None):
+        """Top-k (doc index, score) pairs; only rows passing ``filters`` are scored."""
+        scores = defaultdict(float)
+        allowed = {}
+        for term in set(tokenize(query)):
+            for i, tf in self.postings.get(term, ()):
+                if i not in allowed:
+                    allowed[i] = matches_filters(self.documents[i].metadata, filters)
+                if not allowed[i]:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1))
+                scores[i] += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings, rrf_k=60):
+    """Fuse ranked lists of keys: score(key) = sum(1 / (rrf_k + rank))."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] += 1.0 / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense (Chroma) + sparse (BM25) retrieval fused with RRF."""
+
+    vectorstore: Any = None
+    bm25: Any = None
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    filters: Dict[str, Any] = {}
+
+    def search(self, query, query_vector=None, filters=None):
+        """Fused top-k for ``query``; pass ``query_vector`` to reuse an embedding computed elsewhere."""
+        filters = self.filters if filters is None else filters
+        candidates = {}
+        rankings = []
+        if self.vectorstore is not None:
+            where = chroma_where(filters)
+            if query_vector is not None:
+                dense = self.vectorstore.similarity_search_by_vector(query_vector, k=self.fetch_k, filter=where)
+            else:
+                dense = self.vectorstore.similarity_search(query, k=self.fetch_k, filter=where)
+            rankings.append([doc_key(document) for document in dense])
+            candidates.update((doc_key(document), document) for document in dense)
+        if self.bm25 is not None:
+            sparse = [self.bm25.documents[i] for i, _ in self.bm25.search(query, self.fetch_k, filters)]
+            rankings.append([doc_key(document) for document in sparse])
+            candidates.update((doc_key(document), document) for document in sparse)
+        return [candidates[key] for key in reciprocal_rank_fusion(rankings, self.rrf_k)[:self.k]]
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.search(query)
@@ -0,0 +1,111 @@
+"""Pydantic output schemas for the LLM stages.
+
+Scores must be numeric on a 0-100 scale. "65" and "65%" are accepted as 65,
+and a fraction is rescaled, so "65/100" is 65 and "8/10" is 80.
+Descriptive fields may be a string, a list or an object, because the model
+phrases them differently from call to call. Extra keys are kept.
+
+A stage that fails (timeout, or output that stays invalid after repair)
+returns ``empty_output``: every field present, scores ``None``, everything
+else an empty list, so consumers can index and iterate it like a real result.
+"""
+import re
+from typing import Any, Dict, List, Optional, Union, get_args, get_origin
+from typing_extensions import Annotated
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+
+
+def parse_score(value):
+    if isinstance(value, str):
+        match = re.match(r"\s*(-?\d+(?:\.\d+)?)\s*(?:/\s*(\d+(?:\.\d+)?))?", value)
+        if not match:
+            raise ValueError(f"not a numeric score: {value!r}")
+        score = float(match.group(1))
+        if match.group(2) is not None:
+            denominator = float(match.group(2))
+            if denominator == 0:
+                raise ValueError(f"not a numeric score: {value!r}")
+            score = round(100 * score / denominator, 2)
+        return score
+    return value
+
+
+Score = Annotated[float, BeforeValidator(parse_score), Field(ge=0, le=100)]
+Text = Union[str, List[Any], Dict[str, Any], int, float, None]
+
+
+class StageOutput(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+class TrendAnalysis(StageOutput):
+    search_volume: Text = None
+    growth_rate: Text = None
+    top_regions: List[Any] = []
+    related_terms: List[Any] = []
+    demand_risk: Text = None
+    market_potential: Text = None
+
+
+class Competitor(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    name: str
+    description: Optional[str] = None
+
+
+class CompetitorAnalysis(StageOutput):
+    direct_competitors: List[Union[Competitor, str]] = Field(min_length=1)
+    competitive_advantages: Text = None
+    market_gaps: Text = None
+    ip_risks: Text = None
+    benchmark_score: Score
+    competitive_intensity: Text = None
+
+
+class SaturationAnalysis(StageOutput):
+    saturation_score: Score
+    funding_trends: List[Any] = []
+    top_cities: List[Any] = []
+    barriers_to_entry: Text = None
+    market_maturity: Text = None
+
+
+class NoveltyAnalysis(StageOutput):
+    novelty_score: Score
+    differentiation_factors: Text = None
+    trend_alignment: Text = None
+    suggested_pivots: Text = None
+    innovation_level: Text = None
+
+
+class FinalReport(StageOutput):
+    viability_score: Score
+    market_opportunity: Text = None
+    key_risks: Text = None
+    recommended_strategy: Text = None
+    potential_partners: Text = None
+    investment_requirement: Text = None
+    timeline_to_market: Text = None
+    success_probability: Text = None
+
+
+STAGE_SCHEMAS = {
+    "trends": TrendAnalysis,
+    "competitors": CompetitorAnalysis,
+    "saturation": SaturationAnalysis,
+    "novelty": NoveltyAnalysis,
+    "final_report": FinalReport,
+}
+
+
+def admits_list(annotation):
+    return get_origin(annotation) is list or any(get_origin(arg) is list for arg in get_args(annotation))
+
+
+def empty_output(name):
+    """Placeholder for a failed stage with every field of its schema (see module docstring)."""
+    return {
+        field: [] if admits_list(info.annotation) else None
+        for field, info in STAGE_SCHEMAS[name].model_fields.items()
+    }
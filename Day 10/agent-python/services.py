@@ -0,0 +1,177 @@
+"""Lazily built, process-wide services for the API.
+
+Nothing heavy happens at import. Each resource (LLM client, embedding model,
+vector store, BM25 index, QA chain, evaluation cache, job store, analytics, HTTP signals client, stage chains) is built on first
+access, or ahead of time by ``warm_up()``, which the FastAPI lifespan runs in
+the background. Construction is guarded by a lock, so concurrent first
+requests build each resource once.
+"""
+import os
+import time
+import logging
+import threading
+from functools import wraps
+from langchain import LLMChain
+from langchain.chains import RetrievalQA
+from langchain_google_genai import ChatGoogleGenerativeAI
+from vector_index import get_embeddings, load_documents, load_vectorstore
+from retrieval import BM25Index, HybridRetriever
+from workshop_common.eval_cache import EvaluationCache
+from jobs import JobStore
+from analytics import MarketAnalytics
+from workshop_common.http_client import SignalsClient
+from workshop_common.llm_gateway import wrap
+from workshop_common.telemetry import TelemetryCallback, metrics
+from prompts import trend_prompt, competitor_prompt, saturation_prompt, novelty_prompt, final_report_prompt, repair_prompt
+
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "4"))
+# Ask Gemini for a JSON response body; every stage prompt expects one
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "1") == "1"
+# Competitor lookup only searches company rows; funding rows feed the analytics layer instead
+COMPETITOR_SOURCES = os.getenv("COMPETITOR_SOURCES", "competitors_landscape_2025.csv,startup_companies_2025.csv").split(",")
+logger = logging.getLogger(__name__)
+_MISSING = object()
+
+
+def lazy(factory):
+    """Property that builds its value once, on first access, under the container lock."""
+    attr = "_" + factory.__name__
+
+    @property
+    @wraps(factory)
+    def getter(self):
+        value = self.__dict__.get(attr, _MISSING)
+        if value is _MISSING:
+            with self._lock:
+                if attr not in self.__dict__:
+                    started = time.perf_counter()
+                    self.__dict__[attr] = factory(self)
+                    logger.info("Built %s in %.2fs", factory.__name__, time.perf_counter() - started)
+                value = self.__dict__[attr]
+        return value
+    return getter
+
+
+class Services:
+    def __init__(self, **overrides):
+        # RLock: factories reach for other lazy resources while holding it
+        self._lock = threading.RLock()
+        self.ready = False
+        self.warmup_error = None
+        self.override(**overrides)
+
+    def override(self, **resources):
+        """Pre-seed resources (e.g. a fake LLM or embedder) before first use."""
+        for name, value in resources.items():
+            self.__dict__["_" + name] = value
+
+    @lazy
+    def chat_model(self):
+        json_mode = {"response_mime_type": "application/json"} if LLM_JSON_MODE else {}
+        return ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.2, **json_mode)
+
+    @lazy
+    def llm(self):
+        # Calls share the process-wide limits in workshop_common.llm_gateway; the callback attributes token usage to whichever stage made the call
+        return wrap(self.chat_model, callbacks=[TelemetryCallback()], metrics=metrics)
+
+    @lazy
+    def embeddings(self):
+        return get_embeddings()
+
+    @lazy
+    def vectorstore(self):
+        return load_vectorstore(self.embeddings)
+
+    @lazy
+    def bm25_index(self):
+        return BM25Index(load_documents().values())
+
+    @lazy
+    def retriever(self):
+        return HybridRetriever(
+            vectorstore=self.vectorstore,
+            bm25=self.bm25_index,
+            k=RETRIEVAL_K,
+            filters={"source": COMPETITOR_SOURCES},
+        )
+
+    @lazy
+    def qa_chain(self):
+        return RetrievalQA.from_chain_type(llm=self.llm, retriever=self.retriever) if self.retriever else None
+
+    @lazy
+    def evaluation_cache(self):
+        return EvaluationCache(
+            os.getenv("EVAL_CACHE_PATH", "evaluation_cache.sqlite3"),
+            embed_fn=self.embeddings.embed_query,
+            ttl_seconds=float(os.getenv("EVAL_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("EVAL_CACHE_MAX_ENTRIES", "5000")),
+            similarity_threshold=float(os.getenv("EVAL_CACHE_SIMILARITY", "0.95")),
+        )
+
+    @lazy
+    def job_store(self):
+        return JobStore(
+            os.getenv("JOB_DB_PATH", "jobs.sqlite3"),
+            retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600))),
+        )
+
+    @lazy
+    def analytics(self):
+        return MarketAnalytics.load()
+
+    @lazy
+    def signals(self):
+        return SignalsClient()
+
+    @lazy
+    def trend_chain(self):
+        return LLMChain(llm=self.llm, prompt=trend_prompt)
+
+    @lazy
+    def competitor_chain(self):
+        return LLMChain(llm=self.llm, prompt=competitor_prompt)
+
+    @lazy
+    def saturation_chain(self):
+        return LLMChain(llm=self.llm, prompt=saturation_prompt)
+
+    @lazy
+    def novelty_chain(self):
+        return LLMChain(llm=self.llm, prompt=novelty_prompt)
+
+    @lazy
+    def final_report_chain(self):
+        return LLMChain(llm=self.llm, prompt=final_report_prompt)
+
+    @lazy
+    def repair_chain(self):
+        return LLMChain(llm=self.llm, prompt=repair_prompt)
+
+    async def aclose(self):
+        """Release pooled connections, if the signals client was ever built."""
+        if "_signals" in self.__dict__:
+            await self.signals.aclose()
+
+    def warm_up(self):
+        """Build every resource the request path needs; flips ``ready`` once done."""
+        try:
+            for name in ("llm", "embeddings", "vectorstore", "bm25_index", "qa_chain", "evaluation_cache", "analytics", "signals",
+                         "trend_chain", "competitor_chain", "saturation_chain", "novelty_chain", "final_report_chain", "repair_chain"):
+                getattr(self, name)
+            # Run one query so lazily loaded model weights are paged in before traffic arrives
+            self.embeddings.embed_query("warm-up")
+            self.ready = True
+        except Exception as e:
+            self.warmup_error = str(e)
+            logger.exception("Service warm-up failed")
+        return self.ready
+
+
+services = Services()
+
+
+def get_services():
+    """FastAPI dependency returning the process-wide container."""
+    return services
@@ -0,0 +1,122 @@
+"""Extraction and validation of the JSON object in an LLM reply.
+
+``IncrementalJSONParser`` is fed text chunk by chunk. It tracks strings,
+escapes and bracket nesting, so it knows exactly where the first top-level
+object ends, even if text or code fences surround it. While streaming it can
+also check the members received so far against a schema. A caller can stop
+reading as soon as the object closes, or as soon as a member is clearly
+wrong, instead of waiting for the full reply.
+"""
+import json
+from pydantic import ValidationError
+
+CLOSERS = {"{": "}", "[": "]"}
+
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self.text = ""
+        self.start = None
+        self.end = None
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._pos = 0
+        # Position of the last top-level ``,`` (end of the last finished member), and whether the latest chunk had one
+        self._last_comma = None
+        self._new_member = False
+
+    @property
+    def complete(self):
+        return self.end is not None
+
+    @property
+    def at_member_boundary(self):
+        """True if the last chunk finished at least one top-level member (it held a ``,`` at depth one)."""
+        return self._new_member and not self.complete
+
+    def feed(self, chunk):
+        """Consume more text; returns True once the first top-level object is closed."""
+        if self.complete:
+            return True
+        self.text += chunk
+        self._new_member = False
+        for i in range(self._pos, len(self.text)):
+            ch = self.text[i]
+            if self.start is None:
+                if ch == "{":
+                    self.start = i
+                    self._stack.append("}")
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in CLOSERS:
+                self._stack.append(CLOSERS[ch])
+            elif ch == "," and len(self._stack) == 1:
+                self._last_comma = i
+                self._new_member = True
+            elif self._stack and ch == self._stack[-1]:
+                self._stack.pop()
+                if not self._stack:
+                    self.end = i + 1
+                    break
+        self._pos = len(self.text) if self.end is None else self.end
+        return self.complete
+
+    def result(self):
+        """The parsed object; raises ValueError if it is incomplete or not valid JSON."""
+        if not self.complete:
+            raise ValueError("no complete JSON object in output")
+        value = json.loads(self.text[self.start:self.end])
+        if not isinstance(value, dict):
+            raise ValueError("JSON output is not an object")
+        return value
+
+    def partial(self):
+        """Members received so far, as a dict; None if nothing parses yet."""
+        if self.start is None:
+            return None
+        if self.complete:
+            return self.result()
+        # Drop the member still being written, then close the object
+        candidate = "{}" if self._last_comma is None else self.text[self.start:self._last_comma] + "}"
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
+
+
+def parse_json_object(text):
+    """First complete top-level JSON object in ``text``; raises ValueError if there is none."""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.result()
+
+
+def validate_output(schema, text):
+    """Parse and validate ``text``; returns plain JSON-ready data. Raises ValueError (incl. ValidationError)."""
+    return schema.model_validate(parse_json_object(text)).model_dump(mode="json")
+
+
+def partial_errors(schema, data):
+    """Schema errors in the members present so far, ignoring the ones that simply haven't arrived."""
+    try:
+        schema.model_validate(data)
+    except ValidationError as e:
+        errors = [error for error in e.errors() if error["type"] != "missing"]
+        return errors or None
+    return None
+
+
+def describe_error(error):
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, item['loc'])) or 'output'}: {item['msg']}" for item in error.errors())
+    return str(error)
@@ -0,0 +1,140 @@
+"""Incremental, content-addressed ingestion of the CSV datasets into Chroma.
+
+Each CSV row gets an id derived from its source file and contents, so a
+rebuild only embeds rows that are new or changed and deletes rows that are
+gone. Run the build offline:
+
+    python vector_index.py build-index
+
+The API only opens the persisted collection and never embeds rows at startup.
+With ``VECTOR_BACKEND=numpy`` the same build writes a memory-mapped NumPy
+index (see ``workshop_common.numpy_index``) to ``NUMPY_INDEX_DIR`` instead of
+Chroma.
+"""
+import os
+import json
+import hashlib
+import argparse
+import logging
+from pathlib import Path
+from langchain_core.documents import Document
+from langchain_community.vectorstores import Chroma
+from dataset_io import read_dataset_rows
+from embedding_service import EmbeddingService
+from workshop_common.numpy_index import NumpyVectorStore
+
+DATASET_DIR = Path(os.getenv("DATASET_DIR", "datasets"))
+DATASET_FILES = ['startup_funding_2025.csv', 'competitors_landscape_2025.csv', 'startup_companies_2025.csv']
+PERSIST_DIRECTORY = os.getenv("RAG_DB_DIR", "rag_db")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-mpnet-base-v2")
+EMBED_BATCH_SIZE = 256
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # "chroma" or "numpy"
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", "numpy_index")
+logger = logging.getLogger(__name__)
+
+
+# --- CSV loading ---
+def row_hash(filename, row):
+    """Content address of a row: stable across restarts, changes when the row changes."""
+    payload = json.dumps([filename, row], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def csv_document_processor(filename):
+    filepath = DATASET_DIR / filename
+    if not filepath.exists():
+        return []
+    documents = []
+    for i, row in enumerate(read_dataset_rows(filepath)):
+        content = "\n".join(f"{k}: {v}" for k, v in row.items() if v and str(v).strip())
+        metadata = {"source": filename, "row_id": i, **{k.lower().replace(' ', '_'): str(v) for k, v in row.items() if v}}
+        documents.append((row_hash(filename, row), Document(page_content=content, metadata=metadata)))
+    return documents
+
+
+def load_documents():
+    """Map row hash -> Document for every row in every dataset file."""
+    documents = {}
+    for filename in DATASET_FILES:
+        documents.update(csv_document_processor(filename))
+    return documents
+
+
+# --- Vector store ---
+def get_embeddings():
+    """Micro-batched, cached embedding service (see embedding_service.py); the in-process model loads now."""
+    return EmbeddingService(EMBEDDING_MODEL).load()
+
+
+def open_vectorstore(embedding=None):
+    """Open the persisted collection without embedding anything."""
+    return Chroma(persist_directory=PERSIST_DIRECTORY, embedding_function=embedding or get_embeddings())
+
+
+def sync_index(vectorstore):
+    """Bring the collection in line with the CSVs: embed new/changed rows, delete removed ones."""
+    documents = load_documents()
+    existing = set(vectorstore.get(include=[])["ids"])
+    stale = sorted(existing - documents.keys())
+    fresh = [row_id for row_id in documents if row_id not in existing]
+    if stale:
+        vectorstore.delete(ids=stale)
+    for start in range(0, len(fresh), EMBED_BATCH_SIZE):
+        batch = fresh[start:start + EMBED_BATCH_SIZE]
+        vectorstore.add_documents([documents[row_id] for row_id in batch], ids=batch)
+    return {"rows": len(documents), "added": len(fresh), "deleted": len(stale), "unchanged": len(documents) - len(fresh)}
+
+
+def build_numpy_index(embedding):
+    """Rewrite the NumPy index from the CSVs, reusing stored vectors for unchanged rows."""
+    documents = load_documents()
+    previous = NumpyVectorStore(NUMPY_INDEX_DIR).vectors_by_id() if NumpyVectorStore.exists(NUMPY_INDEX_DIR) else {}
+    fresh = [row_id for row_id in documents if row_id not in previous]
+    vectors = dict(previous)
+    for start in range(0, len(fresh), EMBED_BATCH_SIZE):
+        batch = fresh[start:start + EMBED_BATCH_SIZE]
+        vectors.update(zip(batch, embedding.embed_documents([documents[row_id].page_content for row_id in batch])))
+    ids = list(documents)
+    vectorstore = NumpyVectorStore.build(NUMPY_INDEX_DIR, ids, [vectors[row_id] for row_id in ids], [documents[row_id] for row_id in ids], embedding)
+    stats = {"rows": len(ids), "added": len(fresh), "deleted": len(previous.keys() - documents.keys()), "unchanged": len(ids) - len(fresh)}
+    return vectorstore, stats
+
+
+def initialize_vectorstore(embedding=None):
+    """Open the collection and sync it with the datasets. Used by the offline build."""
+    if VECTOR_BACKEND == "numpy":
+        vectorstore, stats = build_numpy_index(embedding or get_embeddings())
+    else:
+        vectorstore = open_vectorstore(embedding)
+        stats = sync_index(vectorstore)
+    logger.info("Index synced: %s", stats)
+    return vectorstore, stats
+
+
+def load_vectorstore(embedding=None):
+    """Open the prebuilt collection for serving; returns None if it has not been built yet."""
+    if VECTOR_BACKEND == "numpy":
+        if not NumpyVectorStore.exists(NUMPY_INDEX_DIR):
+            logger.warning("NumPy index at %s is missing; run `python vector_index.py build-index`", NUMPY_INDEX_DIR)
+            return None
+        return NumpyVectorStore(NUMPY_INDEX_DIR, embedding or get_embeddings())
+    vectorstore = open_vectorstore(embedding)
+    if vectorstore._collection.count() == 0:
+        logger.warning("Vector index at %s is empty; run `python vector_index.py build-index`", PERSIST_DIRECTORY)
+        return None
+    return vectorstore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the RAG vector index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build-index", help="Embed new or changed dataset rows and drop removed ones.")
+    args = parser.parse_args()
+    if args.command == "build-index":
+        _, stats = initialize_vectorstore()
+        print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
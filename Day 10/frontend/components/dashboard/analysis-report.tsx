@@ -4,6 +4,7 @@ import type { IdeaAnalysis } from "@/lib/types"
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
 import { Progress } from "@/components/ui/progress"
+import { formatScore } from "@/lib/utils"
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs"
 import { TrendingUp, Users, Target, Lightbulb, DollarSign } from "lucide-react"
 
@@ -30,15 +31,15 @@ export function AnalysisReport({ analysis }: AnalysisReportProps) {
         <CardContent>
           <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
             <div className="text-center">
-              <div className="text-2xl font-bold text-green-600">{analysis_results.final_report.viability_score}%</div>
+              <div className="text-2xl font-bold text-green-600">{formatScore(analysis_results.final_report.viability_score)}</div>
               <div className="text-sm text-gray-600">Viability Score</div>
             </div>
             <div className="text-center">
-              <div className="text-2xl font-bold text-blue-600">{analysis_results.novelty.novelty_score}%</div>
+              <div className="text-2xl font-bold text-blue-600">{formatScore(analysis_results.novelty.novelty_score)}</div>
               <div className="text-sm text-gray-600">Novelty Score</div>
             </div>
             <div className="text-center">
-              <div className="text-2xl font-bold text-purple-600">{analysis_results.competitors.benchmark_score}%</div>
+              <div className="text-2xl font-bold text-purple-600">{formatScore(analysis_results.competitors.benchmark_score)}</div>
               <div className="text-sm text-gray-600">Competitive Score</div>
             </div>
           </div>
@@ -183,7 +184,7 @@ export function AnalysisReport({ analysis }: AnalysisReportProps) {
             <CardContent className="space-y-4">
               <div>
                 <h4 className="font-semibold mb-2">Saturation Level</h4>
-                <Badge variant="secondary">{analysis_results.saturation.saturation_score}</Badge>
+                <Badge variant="secondary">{formatScore(analysis_results.saturation.saturation_score, "")}</Badge>
               </div>
 
               <div>
@@ -234,8 +235,8 @@ export function AnalysisReport({ analysis }: AnalysisReportProps) {
               <div>
                 <h4 className="font-semibold mb-2">Novelty Score</h4>
                 <div className="flex items-center gap-4">
-                  <Progress value={analysis_results.novelty.novelty_score} className="flex-1" />
-                  <span className="font-medium">{analysis_results.novelty.novelty_score}%</span>
+                  <Progress value={analysis_results.novelty.novelty_score ?? 0} className="flex-1" />
+                  <span className="font-medium">{formatScore(analysis_results.novelty.novelty_score)}</span>
                 </div>
               </div>
 
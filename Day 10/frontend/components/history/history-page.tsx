@@ -11,6 +11,7 @@ import { ArrowLeft, Calendar, TrendingUp, Search, Filter, BarChart3, Clock } fro
 import Link from "next/link"
 import { LoadingSpinner } from "@/components/ui/loading-spinner"
 import { HistoryStats } from "./history-stats"
+import { compareScoresDesc, formatScore } from "@/lib/utils"
 
 export function HistoryPage() {
   const { user } = useAuthStore()
@@ -50,9 +51,9 @@ export function HistoryPage() {
         case "date":
           return new Date(b.createdAt).getTime() - new Date(a.createdAt).getTime()
         case "viability":
-          return b.analysis_results.final_report.viability_score - a.analysis_results.final_report.viability_score
+          return compareScoresDesc(a.analysis_results.final_report.viability_score, b.analysis_results.final_report.viability_score)
         case "novelty":
-          return b.analysis_results.novelty.novelty_score - a.analysis_results.novelty.novelty_score
+          return compareScoresDesc(a.analysis_results.novelty.novelty_score, b.analysis_results.novelty.novelty_score)
         default:
           return 0
       }
@@ -68,7 +69,8 @@ export function HistoryPage() {
     }).format(new Date(date))
   }
 
-  const getViabilityColor = (score: number) => {
+  const getViabilityColor = (score: number | null) => {
+    if (score == null) return "text-gray-600 bg-gray-50 border-gray-200"
     if (score >= 80) return "text-green-600 bg-green-50 border-green-200"
     if (score >= 60) return "text-blue-600 bg-blue-50 border-blue-200"
     if (score >= 40) return "text-yellow-600 bg-yellow-50 border-yellow-200"
@@ -191,7 +193,7 @@ export function HistoryPage() {
                         )}`}
                       >
                         <TrendingUp className="h-3 w-3" />
-                        {analysis.analysis_results.final_report.viability_score}% Viable
+                        {formatScore(analysis.analysis_results.final_report.viability_score)} Viable
                       </Badge>
                     </div>
                   </div>
@@ -200,7 +202,7 @@ export function HistoryPage() {
                   <div className="grid grid-cols-2 md:grid-cols-4 gap-4 mb-4">
                     <div className="text-center">
                       <div className="text-lg font-semibold text-blue-600">
-                        {analysis.analysis_results.novelty.novelty_score}%
+                        {formatScore(analysis.analysis_results.novelty.novelty_score)}
                       </div>
                       <div className="text-xs text-gray-600">Novelty</div>
                     </div>
@@ -212,13 +214,13 @@ export function HistoryPage() {
                     </div>
                     <div className="text-center">
                       <div className="text-lg font-semibold text-purple-600">
-                        {analysis.analysis_results.saturation.saturation_score}
+                        {formatScore(analysis.analysis_results.saturation.saturation_score, "")}
                       </div>
                       <div className="text-xs text-gray-600">Saturation</div>
                     </div>
                     <div className="text-center">
                       <div className="text-lg font-semibold text-orange-600">
-                        {analysis.analysis_results.competitors.benchmark_score}%
+                        {formatScore(analysis.analysis_results.competitors.benchmark_score)}
                       </div>
                       <div className="text-xs text-gray-600">Competitive</div>
                     </div>
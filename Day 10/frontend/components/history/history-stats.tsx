@@ -3,6 +3,7 @@
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { TrendingUp, Target, Lightbulb, BarChart3 } from "lucide-react"
 import type { IdeaAnalysis } from "@/lib/types"
+import { averageScore, formatScore } from "@/lib/utils"
 
 interface HistoryStatsProps {
   analyses: IdeaAnalysis[]
@@ -11,17 +12,13 @@ interface HistoryStatsProps {
 export function HistoryStats({ analyses }: HistoryStatsProps) {
   if (analyses.length === 0) return null
 
-  const avgViability = Math.round(
-    analyses.reduce((sum, analysis) => sum + analysis.analysis_results.final_report.viability_score, 0) /
-      analyses.length,
-  )
+  // Analyses whose stage failed have a null score and are left out of the averages
+  const avgViability = averageScore(analyses.map((analysis) => analysis.analysis_results.final_report.viability_score))
 
-  const avgNovelty = Math.round(
-    analyses.reduce((sum, analysis) => sum + analysis.analysis_results.novelty.novelty_score, 0) / analyses.length,
-  )
+  const avgNovelty = averageScore(analyses.map((analysis) => analysis.analysis_results.novelty.novelty_score))
 
   const highViabilityCount = analyses.filter(
-    (analysis) => analysis.analysis_results.final_report.viability_score >= 70,
+    (analysis) => (analysis.analysis_results.final_report.viability_score ?? 0) >= 70,
   ).length
 
   const recentAnalyses = analyses.filter(
@@ -49,13 +46,15 @@ export function HistoryStats({ analyses }: HistoryStatsProps) {
           <TrendingUp className="h-4 w-4 text-muted-foreground" />
         </CardHeader>
         <CardContent>
-          <div className="text-2xl font-bold">{avgViability}%</div>
+          <div className="text-2xl font-bold">{formatScore(avgViability)}</div>
           <p className="text-xs text-muted-foreground">
-            {avgViability >= 70
-              ? "Excellent potential!"
-              : avgViability >= 50
-                ? "Good potential"
-                : "Room for improvement"}
+            {avgViability == null
+              ? "No scores yet"
+              : avgViability >= 70
+                ? "Excellent potential!"
+                : avgViability >= 50
+                  ? "Good potential"
+                  : "Room for improvement"}
           </p>
         </CardContent>
       </Card>
@@ -66,9 +65,9 @@ export function HistoryStats({ analyses }: HistoryStatsProps) {
           <Lightbulb className="h-4 w-4 text-muted-foreground" />
         </CardHeader>
         <CardContent>
-          <div className="text-2xl font-bold">{avgNovelty}%</div>
+          <div className="text-2xl font-bold">{formatScore(avgNovelty)}</div>
           <p className="text-xs text-muted-foreground">
-            {avgNovelty >= 70 ? "Highly innovative!" : avgNovelty >= 50 ? "Good innovation" : "Consider pivoting"}
+            {avgNovelty == null ? "No scores yet" : avgNovelty >= 70 ? "Highly innovative!" : avgNovelty >= 50 ? "Good innovation" : "Consider pivoting"}
           </p>
         </CardContent>
       </Card>
@@ -6,6 +6,7 @@ export interface User {
   createdAt: Date
 }
 
+// Stage scores are null when that stage failed on the backend (see schemas.empty_output)
 export interface IdeaAnalysis {
   id: string
   userId: string
@@ -41,25 +42,25 @@ export interface IdeaAnalysis {
       competitive_advantages: string[]
       market_gaps: string[]
       ip_risks: string[]
-      benchmark_score: number
+      benchmark_score: number | null
       competitive_intensity: string
     }
     saturation: {
-      saturation_score: string
+      saturation_score: number | null
       funding_trends: string[]
       top_cities: string[]
       barriers_to_entry: string[]
       market_maturity: string
     }
     novelty: {
-      novelty_score: number
+      novelty_score: number | null
       differentiation_factors: string[]
       trend_alignment: string
       suggested_pivots: string[]
       innovation_level: string
     }
     final_report: {
-      viability_score: number
+      viability_score: number | null
       market_opportunity: string
       key_risks: string[]
       recommended_strategy: {
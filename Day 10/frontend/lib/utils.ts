@@ -4,3 +4,21 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
+
+// Scores are null when the backend stage that produces them failed
+export function formatScore(score: number | null | undefined, suffix = "%") {
+  return score == null ? "–" : `${score}${suffix}`
+}
+
+// Highest score first; missing scores sort last
+export function compareScoresDesc(a: number | null | undefined, b: number | null | undefined) {
+  if (a == null) return b == null ? 0 : 1
+  if (b == null) return -1
+  return b - a
+}
+
+// Mean of the scores that are present, rounded; null if there are none
+export function averageScore(scores: Array<number | null | undefined>) {
+  const present = scores.filter((score): score is number => score != null)
+  return present.length ? Math.round(present.reduce((sum, score) => sum + score, 0) / present.length) : null
+}
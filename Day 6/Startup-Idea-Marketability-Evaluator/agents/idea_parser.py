@@ -1,20 +1,72 @@
+from functools import lru_cache
+from typing import Optional
+from pydantic import BaseModel, Field
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 from utils.llm import llm
+from workshop_common.local_parser import LocalIdeaParser
+from workshop_common.telemetry import record
+
+PARSE_ATTEMPTS = 2  # one repair retry on a malformed reply
+
+
+class ParsedIdea(BaseModel):
+    domain: str = Field(description="Primary industry or vertical, e.g. FinTech")
+    # Optional because a local parse can't extract them; nothing downstream reads them
+    problem: Optional[str] = Field(default=None, description="The problem the startup solves")
+    target_audience: Optional[str] = Field(default=None, description="Who the product is for")
+    technologies: str = Field(description="Key technologies, comma-separated")
 
 
 prompt = PromptTemplate.from_template("""
 Extract the key components from the startup idea below:
 Idea: {idea}
-
-Output format:
-- Domain:
-- Problem:
-- Target Audience:
-- Technologies:
 """)
 
-chain = LLMChain(prompt=prompt, llm=llm)
+# Gemini returns the fields as structured output, validated against ParsedIdea
+chain = prompt | llm.with_structured_output(ParsedIdea)
+
+EMPTY_IDEA = dict(domain="", problem="", target_audience="", technologies="")
+
+@lru_cache(maxsize=1)
+def get_local_parser():
+    # Classes are the crunchbase domains, so a local domain always finds VC and comparison matches
+    return LocalIdeaParser.from_datasets([("data/mocked_crunchbase.json", "domain", ("name",))])
+
+def parse_locally(idea):
+    """ParsedIdea from the local parser, or None when it isn't confident enough to skip the LLM.
+
+    Only the domain and technologies are extracted; problem and target audience stay unset.
+    """
+    parser = get_local_parser()
+    local = parser.parse(idea)
+    if not parser.confident(local):
+        return None
+    return ParsedIdea(domain=local["domain"], technologies=local["theme"])
 
 def parse_idea(idea):
-    return chain.run(idea)
\ No newline at end of file
+    local = parse_locally(idea)
+    if local is not None:
+        return local
+    for attempt in range(PARSE_ATTEMPTS):
+        try:
+            parsed = chain.invoke({"idea": idea})
+            if parsed is not None:
+                return parsed
+        except ValueError:  # includes OutputParserException and pydantic's ValidationError
+            pass
+        record(parse_failures=1)
+    return ParsedIdea(**EMPTY_IDEA)
+
+async def parse_idea_async(idea):
+    local = parse_locally(idea)
+    if local is not None:
+        return local
+    for attempt in range(PARSE_ATTEMPTS):
+        try:
+            parsed = await chain.ainvoke({"idea": idea})
+            if parsed is not None:
+                return parsed
+        except ValueError:
+            pass
+        record(parse_failures=1)
+    return ParsedIdea(**EMPTY_IDEA)
@@ -1,7 +1,23 @@
-from tavily import TavilyClient
 import os
+from workshop_common.http_client import SignalError, get_client, run_async, run_sync
+
+TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+
+
+async def fetch_trends_async(query):
+    if not TAVILY_API_KEY:
+        raise SignalError("tavily: TAVILY_API_KEY is not set")
+    return await get_client().request_json(
+        "tavily", "POST", "/search",
+        headers={"Authorization": f"Bearer {TAVILY_API_KEY}"},
+        json={"query": query, "max_results": 3},
+    )
 
-tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
 
 def fetch_trends(query):
-    return tavily.search(query=query, max_results=3)
\ No newline at end of file
+    return run_sync(fetch_trends_async(query))
+
+
+async def fetch_trends_from_loop(query):
+    """``fetch_trends`` for callers on their own event loop; the request runs on the shared client's loop."""
+    return await run_async(fetch_trends_async(query))
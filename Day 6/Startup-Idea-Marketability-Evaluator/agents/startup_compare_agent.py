@@ -1,11 +1,4 @@
-
-import json
+from workshop_common.reference_store import get_store
 
 def compare_with_existing(parsed_idea):
-    with open("data/mocked_crunchbase.json") as f:
-        startups = json.load(f)
-    score = 0
-    for startup in startups:
-        if parsed_idea['Domain'].lower() in startup['domain'].lower():
-            score += 1
-    return score
\ No newline at end of file
+    return get_store("data/mocked_crunchbase.json", ["domain"]).count("domain", parsed_idea['Domain'])
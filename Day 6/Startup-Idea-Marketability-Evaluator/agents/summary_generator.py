@@ -26,4 +26,13 @@ def generate_summary(trend, volume, vc, compare_score, index):
         "vc": vc,
         "compare_score": compare_score,
         "index": index
-    })
\ No newline at end of file
+    })
+
+async def generate_summary_async(trend, volume, vc, compare_score, index):
+    return await chain.arun({
+        "trend": trend,
+        "volume": volume,
+        "vc": vc,
+        "compare_score": compare_score,
+        "index": index
+    })
@@ -1,6 +1,4 @@
-import json
+from workshop_common.reference_store import get_store
 
 def get_vc_activity(domain):
-    with open("data/mocked_crunchbase.json") as f:
-        data = json.load(f)
-    return [d for d in data if domain.lower() in d["domain"].lower()]
\ No newline at end of file
+    return get_store("data/mocked_crunchbase.json", ["domain"]).lookup("domain", domain)
@@ -1,26 +1,40 @@
+import os
+import asyncio
 import streamlit as st
-from chains.evaluate_chain import evaluate_marketability
-from utils.chart_generator import generate_chart
-from utils.pdf_generator import export_to_pdf
+from chains.evaluate_chain import evaluate_marketability_async
+from workshop_common.telemetry import serve_metrics
+from utils.report_renderer import get_renderer
 from PIL import Image
 import base64
 from io import BytesIO
 
 st.set_page_config(page_title="Startup Marketability Evaluator", layout="wide")
 
+# --- Prometheus /metrics (and /traces with TRACES_ENDPOINT=1) on METRICS_PORT, started once per process ---
+@st.cache_resource
+def start_metrics_exporter():
+    port = os.getenv("METRICS_PORT")
+    return serve_metrics(int(port)) if port else None
+
+start_metrics_exporter()
+
 # --- Load and center logo with HTML ---
-def center_logo(path, width):
+@st.cache_data
+def logo_html(path, width, mtime):
+    """Resized, base64-encoded logo markup; re-encoded only when the file changes (``mtime``)"""
     img = Image.open(path)
     img = img.resize(width)
     buffer = BytesIO()
     img.save(buffer, format="PNG")
     encoded = base64.b64encode(buffer.getvalue()).decode()
-    html = f"""
+    return f"""
     <div style="text-align: center;">
         <img src="data:image/png;base64,{encoded}" style="width:{width[0]}px; height:{width[1]}px;" />
     </div>
     """
-    st.markdown(html, unsafe_allow_html=True)
+
+def center_logo(path, width):
+    st.markdown(logo_html(path, width, os.path.getmtime(path)), unsafe_allow_html=True)
 
 center_logo("assets/logo-black.png", (150, 50))
 
@@ -32,15 +46,22 @@ idea = st.text_area("Enter your startup idea:", height=200)
 
 # --- Evaluation Process ---
 if st.button("Evaluate Idea") and idea:
-    index, summary = evaluate_marketability(idea)
+    renderer = get_renderer()
+    # The chart renders in the background while the summary is being generated
+    index, summary = asyncio.run(evaluate_marketability_async(idea, on_score=renderer.chart))
+    chart = renderer.chart(index)
+    report = renderer.pdf(idea, index, summary)
 
     st.subheader("Marketability Index")
     st.metric(label="📈 Score", value=f"{index:.2f}")
 
     # --- Display Marketability Chart ---
-    chart_path = generate_chart(index)
-    st.image(chart_path, caption="Marketability Index Chart")
+    st.image(chart.result(), caption="Marketability Index Chart")
 
     # --- Show Summary Report ---
     st.subheader("📋 Summary Report")
     st.write(summary)
+
+    # --- Download Report (rendered in memory for this request) ---
+    st.download_button("📄 Download PDF Report", data=report.result(), file_name="marketability_report.pdf",
+                       mime="application/pdf")
@@ -1,28 +1,69 @@
-from agents.idea_parser import parse_idea
-from agents.market_trend_agent import fetch_trends
+import asyncio
+import logging
+from agents.idea_parser import parse_idea_async
+from agents.market_trend_agent import fetch_trends_from_loop
 from agents.keyword_volume_agent import get_keyword_volume
 from agents.vc_funding_agent import get_vc_activity
 from agents.startup_compare_agent import compare_with_existing
 from agents.score_generator import generate_score
-from agents.summary_generator import generate_summary
+from agents.summary_generator import generate_summary_async
+from workshop_common.telemetry import record, stage, trace
 
-def evaluate_marketability(idea):
-    parsed_text = parse_idea(idea)
-    print("Parsed Idea:\n", parsed_text)
+logger = logging.getLogger(__name__)
 
-    parsed = {
-        "Domain": parsed_text.split("Domain:")[-1].split("Problem:")[0].strip(),
-        "Problem": parsed_text.split("Problem:")[-1].split("Target Audience:")[0].strip(),
-        "Target Audience": parsed_text.split("Target Audience:")[-1].split("Technologies:")[0].strip(),
-        "Technologies": parsed_text.split("Technologies:")[-1].strip()
-    }
+async def run_step(name, func, *args):
+    """Await ``func(*args)`` as one telemetry stage; plain functions run in a worker thread"""
+    with stage(name):
+        if asyncio.iscoroutinefunction(func):
+            return await func(*args)
+        return await asyncio.to_thread(func, *args)
 
-    trend = fetch_trends(idea)
-    volume = get_keyword_volume(idea)
-    vc = get_vc_activity(parsed['Domain'])
-    compare_score = compare_with_existing(parsed)
+async def fetch_trend_step(idea):
+    with stage("market_trends"):
+        trend = await fetch_trends_from_loop(idea)
+        record(retrieval_k=len(trend.get("results", [])) if isinstance(trend, dict) else len(trend))
+    return trend
 
-    index = generate_score(trend, volume, vc, compare_score)
-    summary = generate_summary(trend, volume, vc, compare_score, index)
+async def evaluate_marketability_async(idea, on_score=None):
+    """Marketability index and summary, running independent steps concurrently.
 
-    return index, summary
\ No newline at end of file
+    Trends and keyword volume only need the raw idea, so they start alongside
+    parsing; VC activity and the comparison start once the domain is known.
+    ``on_score(index)`` fires before the summary call (e.g. to start the chart).
+    """
+    with trace("evaluate_marketability", idea=idea):
+        trend_task = asyncio.create_task(fetch_trend_step(idea))
+        volume_task = asyncio.create_task(run_step("keyword_volume", get_keyword_volume, idea))
+        try:
+            parsed_idea = await run_step("parse_idea", parse_idea_async, idea)
+            logger.debug("Parsed idea: %s", parsed_idea)
+
+            parsed = {
+                "Domain": parsed_idea.domain,
+                "Problem": parsed_idea.problem,
+                "Target Audience": parsed_idea.target_audience,
+                "Technologies": parsed_idea.technologies
+            }
+
+            trend, volume, vc, compare_score = await asyncio.gather(
+                trend_task,
+                volume_task,
+                run_step("vc_activity", get_vc_activity, parsed['Domain']),
+                run_step("compare", compare_with_existing, parsed),
+            )
+        finally:
+            # No-op once gathered; if parsing fails, stop the early fetches
+            for task in (trend_task, volume_task):
+                task.cancel()
+
+        with stage("score"):
+            index = generate_score(trend, volume, vc, compare_score)
+        if on_score:
+            on_score(index)
+        summary = await run_step("summary", generate_summary_async, trend, volume, vc, compare_score, index)
+
+    return index, summary
+
+def evaluate_marketability(idea, on_score=None):
+    """Blocking wrapper around ``evaluate_marketability_async`` for callers without an event loop"""
+    return asyncio.run(evaluate_marketability_async(idea, on_score))
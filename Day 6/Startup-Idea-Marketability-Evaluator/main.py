@@ -1,7 +1,8 @@
-from chains.evaluate_chain import evaluate_marketability
+import asyncio
+from chains.evaluate_chain import evaluate_marketability_async
 
 idea = input("Enter your startup idea: ")
-index, summary = evaluate_marketability(idea)
+index, summary = asyncio.run(evaluate_marketability_async(idea))
 
 print("\nMarketability Index:", index)
-print("\nSummary Report:\n", summary)
\ No newline at end of file
+print("\nSummary Report:\n", summary)
@@ -1,13 +1,21 @@
-import matplotlib.pyplot as plt
-import os
+from io import BytesIO
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 def generate_chart(score):
-    plt.figure(figsize=(5, 2.5))
-    plt.barh(["Marketability Index"], [score], color="skyblue")
-    plt.xlim(0, 100)
-    plt.xlabel("Score")
-    plt.title("Startup Marketability Score")
-    chart_path = os.path.join("charts", "index_chart.png")
-    plt.tight_layout()
-    plt.savefig(chart_path)
-    return chart_path
\ No newline at end of file
+    """PNG bytes of the score bar chart.
+
+    Uses a standalone Figure instead of pyplot: nothing is registered globally, so
+    concurrent renders don't share state and the figure is freed with its last reference.
+    """
+    fig = Figure(figsize=(5, 2.5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.barh(["Marketability Index"], [score], color="skyblue")
+    ax.set_xlim(0, 100)
+    ax.set_xlabel("Score")
+    ax.set_title("Startup Marketability Score")
+    fig.tight_layout()
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
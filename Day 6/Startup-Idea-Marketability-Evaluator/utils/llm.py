@@ -1,10 +1,17 @@
 import os
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
+from workshop_common.llm_gateway import wrap
+from workshop_common.telemetry import TelemetryCallback, metrics
 
 load_dotenv()  # Load API key from .env
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=os.getenv("GOOGLE_API_KEY")
+# Every call goes through the process-wide LLM gateway (workshop_common.llm_gateway)
+llm = wrap(
+    ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+    ),
+    callbacks=[TelemetryCallback()],
+    metrics=metrics,
 )
@@ -1,8 +1,12 @@
+from io import BytesIO
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
-def export_to_pdf(idea, index, summary, chart_path):
-    c = canvas.Canvas("report.pdf", pagesize=letter)
+def export_to_pdf(idea, index, summary, chart_png):
+    """PDF bytes of the report; ``chart_png`` is the chart as PNG bytes"""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
     c.setFont("Helvetica", 12)
     c.drawString(50, 750, "Startup Marketability Report")
     c.drawString(50, 730, f"Idea: {idea[:90]}...")
@@ -13,5 +17,6 @@ def export_to_pdf(idea, index, summary, chart_path):
     for line in summary.split(". "):
         text.textLine(line.strip() + ".")
     c.drawText(text)
-    c.drawImage(chart_path, 50, 450, width=400, preserveAspectRatio=True)
-    c.save()
\ No newline at end of file
+    c.drawImage(ImageReader(BytesIO(chart_png)), 50, 450, width=400, preserveAspectRatio=True)
+    c.save()
+    return buffer.getvalue()
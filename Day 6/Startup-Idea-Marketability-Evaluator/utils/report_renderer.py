@@ -0,0 +1,102 @@
+"""Report rendering off the request path.
+
+Charts and PDFs are rendered to in-memory bytes on a small thread pool, so
+each request gets its own artifact instead of sharing ``charts/index_chart.png``
+or ``report.pdf``. Results are cached by a hash of their content (score,
+summary, idea), so reruns and repeated evaluations reuse the bytes already
+rendered. Callers get futures back: they start a render as soon as its
+inputs are known and only wait for it when the artifact is displayed.
+
+A PDF embeds the chart, so its job is submitted from the chart future's
+done-callback rather than waiting on that future inside a worker: with
+every worker blocked on a chart still queued behind them, the pool would
+deadlock.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from utils.chart_generator import generate_chart
+from utils.pdf_generator import export_to_pdf
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "128"))
+logger = logging.getLogger(__name__)
+
+
+def content_key(kind, *parts):
+    return hashlib.sha256(json.dumps([kind, *parts], default=str).encode("utf-8")).hexdigest()
+
+
+class ReportRenderer:
+    def __init__(self, workers=REPORT_WORKERS, cache_size=REPORT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._cache = OrderedDict()  # content hash -> Future of the rendered bytes
+        self._lock = threading.Lock()
+
+    def chart(self, score):
+        """Future PNG bytes of the score chart"""
+        score = round(float(score), 2)
+        return self._submit(content_key("chart", score), generate_chart, score)
+
+    def pdf(self, idea, score, summary):
+        """Future PDF bytes of the full report; reuses (or starts) the chart render"""
+        score = round(float(score), 2)
+        return self._submit(content_key("pdf", idea, score, summary),
+                            lambda png: export_to_pdf(idea, score, summary, png), after=self.chart(score))
+
+    def _submit(self, key, func, *args, after=None):
+        """Cached future of ``func(*args)``, or of ``func(after.result())`` once ``after`` is done"""
+        with self._lock:
+            future = self._cache.get(key)
+            # Failed or cancelled renders (a cancelled chart cancels its PDF) are retried, not served
+            if future is not None and not (future.done() and (future.cancelled() or future.exception())):
+                self._cache.move_to_end(key)
+                return future
+            future = self._cache[key] = self._pool.submit(func, *args) if after is None else self._chain(after, func)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def _chain(self, dependency, func):
+        future = Future()
+
+        def submit(done):
+            if done.cancelled():
+                future.cancel()
+            elif done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                self._pool.submit(func, done.result()).add_done_callback(lambda inner: _copy_outcome(inner, future))
+        dependency.add_done_callback(submit)
+        return future
+
+
+def _copy_outcome(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Report render failed: %s", future.exception())
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer():
+    """Process-wide renderer, created on first use"""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ReportRenderer()
+        return _renderer
@@ -1,5 +1,17 @@
+import asyncio
 from duckduckgo_search import DDGS
+from workshop_common.http_client import get_client, run_sync
 
-def search_web(query):
+
+def _ddgs_text(query):
     with DDGS() as ddgs:
-        return list(ddgs.text(query, max_results=3))
\ No newline at end of file
+        return list(ddgs.text(query, max_results=3))
+
+
+async def search_web_async(query):
+    # DDGS is synchronous; run it off the loop but still behind the shared limiter and cache
+    return await get_client().call("duckduckgo", query, lambda: asyncio.to_thread(_ddgs_text, query))
+
+
+def search_web(query):
+    return run_sync(search_web_async(query))
@@ -1,5 +1,39 @@
+import re
+import json
+from functools import lru_cache
 from langchain.tools import tool
 from typing import Dict
+from config.settings import GEMINI_API_KEY
+from workshop_common.local_parser import LocalIdeaParser
+from workshop_common.telemetry import TelemetryCallback, record
+
+DOMAIN_DATASET = "data/reference_datasets/competitors_landscape_2025.csv"
+
+PARSE_PROMPT = """Extract these components from the startup idea and return only JSON with the keys
+core_theme, domain and value_proposition.
+Idea: {idea}
+"""
+
+@lru_cache(maxsize=1)
+def get_local_parser():
+    return LocalIdeaParser.from_datasets([(DOMAIN_DATASET, "domain", ("company_name", "keywords", "strengths"))])
+
+@lru_cache(maxsize=1)
+def get_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=GEMINI_API_KEY, callbacks=[TelemetryCallback()])
+
+def parse_with_llm(text: str) -> Dict:
+    reply = get_llm().invoke(PARSE_PROMPT.format(idea=text)).content
+    match = re.search(r"\{.*\}", reply, re.DOTALL)
+    try:
+        parsed = json.loads(match.group(0)) if match else {}
+    except json.JSONDecodeError:
+        parsed = {}
+    if not isinstance(parsed, dict) or not parsed:
+        record(parse_failures=1)
+        parsed = {}
+    return {key: parsed.get(key, "") for key in ("core_theme", "domain", "value_proposition")}
 
 @tool
 def idea_parsing_tool(text: str) -> Dict:
@@ -9,18 +43,22 @@ def idea_parsing_tool(text: str) -> Dict:
     - domain/industry
     - value proposition
 
+    The local parser answers when it is confident; otherwise Gemini does. A local
+    parse only extracts the theme and domain, so value_proposition is None.
+
     Args:
         text (str): A raw startup idea input from user.
 
     Returns:
         Dict: A dictionary with parsed components.
     """
-    # 🔧 Dummy implementation — replace with LLM logic or pattern matching as needed
-    parsed_result = {
-        "core_theme": "AI",
-        "domain": "Healthcare",
-        "value_proposition": "Uses AI to personalize treatment recommendations"
+    parser = get_local_parser()
+    local = parser.parse(text)
+    if not parser.confident(local):
+        return parse_with_llm(text)
+    return {
+        "core_theme": local["theme"],
+        "domain": local["domain"],
+        "value_proposition": None,
+        "confidence": local["confidence"],
     }
-
-    print(f"Parsed Idea from input: {text}")
-    return parsed_result
@@ -1,6 +1,7 @@
 from langgraph.graph import StateGraph
 from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END
+from workshop_common.telemetry import traced
 
 # Import your agents/tools
 from agents.idea_parsing_agent import idea_parsing_tool
@@ -24,38 +25,38 @@ def build_graph():
     # ✅ Idea Parsing Agent — FIXED KEY NAME!
     workflow.add_node(
         "idea_parser",
-        RunnableLambda(lambda state: {"parsed_idea": idea_parsing_tool.invoke({"text": state["startup_idea"]})})
+        RunnableLambda(traced("idea_parser")(lambda state: {"parsed_idea": idea_parsing_tool.invoke({"text": state["startup_idea"]})}))
     )
 
     # Market Signal Retriever Agent
     workflow.add_node(
         "market_signal",
-        RunnableLambda(lambda state: {
+        RunnableLambda(traced("market_signal")(lambda state: {
             "market_signals": market_signal_tool.invoke({"parsed_idea": state["parsed_idea"]})
-        })
+        }))
     )
     # Benchmarking Agent
     workflow.add_node(
         "benchmarking",
-        RunnableLambda(lambda state: {
+        RunnableLambda(traced("benchmarking")(lambda state: {
             "benchmark_results": benchmarking_tool.invoke({
                 "parsed_idea": state["parsed_idea"],
             "market_signals": state["market_signals"]
         })
-    })
+    }))
 )
 
 
     # Marketability Scoring Agent
     workflow.add_node(
         "scoring",
-        RunnableLambda(lambda state: {
+        RunnableLambda(traced("scoring")(lambda state: {
             "final_score": scoring_tool.invoke({
                 "parsed_idea": state["parsed_idea"],
                 "market_signals": state["market_signals"],
                 "benchmark_results": state["benchmark_results"]
             })
-        })
+        }))
     )
 
     # Define the flow of nodes
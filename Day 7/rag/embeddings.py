@@ -1,14 +1,46 @@
 # rag/embeddings.py
 
+import threading
+from collections import OrderedDict
 import google.generativeai as genai
+from langchain_core.embeddings import Embeddings
 from config.settings import GEMINI_API_KEY
 
 genai.configure(api_key=GEMINI_API_KEY)
 
-def get_embedding(text: str) -> list:
-    model = genai.get_model('models/embedding-001')
-    response = model.embed_content(
-        content=text,
-        task_type="retrieval_document"
-    )
-    return response['embedding']
+EMBEDDING_MODEL = "models/embedding-001"
+BATCH_SIZE = 100  # texts per embed_content request (API limit)
+CACHE_SIZE = 10000
+
+_cache = OrderedDict()  # (task_type, text) -> vector
+_cache_lock = threading.Lock()
+
+def get_embeddings(texts: list, task_type: str = "retrieval_document") -> list:
+    """Embed many texts with one API call per 100 uncached texts; repeats are served from an LRU cache."""
+    with _cache_lock:
+        vectors = {text: _cache[(task_type, text)] for text in texts if (task_type, text) in _cache}
+        for text in vectors:
+            _cache.move_to_end((task_type, text))
+    missing = list(dict.fromkeys(text for text in texts if text not in vectors))
+    for start in range(0, len(missing), BATCH_SIZE):
+        batch = missing[start:start + BATCH_SIZE]
+        response = genai.embed_content(model=EMBEDDING_MODEL, content=batch, task_type=task_type)
+        vectors.update(zip(batch, response['embedding']))
+        with _cache_lock:
+            for text in batch:
+                _cache[(task_type, text)] = vectors[text]
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return [vectors[text] for text in texts]
+
+def get_embedding(text: str, task_type: str = "retrieval_document") -> list:
+    return get_embeddings([text], task_type)[0]
+
+class GeminiEmbeddings(Embeddings):
+    """LangChain adapter so Chroma embeds documents in batches and queries with the query task type."""
+
+    def embed_documents(self, texts):
+        return get_embeddings(texts)
+
+    def embed_query(self, text):
+        return get_embedding(text, task_type="retrieval_query")
@@ -1,9 +1,9 @@
 import os
 from langchain_community.vectorstores import Chroma
-from rag.embeddings import get_embedding
+from rag.embeddings import GeminiEmbeddings
 
 
 CHROMA_PATH = "data/vector_store"
 
 def get_vectorstore():
-    return Chroma(persist_directory=CHROMA_PATH, embedding_function=get_embedding)
+    return Chroma(persist_directory=CHROMA_PATH, embedding_function=GeminiEmbeddings())
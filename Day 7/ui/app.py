@@ -1,23 +1,65 @@
 import streamlit as st
+import os
 from langgraph_flow.marketability_graph import build_graph
+from workshop_common.telemetry import serve_metrics, trace
 
-# Build the LangGraph agent flow
-graph = build_graph()
+# Node name -> section title, in the order the graph runs them
+NODE_TITLES = {
+    "idea_parser": "🧠 Parsed Idea",
+    "market_signal": "🌐 Market Signals",
+    "benchmarking": "🆚 Benchmarking",
+    "scoring": "🎯 Marketability Score",
+}
+
+@st.cache_resource
+def get_graph():
+    """The compiled LangGraph agent flow, built once per process instead of on every rerun"""
+    return build_graph()
+
+@st.cache_resource
+def start_metrics_exporter():
+    """Prometheus /metrics (and /traces with TRACES_ENDPOINT=1) on METRICS_PORT, started once per process"""
+    port = os.getenv("METRICS_PORT")
+    return serve_metrics(int(port)) if port else None
+
+def render_node(slot, node, update):
+    with slot.container():
+        st.markdown(f"**{NODE_TITLES.get(node, node)}**")
+        st.json(update)
+
+def stream_evaluation(idea):
+    """Run the graph, filling each node's placeholder as soon as that node finishes"""
+    slots = {node: st.empty() for node in NODE_TITLES}
+    for node, slot in slots.items():
+        slot.caption(f"⏳ {NODE_TITLES[node]}…")
+    results = {}
+    with trace("evaluate_marketability", idea=idea):
+        for output in get_graph().stream({"startup_idea": idea}):
+            for node, update in output.items():
+                if node not in slots or not update:
+                    continue
+                results[node] = update
+                render_node(slots[node], node, update)
+    return results
 
 def run():
     st.set_page_config(page_title="Startup Marketability Evaluator")
     st.title("🚀 Startup Marketability Evaluator")
+    start_metrics_exporter()
+    # Finished evaluations for this session, keyed by idea text, so reruns redraw them without re-running the graph
+    evaluations = st.session_state.setdefault("evaluations", {})
 
     # User input for startup idea
     user_input = st.text_area("Enter your startup idea:", height=150)
+    idea = user_input.strip()
 
-    if st.button("Evaluate Marketability"):
-        if user_input.strip():
-            # ✅ FIXED: Pass dictionary directly without `input=`
-            results = graph.invoke({"startup_idea": user_input.strip()})
-
-            # Display results
-            st.subheader("📊 Marketability Report")
-            st.json(results)
-        else:
-            st.warning("Please enter a valid startup idea to proceed.")
+    clicked = st.button("Evaluate Marketability")
+    if clicked and not idea:
+        st.warning("Please enter a valid startup idea to proceed.")
+    elif clicked and idea not in evaluations:
+        st.subheader("📊 Marketability Report")
+        evaluations[idea] = stream_evaluation(idea)
+    elif idea in evaluations:
+        st.subheader("📊 Marketability Report")
+        for node, update in evaluations[idea].items():
+            render_node(st.empty(), node, update)
@@ -1,6 +1,10 @@
+import asyncio
+import threading
 from pytrends.request import TrendReq
+from pytrends.exceptions import ResponseError
 from py_crunchbase import PyCrunchbase
 from config.settings import CRUNCHBASE_API_KEY
+from workshop_common.http_client import get_client, run_async, run_sync
 
 # Google Trends client
 pytrends = TrendReq(hl="en-US", tz=360)
@@ -8,10 +12,28 @@ pytrends = TrendReq(hl="en-US", tz=360)
 # Crunchbase client
 cb = PyCrunchbase(CRUNCHBASE_API_KEY)
 
+# Rate limit, retries and the TTL cache come from the shared signals client ("trends" provider)
+TRENDS_TTL_SECONDS = 3600
+# TrendReq keeps the payload between build_payload and interest_over_time, so one query at a time
+_pytrends_lock = threading.Lock()
+
+def _interest_over_time(keyword: str):
+    with _pytrends_lock:
+        pytrends.build_payload([keyword], timeframe="today 12-m")
+        df = pytrends.interest_over_time()
+    return df[keyword].tolist() if keyword in df else []
+
+async def _fetch_trends(keyword: str):
+    return await get_client().call(
+        "trends", keyword, lambda: asyncio.to_thread(_interest_over_time, keyword),
+        ttl=TRENDS_TTL_SECONDS, retry_on=(ResponseError,),
+    )
+
 def fetch_trends(keyword: str):
-    pytrends.build_payload([keyword], timeframe="today 12-m")
-    df = pytrends.interest_over_time()
-    return df[keyword].tolist()
+    return run_sync(_fetch_trends(keyword))
+
+async def fetch_trends_async(keyword: str):
+    return await run_async(_fetch_trends(keyword))
 
 def fetch_crunchbase_signals(domain: str):
     api = cb.search_organizations(domain)
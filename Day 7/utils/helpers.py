@@ -1,5 +1,5 @@
-import json
 import os
+from workshop_common.reference_store import get_store
 
 DATA_PATH = "data/reference_datasets/startups.json"
 
@@ -9,9 +9,6 @@ def benchmark_against_startups(parsed_output: dict) -> dict:
     if not os.path.exists(DATA_PATH):
         return {"competition": [], "message": "No dataset found."}
 
-    with open(DATA_PATH, "r") as f:
-        startups = json.load(f)
+    matches = get_store(DATA_PATH, ["description"]).lookup("description", domain, limit=5)
 
-    matches = [s for s in startups if domain in s["description"].lower()]
-
-    return {"competition": matches[:5]}
+    return {"competition": matches}
@@ -1,21 +1,29 @@
 import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
 import streamlit as st
 from typing import TypedDict, Annotated
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain.tools import tool
 from langgraph.graph import END, StateGraph
 from langchain_core.prompts import MessagesPlaceholder
 from langchain_community.cache import InMemoryCache
 from langchain.globals import set_llm_cache
-from langchain_community.document_loaders import CSVLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.agents import AgentFinish
 import google.generativeai as genai
+from workshop_common.eval_cache import EvaluationCache
+from compaction import DATASET_FIELDS, compact_context, render_documents, tokens_saved
+from workshop_common.local_parser import LocalIdeaParser
+from reference_index import VECTORSTORE_DIR, ReferenceSearch, open_reference_store
+from workshop_common.llm_gateway import wrap
+from workshop_common.telemetry import TelemetryCallback, metrics, record, serve_metrics, stage, trace
 
 # Initialize caching
 set_llm_cache(InMemoryCache())
@@ -27,58 +35,63 @@ if not GOOGLE_API_KEY:
     st.stop()
 
 genai.configure(api_key=GOOGLE_API_KEY)
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.7, convert_system_message_to_human=True)
-embedding = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+# "deterministic" wires tools straight into the graph; "agent" keeps the LLM-routed AgentExecutor nodes
+GRAPH_MODE = os.getenv("GRAPH_MODE", "deterministic")
+# Token budgets for retrieved rows and for the scoring context
+RETRIEVAL_CONTEXT_TOKENS = int(os.getenv("RETRIEVAL_CONTEXT_TOKENS", "500"))
+SCORING_CONTEXT_TOKENS = int(os.getenv("SCORING_CONTEXT_TOKENS", "700"))
+
+@st.cache_resource
+def setup_models():
+    """Gemini chat model and embeddings, created once per process rather than on every rerun"""
+    # Every call goes through the process-wide LLM gateway (workshop_common.llm_gateway), shared across Streamlit sessions
+    chat = wrap(ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.7, convert_system_message_to_human=True),
+                callbacks=[TelemetryCallback()], metrics=metrics)
+    return chat, GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+
+llm, embedding = setup_models()
 
 # Define State
 class AgentState(TypedDict):
     messages: Annotated[list, lambda x, y: x + y]
     agent_outcome: AgentFinish | None
 
-# Initialize vector stores
-def initialize_vectorstore(dataset_path, store_name):
-    """Initialize a Chroma vector store from a CSV file"""
-    if not os.path.exists(dataset_path):
-        raise FileNotFoundError(f"Dataset file {dataset_path} not found")
-    
-    os.makedirs(f"data/vectorstores/{store_name}", exist_ok=True)
-    
-    loader = CSVLoader(dataset_path)
-    docs = loader.load()
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    splits = splitter.split_documents(docs)
-    
-    return Chroma.from_documents(
-        splits, 
-        embedding, 
-        persist_directory=f"data/vectorstores/{store_name}"
-    )
+class EvaluationState(TypedDict, total=False):
+    idea: str
+    components: dict
+    market_signals: str
+    comparisons: str
+    score: str
 
+# Reference data: one collection for all datasets, rows tagged by source (see reference_index.py)
 @st.cache_resource
-def setup_vector_stores():
-    """Initialize all required vector stores"""
-    datasets = {
-        "yc_companies": "data/reference_datasets/yc_companies.csv",
-        "unique_startup_companies": "data/reference_datasets/unique_startup_companies.csv",
-        "startup_fundings": "data/reference_datasets/startup_fundings.csv"
-    }
-    
-    stores = {}
-    for name, path in datasets.items():
-        store_path = f"data/vectorstores/{name}"
-        if os.path.exists(store_path):
-            stores[name] = Chroma(persist_directory=store_path, embedding_function=embedding)
-        else:
-            st.warning(f"Initializing {name} vector store for the first time...")
-            stores[name] = initialize_vectorstore(path, name)
-            st.success(f"{name} vector store created!")
-    
-    return stores
+def setup_reference_search():
+    """Open (or create, from precomputed vectors) the unified reference collection"""
+    first_run = not os.path.exists(VECTORSTORE_DIR)
+    if first_run:
+        st.warning("Initializing the reference vector store for the first time...")
+    search = ReferenceSearch(open_reference_store(embedding), embedding)
+    if first_run:
+        st.success("Reference vector store created!")
+    return search
+
+# Local parsing: domain labels from the funding and unicorn datasets (see workshop_common.local_parser)
+@st.cache_resource
+def setup_local_parser():
+    return LocalIdeaParser.from_datasets([
+        ("data/reference_datasets/startup_fundings.csv", "Industry Vertical", ("SubVertical", "Startup Name")),
+        ("data/reference_datasets/unique_startup_companies.csv", "primary_sector", ("company_background", "Company")),
+    ], min_label_rows=3)
+
+local_parser = setup_local_parser()
 
 # Tool definitions
 @tool
 def extract_idea_components(idea: str) -> dict:
     """Extract domain, theme, and value proposition from startup idea."""
+    local = local_parser.parse(idea)
+    if local_parser.confident(local):
+        return json.dumps(local)
     prompt = ChatPromptTemplate.from_template(
         """Extract these components from the startup idea:
         Idea: {idea}
@@ -96,7 +109,9 @@ def extract_idea_components(idea: str) -> dict:
 @tool
 def retrieve_market_signals(domain: str, theme: str) -> dict:
     """Retrieve funding trends and market signals."""
-    docs = vector_stores["startup_fundings"].similarity_search(f"{domain} {theme}", k=5)
+    docs = reference.search(f"{domain} {theme}", {"startup_fundings": 5})["startup_fundings"]
+    context = render_documents(docs, RETRIEVAL_CONTEXT_TOKENS, DATASET_FIELDS["startup_fundings"])
+    record(retrieval_k=len(docs), prompt_tokens_saved=tokens_saved(docs, context))
     prompt = ChatPromptTemplate.from_template(
         """Analyze funding trends for '{domain}' and '{theme}':
         {context}
@@ -109,13 +124,18 @@ def retrieve_market_signals(domain: str, theme: str) -> dict:
         """
     )
     chain = prompt | llm | StrOutputParser()
-    return chain.invoke({"domain": domain, "theme": theme, "context": docs})
+    return chain.invoke({"domain": domain, "theme": theme, "context": context})
 
 @tool
 def find_comparable_startups(domain: str, theme: str) -> dict:
     """Find comparable startups from YC and other datasets."""
-    yc_docs = vector_stores["yc_companies"].similarity_search(f"{domain} {theme}", k=3)
-    startup_docs = vector_stores["unique_startup_companies"].similarity_search(f"{domain} {theme}", k=3)
+    # Same query string as the market-signal branch, so its vector is shared; both sources come from one collection
+    hits = reference.search(f"{domain} {theme}", {"yc_companies": 3, "unique_startup_companies": 3})
+    yc_docs, startup_docs = hits["yc_companies"], hits["unique_startup_companies"]
+    yc_companies = render_documents(yc_docs, RETRIEVAL_CONTEXT_TOKENS // 2, DATASET_FIELDS["yc_companies"])
+    other_startups = render_documents(startup_docs, RETRIEVAL_CONTEXT_TOKENS // 2, DATASET_FIELDS["unique_startup_companies"])
+    record(retrieval_k=len(yc_docs) + len(startup_docs),
+           prompt_tokens_saved=tokens_saved(yc_docs, yc_companies) + tokens_saved(startup_docs, other_startups))
     
     prompt = ChatPromptTemplate.from_template(
         """Compare this idea (Domain: {domain}, Theme: {theme}) with:
@@ -133,8 +153,8 @@ def find_comparable_startups(domain: str, theme: str) -> dict:
     return chain.invoke({
         "domain": domain, 
         "theme": theme,
-        "yc_companies": yc_docs,
-        "other_startups": startup_docs
+        "yc_companies": yc_companies,
+        "other_startups": other_startups
     })
 
 @tool
@@ -157,11 +177,118 @@ def calculate_marketability_score(idea_analysis: dict, market_signals: dict, com
         - recommendation: Next steps
         """
     )
+    compacted = compact_context(context, SCORING_CONTEXT_TOKENS)
+    record(prompt_tokens_saved=tokens_saved(context, compacted))
     chain = prompt | llm | StrOutputParser()
-    return chain.invoke({"context": context})
+    return chain.invoke({"context": compacted})
+
+# Initialize the reference collection
+reference = setup_reference_search()
+
+@st.cache_resource
+def get_evaluation_cache():
+    """Persistent cache of finished evaluations, shared across Streamlit sessions"""
+    return EvaluationCache(
+        os.getenv("EVAL_CACHE_PATH", "data/evaluation_cache.sqlite3"),
+        embed_fn=embedding.embed_query,
+        ttl_seconds=float(os.getenv("EVAL_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+        max_entries=int(os.getenv("EVAL_CACHE_MAX_ENTRIES", "5000")),
+        similarity_threshold=float(os.getenv("EVAL_CACHE_SIMILARITY", "0.95")),
+    )
+
+evaluation_cache = get_evaluation_cache()
+
+@st.cache_resource
+def start_metrics_exporter():
+    """Prometheus /metrics (and /traces with TRACES_ENDPOINT=1) on METRICS_PORT, started once per process"""
+    port = os.getenv("METRICS_PORT")
+    return serve_metrics(int(port)) if port else None
+
+start_metrics_exporter()
+
+class NodeCache:
+    """Bounded LRU of node outputs keyed by a hash of the node's inputs"""
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # parallel branches run in worker threads
 
-# Initialize vector stores
-vector_stores = setup_vector_stores()
+    @staticmethod
+    def key(node, inputs):
+        return hashlib.sha256(json.dumps([node, inputs], sort_keys=True, default=str).encode()).hexdigest()
+
+    def get_or_compute(self, node, inputs, compute):
+        key = self.key(node, inputs)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                record(cache_hits=1)
+                return self._entries[key]
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+@st.cache_resource
+def get_node_cache():
+    """Node outputs survive Streamlit reruns, so only nodes whose inputs changed run again"""
+    return NodeCache(int(os.getenv("NODE_CACHE_MAX_ENTRIES", "512")))
+
+node_cache = get_node_cache()
+
+def parse_components(raw):
+    """Idea components from the parser's JSON reply (fenced or not); falls back to the raw text"""
+    match = re.search(r"\{.*\}", raw if isinstance(raw, str) else json.dumps(raw), re.DOTALL)
+    try:
+        components = json.loads(match.group(0)) if match else {}
+    except json.JSONDecodeError:
+        components = {}
+    if not isinstance(components, dict) or not components:
+        record(parse_failures=1)
+        components = {}
+    components.setdefault("domain", "")
+    components.setdefault("theme", "")
+    return components
+
+def memoized_node(name, input_keys, compute):
+    """Graph node that reads ``input_keys`` from state and caches its output by their hash"""
+    def node(state: EvaluationState):
+        inputs = {k: state.get(k) for k in input_keys}
+        with stage(name):
+            return node_cache.get_or_compute(name, inputs, lambda: compute(**inputs))
+    return node
+
+def parse_idea(idea):
+    return {"components": parse_components(extract_idea_components.invoke({"idea": idea}))}
+
+def market_signals_node(components):
+    return {"market_signals": retrieve_market_signals.invoke({"domain": components["domain"], "theme": components["theme"]})}
+
+def comparison_node(components):
+    return {"comparisons": find_comparable_startups.invoke({"domain": components["domain"], "theme": components["theme"]})}
+
+def scoring_node(components, market_signals, comparisons):
+    return {"score": calculate_marketability_score.invoke({
+        "idea_analysis": components,
+        "market_signals": {"analysis": market_signals},
+        "comparisons": {"analysis": comparisons},
+    })}
+
+def build_deterministic_graph():
+    """Typed-state graph calling each tool directly; both retrieval branches run in the same step"""
+    graph = StateGraph(EvaluationState)
+    graph.add_node("idea_parser", memoized_node("idea_parser", ["idea"], parse_idea))
+    graph.add_node("market_signal", memoized_node("market_signal", ["components"], market_signals_node))
+    graph.add_node("comparison", memoized_node("comparison", ["components"], comparison_node))
+    graph.add_node("scoring", memoized_node("scoring", ["components", "market_signals", "comparisons"], scoring_node))
+    graph.add_edge("idea_parser", "market_signal")
+    graph.add_edge("idea_parser", "comparison")
+    graph.add_edge(["market_signal", "comparison"], "scoring")
+    graph.add_edge("scoring", END)
+    graph.set_entry_point("idea_parser")
+    return graph.compile()
 
 # Agent workflow
 def create_agent_executor(name, tools):
@@ -173,27 +300,46 @@ def create_agent_executor(name, tools):
     agent = create_tool_calling_agent(llm, tools, prompt)
     return AgentExecutor(agent=agent, tools=tools, handle_parsing_errors=True)
 
-# Initialize StateGraph
-workflow = StateGraph(AgentState)
+def timed_node(name, runnable):
+    """Graph node that runs ``runnable`` inside a telemetry stage"""
+    def node(state):
+        with stage(name):
+            return runnable.invoke(state)
+    return node
+
+def build_agent_graph():
+    """Original graph: each node is an AgentExecutor that lets the LLM pick its tool"""
+    workflow = StateGraph(AgentState)
 
-# Add nodes
-workflow.add_node("idea_parser", create_agent_executor("Idea Parsing", [extract_idea_components]))
-workflow.add_node("market_signal", create_agent_executor("Market Signal", [retrieve_market_signals]))
-workflow.add_node("comparison", create_agent_executor("Comparative Benchmarking", [find_comparable_startups]))
-workflow.add_node("scoring", create_agent_executor("Marketability Scoring", [calculate_marketability_score]))
+    # Add nodes
+    workflow.add_node("idea_parser", timed_node("idea_parser", create_agent_executor("Idea Parsing", [extract_idea_components])))
+    workflow.add_node("market_signal", timed_node("market_signal", create_agent_executor("Market Signal", [retrieve_market_signals])))
+    workflow.add_node("comparison", timed_node("comparison", create_agent_executor("Comparative Benchmarking", [find_comparable_startups])))
+    workflow.add_node("scoring", timed_node("scoring", create_agent_executor("Marketability Scoring", [calculate_marketability_score])))
 
-# Add edges (now supports multiple edges from same node)
-workflow.add_edge("idea_parser", "market_signal")
-workflow.add_edge("idea_parser", "comparison")
-workflow.add_edge("market_signal", "scoring")
-workflow.add_edge("comparison", "scoring")
-workflow.add_edge("scoring", END)
+    # Add edges (now supports multiple edges from same node)
+    workflow.add_edge("idea_parser", "market_signal")
+    workflow.add_edge("idea_parser", "comparison")
+    workflow.add_edge("market_signal", "scoring")
+    workflow.add_edge("comparison", "scoring")
+    workflow.add_edge("scoring", END)
 
-# Set entry point
-workflow.set_entry_point("idea_parser")
+    # Set entry point
+    workflow.set_entry_point("idea_parser")
+
+    # Compile the graph
+    return workflow.compile()
+
+@st.cache_resource
+def get_graph(mode):
+    """The compiled graph (and in agent mode its four AgentExecutors), built once per process and mode"""
+    return build_deterministic_graph() if mode == "deterministic" else build_agent_graph()
+
+app = get_graph(GRAPH_MODE)
+
+# Where each node's result lives in its state update
+RESULT_KEYS = {"idea_parser": "components", "market_signal": "market_signals", "comparison": "comparisons", "scoring": "score"}
 
-# Compile the graph
-app = workflow.compile()
 
 # Streamlit UI
 st.set_page_config(page_title="Startup Validator", layout="wide")
@@ -219,24 +365,71 @@ def display_agent_result(agent_key, result):
         else:
             st.write(result)
 
+def stream_results(inputs):
+    """Run the graph, filling each node's placeholder as soon as that node finishes"""
+    slots = {agent_key: st.empty() for agent_key in AGENT_DISPLAY}
+    for agent_key, slot in slots.items():
+        slot.caption(f"⏳ {AGENT_DISPLAY[agent_key]['name']}…")
+    results = []
+    for output in app.stream(inputs):
+        for agent_key, value in output.items():
+            if agent_key not in slots or not value:
+                continue
+            result_key = "output" if "output" in value else RESULT_KEYS.get(agent_key)
+            if result_key in value:
+                with slots[agent_key].container():
+                    display_agent_result(agent_key, value[result_key])
+                results.append([agent_key, value[result_key]])
+    return results
+
+def failed_nodes(results):
+    """Nodes with no result, a parse that found nothing, or an agent that gave up; such runs are not cached"""
+    produced = dict(results)
+    failed = [agent_key for agent_key in AGENT_DISPLAY if not produced.get(agent_key)]
+    components = produced.get("idea_parser")
+    if isinstance(components, dict) and not components.get("domain"):
+        failed.append("idea_parser")
+    failed += [agent_key for agent_key, result in produced.items()
+               if isinstance(result, str) and result.startswith("Agent stopped")]
+    return sorted(set(failed))
+
+# Finished evaluations for this session, keyed by idea text, so reruns redraw them without any lookup
+evaluations = st.session_state.setdefault("evaluations", {})
+
 idea_input = st.text_area("Describe your startup idea:", height=100,
                          placeholder="e.g. 'AI-powered legal document review for small businesses'")
 
-if st.button("Validate Idea", type="primary") and idea_input:
-    with st.spinner("Analyzing your idea..."):
-        try:
-            inputs = {"messages": [HumanMessage(content=idea_input)]}
-            
-            for output in app.stream(inputs):
-                for agent_key, value in output.items():
-                    if agent_key != "__end__" and "output" in value:
-                        display_agent_result(agent_key, value["output"])
-            
-            st.success("Analysis complete!")
-            
-        except Exception as e:
-            st.error(f"Analysis failed: {str(e)}")
-            st.exception(e)
+if st.button("Validate Idea", type="primary") and idea_input and idea_input not in evaluations:
+    try:
+        with trace("validate_idea", mode=GRAPH_MODE, idea=idea_input):
+            cached = evaluation_cache.get(idea_input)
+            record(evaluation_cache="hit" if cached is not None else "miss")
+            if cached is not None:
+                for agent_key, result in cached:
+                    display_agent_result(agent_key, result)
+                st.success("Analysis complete! (cached)")
+            else:
+                if GRAPH_MODE == "deterministic":
+                    inputs = {"idea": idea_input}
+                else:
+                    inputs = {"messages": [HumanMessage(content=idea_input)]}
+                results = stream_results(inputs)
+                failed = failed_nodes(results)
+                if failed:
+                    # A degraded result would be served to this idea and its rewordings for the whole TTL
+                    record(failed_stages=failed)
+                    st.warning(f"Analysis incomplete ({', '.join(failed)}); it was not cached and will run again next time.")
+                else:
+                    evaluation_cache.put(idea_input, results)
+                    st.success("Analysis complete!")
+            evaluations[idea_input] = cached if cached is not None else results
+
+    except Exception as e:
+        st.error(f"Analysis failed: {str(e)}")
+        st.exception(e)
+elif idea_input in evaluations:
+    for agent_key, result in evaluations[idea_input]:
+        display_agent_result(agent_key, result)
 
 st.sidebar.markdown("""
 ### How It Works
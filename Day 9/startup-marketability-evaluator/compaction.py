@@ -0,0 +1,145 @@
+"""Row-level dataset loading and compact, token-budgeted prompt context.
+
+Each CSV row becomes one document holding only the columns the tools use, so
+retrieval returns whole rows instead of 1000-character chunks. Retrieved rows
+are rendered as deduplicated JSON lines rather than ``Document`` reprs, and
+earlier tool replies are shortened before the scoring prompt sees them.
+"""
+import csv
+import json
+from functools import lru_cache
+import tiktoken
+from langchain_core.documents import Document
+
+# Columns kept per dataset, most useful first; None keeps every non-empty column
+DATASET_FIELDS = {
+    "startup_fundings": ("Startup Name", "Industry Vertical", "SubVertical", "City  Location", "InvestmentnType", "Amount in USD",
+                         "Date", "Investors Name"),
+    "unique_startup_companies": ("Company", "primary_sector", "company_background", "stage", "valuation", "total_funding_till_date",
+                                 "latest_funding_round", "location", "founded_year"),
+    "yc_companies": None,
+}
+NAME_FIELDS = ("Startup Name", "Company", "company_name", "name")
+INDEX_FIELD_CHARS = 400  # per column, in the embedded text
+PROMPT_FIELD_CHARS = 160  # per column, in prompts
+# (items per list, characters per string), tried in order until the context fits its budget
+COMPACTION_LEVELS = ((5, 240), (3, 120), (2, 60), (1, 40))
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # Gemini has no public tokenizer; cl100k is close enough for budgeting
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None  # offline host without the cached BPE file
+
+
+def count_tokens(text):
+    encoding = _encoding()
+    return len(encoding.encode(text)) if encoding else len(text) // 4 + 1
+
+
+def tokens_saved(original, compacted):
+    return max(0, count_tokens(str(original)) - count_tokens(compacted))
+
+
+def to_json(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def shorten(text, max_chars):
+    text = " ".join(str(text).split())
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+
+# --- Loading ---
+def load_rows(dataset_path, fields=None, max_chars=INDEX_FIELD_CHARS):
+    """One document per CSV row with only ``fields`` (all non-empty columns if None) as text and metadata"""
+    documents = []
+    # The funding export has stray non-UTF-8 bytes; replace them rather than failing the whole build
+    with open(dataset_path, newline="", encoding="utf-8-sig", errors="replace") as file:
+        for number, row in enumerate(csv.DictReader(file)):
+            values = {field: shorten(row[field], max_chars) for field in (fields or row) if field and (row.get(field) or "").strip()}
+            if not values:
+                continue
+            documents.append(Document(
+                page_content="\n".join(f"{field}: {value}" for field, value in values.items()),
+                metadata={**values, "source": dataset_path, "row": number},
+            ))
+    return documents
+
+
+def row_fields(document, fields=None):
+    """A document's columns: from metadata for row-level documents, parsed from the text for older chunked stores"""
+    values = {key: value for key, value in document.metadata.items() if key not in ("source", "row")}
+    if not values:
+        for line in document.page_content.splitlines():
+            key, sep, value = line.partition(": ")
+            if sep and value.strip():
+                values[key.strip()] = value.strip()
+    if fields:
+        values = {field: values[field] for field in fields if field in values}
+    return values
+
+
+# --- Rendering ---
+def render_documents(documents, max_tokens, fields=None, max_chars=PROMPT_FIELD_CHARS):
+    """Retrieved rows as compact JSON lines, one per distinct company, stopping at ``max_tokens``"""
+    merged = {}
+    for document in documents:
+        values = {field: shorten(value, max_chars) for field, value in row_fields(document, fields).items()}
+        if not values:
+            continue
+        name = next((values[field] for field in NAME_FIELDS if field in values), document.page_content[:80])
+        for field, value in values.items():
+            merged.setdefault(name.strip().lower(), {}).setdefault(field, value)
+    lines, used = [], 0
+    for row in merged.values():
+        line = to_json(row)
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines) or "No matching rows"
+
+
+def parse_reply(reply):
+    """The JSON object in a tool reply (fenced or not); the reply itself if there is none"""
+    text = reply if isinstance(reply, str) else json.dumps(reply)
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            return json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            pass
+    return text
+
+
+def compact_value(value, max_items, max_chars):
+    if isinstance(value, str):
+        return shorten(value, max_chars)
+    if isinstance(value, list):
+        return [compact_value(item, max_items, max_chars) for item in value[:max_items]]
+    if isinstance(value, dict):
+        return {key: compact_value(item, max_items, max_chars) for key, item in value.items() if item not in (None, "", [], {})}
+    return value
+
+
+def _parse_replies(value):
+    if isinstance(value, str):
+        return parse_reply(value)
+    if isinstance(value, dict):
+        return {key: _parse_replies(item) for key, item in value.items()}
+    return value
+
+
+def compact_context(context, max_tokens):
+    """Tool replies parsed and shortened step by step until the whole context fits ``max_tokens``"""
+    parsed = _parse_replies(context)
+    for max_items, max_chars in COMPACTION_LEVELS:
+        text = to_json(compact_value(parsed, max_items, max_chars))
+        if count_tokens(text) <= max_tokens:
+            break
+    return text
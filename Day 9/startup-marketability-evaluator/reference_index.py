@@ -0,0 +1,243 @@
+"""One Chroma collection for all reference datasets, with precomputed row vectors.
+
+Every row carries its dataset name in the ``source`` metadata field, so the
+tools embed a query once and take the top k per source from the same
+collection.
+
+Row vectors come from ``embedding-001`` and are computed ahead of time:
+
+    python reference_index.py build
+
+This writes ``data/embeddings/reference.npz``, mapping each row's content
+hash to its vector. It needs the Gemini API key, so it is a deployment step
+(run it when building the image); ``python reference_index.py check`` fails
+when the file is missing or stale. When the app opens the collection, it
+compares the row ids stored there with the datasets, adds the missing rows
+(vectors from that file) and deletes the rows that are gone, so an
+interrupted first build is completed on the next start. Only rows that are
+new or changed since the build are embedded over the network, unless
+``REFERENCE_REQUIRE_PRECOMPUTED=1`` turns that into an error.
+
+With ``REFERENCE_BACKEND=numpy``, the collection is a memory-mapped NumPy
+index (see ``workshop_common.numpy_index``) instead of Chroma. It has the
+same search interface and is written straight from the precomputed vectors.
+"""
+import os
+import json
+import hashlib
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import Chroma
+from compaction import DATASET_FIELDS, load_rows
+from workshop_common.numpy_index import NumpyVectorStore
+
+DATASETS = {name: f"data/reference_datasets/{name}.csv" for name in ("yc_companies", "unique_startup_companies", "startup_fundings")}
+REFERENCE_BACKEND = os.getenv("REFERENCE_BACKEND", "chroma")  # "chroma" or "numpy"
+VECTORSTORE_DIR = "data/vectorstores/reference" if REFERENCE_BACKEND == "chroma" else "data/vectorstores/reference_numpy"
+COLLECTION_NAME = "reference"
+EMBEDDINGS_FILE = os.getenv("REFERENCE_EMBEDDINGS_FILE", "data/embeddings/reference.npz")
+# Refuse to embed rows over the network at startup (the build artifact must cover every row)
+REFERENCE_REQUIRE_PRECOMPUTED = os.getenv("REFERENCE_REQUIRE_PRECOMPUTED", "0") == "1"
+EMBED_BATCH_SIZE = 100  # Gemini's batch embedding limit
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+logger = logging.getLogger(__name__)
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_reference_rows():
+    """Map content hash -> Document for every row of every dataset present, tagged with its ``source``"""
+    documents = {}
+    for name, path in DATASETS.items():
+        if not os.path.exists(path):
+            logger.warning("Dataset %s not found; %s rows will be missing from the reference index", path, name)
+            continue
+        for document in load_rows(path, DATASET_FIELDS.get(name)):
+            document.metadata["source"] = name
+            documents[text_key(name + "\n" + document.page_content)] = document
+    return documents
+
+
+# --- Precomputed vectors ---
+def load_precomputed(path=EMBEDDINGS_FILE):
+    """Text hash -> vector from the build artifact; empty if it hasn't been built"""
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        return dict(zip(data["keys"].tolist(), data["vectors"]))
+
+
+def save_precomputed(vectors, path=EMBEDDINGS_FILE):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    keys = list(vectors)
+    np.savez(path, keys=np.array(keys), vectors=np.array([vectors[key] for key in keys], dtype=np.float32))
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """Serves document vectors from the precomputed table and embeds only the texts it lacks"""
+
+    def __init__(self, base, vectors):
+        self.base = base
+        self.vectors = vectors
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        missing = [text for text in dict.fromkeys(texts) if text_key(text) not in self.vectors]
+        self.misses += len(missing)
+        for start in range(0, len(missing), EMBED_BATCH_SIZE):
+            batch = missing[start:start + EMBED_BATCH_SIZE]
+            for text, vector in zip(batch, self.base.embed_documents(batch)):
+                self.vectors[text_key(text)] = np.asarray(vector, dtype=np.float32)
+        return [self.vectors[text_key(text)].tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self.base.embed_query(text)
+
+
+def build_embeddings(embedding, path=EMBEDDINGS_FILE):
+    """Embed new or changed rows into the artifact and drop vectors for rows that are gone"""
+    documents = load_reference_rows()
+    previous = load_precomputed(path)
+    table = PrecomputedEmbeddings(embedding, dict(previous))
+    texts = [document.page_content for document in documents.values()]
+    table.embed_documents(texts)
+    current = {text_key(text): table.vectors[text_key(text)] for text in texts}
+    save_precomputed(current, path)
+    return {"rows": len(texts), "embedded": table.misses, "reused": len(current) - table.misses,
+            "dropped": len(previous.keys() - current.keys())}
+
+
+def missing_precomputed(documents, path=EMBEDDINGS_FILE):
+    """Row ids whose vectors the build artifact lacks"""
+    vectors = load_precomputed(path)
+    return [row_id for row_id, document in documents.items() if text_key(document.page_content) not in vectors]
+
+
+# --- Collection ---
+def embed_reference_rows(embedding, documents, known=None):
+    """(ids, vectors, documents) for ``documents``, taking vectors from ``known`` (id -> vector) or the precomputed table"""
+    vectors = load_precomputed()
+    for row_id, vector in (known or {}).items():
+        if row_id in documents:
+            vectors[text_key(documents[row_id].page_content)] = vector
+    table = PrecomputedEmbeddings(embedding, vectors)
+    ids = list(documents)
+    texts = [documents[row_id].page_content for row_id in ids]
+    if REFERENCE_REQUIRE_PRECOMPUTED:
+        missing = sum(1 for text in dict.fromkeys(texts) if text_key(text) not in vectors)
+        if missing:
+            raise RuntimeError(f"{missing} reference rows have no precomputed vector; run `python reference_index.py build`")
+    embedded = table.embed_documents(texts)
+    logger.info("Reference rows: %d, embedded over the network: %d", len(ids), table.misses)
+    return ids, embedded, [documents[row_id] for row_id in ids]
+
+
+def open_reference_store(embedding, persist_directory=VECTORSTORE_DIR):
+    """Open the persisted collection, first bringing its rows in line with the datasets.
+
+    Rows are identified by content hash, so comparing ids finds rows that are
+    missing (a new dataset row, or an earlier build that was interrupted) and
+    rows whose source row is gone.
+    """
+    documents = load_reference_rows()
+    if REFERENCE_BACKEND == "numpy":
+        if NumpyVectorStore.exists(persist_directory):
+            store = NumpyVectorStore(persist_directory, embedding)
+            if set(store.ids) == set(documents):
+                return store
+            known = store.vectors_by_id()
+        else:
+            known = None
+        return NumpyVectorStore.build(persist_directory, *embed_reference_rows(embedding, documents, known), embedding)
+    store = Chroma(collection_name=COLLECTION_NAME, persist_directory=persist_directory, embedding_function=embedding)
+    stored = set(store._collection.get(include=[])["ids"])
+    stale = list(stored - documents.keys())
+    missing = {row_id: document for row_id, document in documents.items() if row_id not in stored}
+    if stale:
+        logger.info("Removing %d reference rows no longer in the datasets", len(stale))
+        for start in range(0, len(stale), 1000):
+            store._collection.delete(ids=stale[start:start + 1000])
+    if missing:
+        logger.info("Adding %d reference rows missing from the collection", len(missing))
+        ids, vectors, rows = embed_reference_rows(embedding, missing)
+        for start in range(0, len(ids), 1000):
+            store._collection.upsert(
+                ids=ids[start:start + 1000],
+                embeddings=vectors[start:start + 1000],
+                metadatas=[document.metadata for document in rows[start:start + 1000]],
+                documents=[document.page_content for document in rows[start:start + 1000]],
+            )
+    return store
+
+
+class ReferenceSearch:
+    """Top-k rows per source for a query, embedding each distinct query string once.
+
+    Query vectors are kept in a small LRU. Concurrent callers asking for the
+    same query (e.g. the market-signal and comparison branches of one run)
+    wait on a single embedding call.
+    """
+
+    def __init__(self, store, embedding, cache_size=QUERY_CACHE_SIZE):
+        self.store = store
+        self.embedding = embedding
+        self.cache_size = cache_size
+        self._vectors = OrderedDict()  # query -> Future of its vector
+        self._lock = threading.Lock()
+
+    def query_vector(self, query):
+        with self._lock:
+            future = self._vectors.get(query)
+            owner = future is None
+            if owner:
+                future = self._vectors[query] = Future()
+                while len(self._vectors) > self.cache_size:
+                    self._vectors.popitem(last=False)
+            else:
+                self._vectors.move_to_end(query)
+        if owner:
+            try:
+                future.set_result(self.embedding.embed_query(query))
+            except Exception as e:
+                with self._lock:
+                    self._vectors.pop(query, None)
+                future.set_exception(e)
+        return future.result()
+
+    def search(self, query, k_by_source):
+        """``{source: [Document, ...]}`` with up to ``k`` rows from each requested source"""
+        vector = self.query_vector(query)
+        return {
+            source: self.store.similarity_search_by_vector(vector, k=k, filter={"source": source})
+            for source, k in k_by_source.items()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the Day 9 reference index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="Precompute embedding-001 vectors for every dataset row.")
+    subparsers.add_parser("check", help="Exit 1 if the precomputed vectors are missing rows of the current datasets.")
+    args = parser.parse_args()
+    if args.command == "build":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        print(json.dumps(build_embeddings(GoogleGenerativeAIEmbeddings(model="models/embedding-001"))))
+    elif args.command == "check":
+        documents = load_reference_rows()
+        missing = missing_precomputed(documents)
+        print(json.dumps({"rows": len(documents), "missing": len(missing), "file": EMBEDDINGS_FILE}))
+        if missing:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,145 @@
+"""Deterministic stand-ins for the external services the pipelines call.
+
+- ``FakeChatModel``: a LangChain chat model that sleeps for a configurable
+  latency and answers with canned JSON, picked by matching the prompt text.
+- ``HashEmbeddings``: hashed bag-of-words vectors. Similar text gets similar
+  vectors, nothing is downloaded, and the same text always embeds the same way.
+- ``serve_fake_tavily``: the local fake Tavily server from
+  ``workshop_common.http_client``, with a configurable latency.
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Any, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from workshop_common.http_client import serve_fake
+
+# (prompt substring, reply) pairs, first match wins
+CANNED_RESPONSES = [
+    # Day 10 stages
+    ("Analyze market demand", {"search_volume": "12k/month", "growth_rate": "18% YoY", "top_regions": ["Bengaluru", "Mumbai", "Pune"],
+                               "related_terms": ["gst invoicing", "sme accounting"], "demand_risk": "medium", "market_potential": "high"}),
+    ("Analyze competitive landscape", {"direct_competitors": [{"name": "Zoho Books", "description": "Accounting suite"},
+                                                              {"name": "Vyapar", "description": "SME invoicing app"},
+                                                              {"name": "Khatabook", "description": "Digital ledger"}],
+                                       "competitive_advantages": ["vernacular UX"], "market_gaps": ["tier-3 towns"],
+                                       "ip_risks": "low", "benchmark_score": 64, "competitive_intensity": "high"}),
+    ("Evaluate market saturation", {"saturation_score": 58, "funding_trends": ["$10M Series A in 2024"], "top_cities": ["Bengaluru", "Mumbai", "Delhi"],
+                                    "barriers_to_entry": ["distribution"], "market_maturity": "growing"}),
+    ("Score innovation and novelty", {"novelty_score": 61, "differentiation_factors": ["offline-first"], "trend_alignment": "strong",
+                                      "suggested_pivots": ["embedded lending"], "innovation_level": "incremental"}),
+    ("Generate a comprehensive startup viability report", {"viability_score": 67, "market_opportunity": "Large SME base",
+                                                           "key_risks": ["CAC"], "recommended_strategy": "Channel partners",
+                                                           "potential_partners": ["banks"], "investment_requirement": "$1.5M",
+                                                           "timeline_to_market": "6 months", "success_probability": "60%"}),
+    # Day 9 tools
+    ("Extract these components", {"domain": "FinTech", "theme": "SME invoicing", "value_prop": "GST-ready invoices in seconds",
+                                  "problem": "Manual bookkeeping"}),
+    ("Analyze funding trends", {"momentum_score": 72, "interest_trend": "rising", "key_players": ["Razorpay", "Zoho"],
+                                "recent_funding": ["$20M Series B"]}),
+    ("Compare this idea", {"closest_matches": ["Vyapar"], "differentiation": "vernacular voice input", "whitespace": "tier-3 retailers",
+                           "competitive_risk": "incumbent bundling"}),
+    ("Evaluate startup potential", {"marketability_score": 69, "opportunity_analysis": "clear pain", "timing_analysis": "GST e-invoicing mandate",
+                                    "risk_analysis": "low switching costs", "recommendation": "pilot with 50 retailers"}),
+    # Day 6 chains
+    ("Extract the key components", {"domain": "FinTech", "problem": "Manual bookkeeping", "target_audience": "Small retailers",
+                                    "technologies": "Mobile, OCR"}),
+    ("Generate a concise 4-5 line report", "Market Opportunity: large.\nSaturation Risk: moderate.\nTiming Fit: good."),
+]
+DEFAULT_RESPONSE = {"score": 60, "summary": "Canned benchmark response."}
+
+
+def canned_reply(prompt, responses=CANNED_RESPONSES, default=DEFAULT_RESPONSE):
+    for needle, reply in responses:
+        if needle in prompt:
+            break
+    else:
+        reply = default
+    return reply if isinstance(reply, str) else json.dumps(reply)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that waits ``latency`` seconds (plus up to ``jitter``) and returns a canned reply."""
+
+    latency: float = 0.2
+    jitter: float = 0.0
+    responses: Sequence[Tuple[str, Any]] = CANNED_RESPONSES
+    default: Any = DEFAULT_RESPONSE
+    # Extra constructor arguments the real client takes (model, temperature, ...) are accepted and ignored
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    google_api_key: Optional[str] = None
+    convert_system_message_to_human: bool = False
+    response_mime_type: Optional[str] = None
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _delay(self, prompt):
+        # Jitter is seeded by the prompt so repeated runs sleep for the same time
+        return self.latency + self.jitter * random.Random(prompt).random()
+
+    def _result(self, messages):
+        prompt = "\n".join(str(message.content) for message in messages)
+        text = canned_reply(prompt, self.responses, self.default)
+        message = AIMessage(content=text, usage_metadata={
+            "input_tokens": len(prompt) // 4 + 1, "output_tokens": len(text) // 4 + 1, "total_tokens": (len(prompt) + len(text)) // 4 + 2,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)]), prompt
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        result, prompt = self._result(messages)
+        time.sleep(self._delay(prompt))
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        result, prompt = self._result(messages)
+        await asyncio.sleep(self._delay(prompt))
+        return result
+
+    def with_structured_output(self, schema, **kwargs):
+        """Canned JSON validated into ``schema``, standing in for Gemini's structured output."""
+        return self | RunnableLambda(lambda message: schema.model_validate_json(message.content))
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class HashEmbeddings(Embeddings):
+    """Signed feature hashing of word unigrams and bigrams into ``dimensions`` floats, L2-normalised."""
+
+    def __init__(self, dimensions=384, **kwargs):
+        self.dimensions = dimensions
+
+    def _embed(self, text):
+        tokens = TOKEN_PATTERN.findall(str(text).lower())
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += 1.0 if (digest >> 63) else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+# --- Fake Tavily ---
+def serve_fake_tavily(port=0, latency=0.05):
+    """Start the shared fake Tavily ``POST /search`` server in a daemon thread; returns (server, base_url)."""
+    server = serve_fake(port, latency)
+    threading.Thread(target=server.serve_forever, name="fake-tavily", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
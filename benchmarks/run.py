@@ -0,0 +1,190 @@
+"""Offline benchmark runner.
+
+    python benchmarks/run.py day10-api --concurrency 1 10 100
+    python benchmarks/run.py day10-api --save-baseline
+    python benchmarks/run.py day10-api --compare
+
+Each (target, concurrency) pair runs in a fresh child process. That makes
+startup time and peak RSS per-scenario figures, and keeps the projects'
+same-named modules (``app``, ``services``, ...) from colliding. Baselines
+are JSON files under ``benchmarks/baselines/``.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import inspect
+import argparse
+import platform
+import resource
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROCESS_STARTED = time.perf_counter()
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_DIR = BENCH_DIR / "baselines"
+# Metric -> True if bigger is better
+COMPARED = {"throughput_rps": True, "p50": False, "p95": False, "p99": False, "startup_seconds": False, "peak_rss_mb": False}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+# --- Child: run one scenario ---
+async def drive(call, concurrency, requests, warmup):
+    """Run ``requests`` calls with at most ``concurrency`` in flight; returns (latencies, errors, wall seconds)."""
+    if not inspect.iscoroutinefunction(call):
+        sync_call = call
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+
+        async def call(i):
+            await asyncio.to_thread(sync_call, i)
+    for i in range(warmup):
+        await call(-1 - i)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call(i)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_child(options):
+    from scenarios import SCENARIOS
+    setup, serial = SCENARIOS[options.target]
+    concurrency = 1 if serial else options.concurrency[0]
+    call = setup(options)
+    startup = time.perf_counter() - PROCESS_STARTED
+    latencies, errors, wall = asyncio.run(drive(call, concurrency, options.requests, options.warmup))
+    result = {
+        "target": options.target,
+        "concurrency": concurrency,
+        "requests": options.requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else None,
+        "startup_seconds": round(startup, 3),
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024), 1),
+        "wall_seconds": round(wall, 3),
+    }
+    if latencies:
+        result.update({f"p{q}": round(percentile(latencies, q), 4) for q in (50, 95, 99)})
+        result["mean"] = round(sum(latencies) / len(latencies), 4)
+    print(json.dumps(result))
+
+
+# --- Parent: spawn children, report, save and compare baselines ---
+def spawn(options, concurrency):
+    command = [sys.executable, str(Path(__file__).resolve()), options.target, "--child",
+               "--concurrency", str(concurrency), "--requests", str(max(options.requests, concurrency)),
+               "--warmup", str(options.warmup), "--llm-latency", str(options.llm_latency),
+               "--llm-jitter", str(options.llm_jitter), "--tavily-latency", str(options.tavily_latency)]
+    if options.warm_cache:
+        command.append("--warm-cache")
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=BENCH_DIR,
+                               env={**os.environ, "PYTHONPATH": str(BENCH_DIR)})
+    lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f"{options.target} @ {concurrency} failed:\n{completed.stderr[-4000:]}")
+    return json.loads(lines[-1])
+
+
+def print_table(results):
+    columns = ["concurrency", "requests", "errors", "throughput_rps", "p50", "p95", "p99", "startup_seconds", "peak_rss_mb"]
+    widths = {column: max(len(column), *(len(str(result.get(column))) for result in results)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for result in results:
+        print("  ".join(str(result.get(column)).ljust(widths[column]) for column in columns))
+
+
+def baseline_path(target, name):
+    return BASELINE_DIR / f"{target}{'-' + name if name else ''}.json"
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against the baseline per metric; returns True if anything regressed past ``tolerance``."""
+    regressed = False
+    for result in results:
+        previous = baseline["results"].get(str(result["concurrency"]))
+        if previous is None:
+            print(f"c={result['concurrency']}: no baseline")
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > tolerance else ""
+            regressed |= bool(flag)
+            changes.append(f"{metric} {old} -> {new} ({change:+.0%}){flag}")
+        print(f"c={result['concurrency']}: " + "; ".join(changes))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipelines offline against fake LLM, embedder and Tavily.")
+    parser.add_argument("target", choices=["day10-api", "day10-index", "day9-graph", "day6-evaluate"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=50, help="Requests per concurrency level (raised to the concurrency if lower)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed calls before measuring")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per fake LLM call")
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--tavily-latency", type=float, default=0.05)
+    parser.add_argument("--warm-cache", action="store_true", help="Repeat a few ideas so caches can hit")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="Compare with the saved baseline; exit 1 on regression")
+    parser.add_argument("--baseline-name", default="", help="Suffix for keeping several baselines per target")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression before --compare fails")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    options = parser.parse_args()
+    if options.child:
+        run_child(options)
+        return
+
+    results = []
+    for concurrency in options.concurrency:
+        results.append(spawn(options, concurrency))
+        if results[-1]["first_error"]:
+            print(f"c={concurrency}: {results[-1]['errors']} errors, first: {results[-1]['first_error']}", file=sys.stderr)
+    print_table(results)
+
+    path = baseline_path(options.target, options.baseline_name)
+    regressed = False
+    if options.compare:
+        if not path.exists():
+            sys.exit(f"No baseline at {path}; run with --save-baseline first")
+        regressed = compare(results, json.loads(path.read_text()), options.tolerance)
+    if options.save_baseline:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "target": options.target,
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "settings": {key: getattr(options, key) for key in ("requests", "warmup", "llm_latency", "llm_jitter", "tavily_latency", "warm_cache")},
+            "results": {str(result["concurrency"]): result for result in results},
+        }, indent=2))
+        print(f"Baseline saved to {path}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
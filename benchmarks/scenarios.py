@@ -0,0 +1,158 @@
+"""Benchmark targets: each one sets up a real pipeline wired to the fakes.
+
+A scenario takes the parsed CLI options and returns ``call(i)``: a coroutine
+function or plain function that runs request ``i`` once. It runs inside a
+fresh child process (see ``run.py``), so it is free to chdir, set environment
+variables and patch modules before importing the project code.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import functools
+from pathlib import Path
+from fakes import FakeChatModel, HashEmbeddings, serve_fake_tavily
+
+ROOT = Path(__file__).resolve().parent.parent
+DAY6 = ROOT / "Day 6" / "Startup-Idea-Marketability-Evaluator"
+DAY9 = ROOT / "Day 9" / "startup-marketability-evaluator"
+DAY10 = ROOT / "Day 10" / "agent-python"
+
+IDEAS = [
+    "AI-powered GST invoicing app for small retailers",
+    "Vernacular voice tutor for rural school students",
+    "Cold-chain logistics marketplace for dairy farmers",
+    "Subscription EV battery swapping for delivery riders",
+    "Telemedicine clinic network for tier-3 towns",
+    "B2B SaaS for restaurant inventory forecasting",
+]
+
+
+def idea_for(i, options):
+    """Distinct ideas per request on a cold run; a small repeating set when measuring warm caches."""
+    idea = IDEAS[i % len(IDEAS)]
+    return idea if options.warm_cache else f"{idea} (variant {i})"
+
+
+def _enter(project, workdir=None):
+    sys.path.insert(0, str(project))
+    os.chdir(workdir or project)
+
+
+def _patch_gemini(options):
+    """Make ``from langchain_google_genai import ...`` hand out the fakes."""
+    import langchain_google_genai
+    langchain_google_genai.ChatGoogleGenerativeAI = functools.partial(FakeChatModel, latency=options.llm_latency, jitter=options.llm_jitter)
+    langchain_google_genai.GoogleGenerativeAIEmbeddings = HashEmbeddings
+
+
+def _fake_tavily_env(options):
+    _, url = serve_fake_tavily(latency=options.tavily_latency)
+    os.environ.update({"TAVILY_API_KEY": "bench", "TAVILY_BASE_URL": url})
+
+
+def day10_api(options):
+    """POST /validate-idea through the ASGI app (no network), with a freshly built index (Chroma or NumPy, per VECTOR_BACKEND)."""
+    workdir = Path(tempfile.mkdtemp(prefix="bench-day10-"))
+    _fake_tavily_env(options)
+    os.environ.update({
+        "RAG_DB_DIR": str(workdir / "rag_db"),
+        "NUMPY_INDEX_DIR": str(workdir / "numpy_index"),
+        "EVAL_CACHE_PATH": str(workdir / "evaluation_cache.sqlite3"),
+        "JOB_DB_PATH": str(workdir / "jobs.sqlite3"),
+        "TRACE_DIR": "",
+        "WARMUP_ON_STARTUP": "0",
+    })
+    if not options.warm_cache:
+        os.environ["EVAL_CACHE_SIMILARITY"] = "2"  # no near-duplicate hits between variants
+    _enter(DAY10)
+    import httpx
+    import vector_index
+    from services import services
+    import app as api
+
+    embeddings = HashEmbeddings()
+    vector_index.initialize_vectorstore(embeddings)
+    # The fake replaces the Gemini client only, so calls still go through the LLM gateway
+    services.override(chat_model=FakeChatModel(latency=options.llm_latency, jitter=options.llm_jitter), embeddings=embeddings)
+    if not services.warm_up():
+        raise RuntimeError(f"Service warm-up failed: {services.warmup_error}")
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench", timeout=None)
+
+    async def call(i):
+        response = await client.post("/validate-idea", json={"startup_idea": idea_for(i, options)})
+        response.raise_for_status()
+    return call
+
+
+def day10_index(options):
+    """Full ``initialize_vectorstore`` build of the Day 10 datasets into an empty directory."""
+    workdir = Path(tempfile.mkdtemp(prefix="bench-index-"))
+    _enter(DAY10)
+    import vector_index
+    embeddings = HashEmbeddings()
+
+    def call(i):
+        # Whichever VECTOR_BACKEND is configured builds into a fresh directory
+        vector_index.PERSIST_DIRECTORY = str(workdir / f"rag_db_{i}")
+        vector_index.NUMPY_INDEX_DIR = str(workdir / f"numpy_index_{i}")
+        try:
+            vector_index.initialize_vectorstore(embeddings)
+        finally:
+            shutil.rmtree(vector_index.PERSIST_DIRECTORY, ignore_errors=True)
+            shutil.rmtree(vector_index.NUMPY_INDEX_DIR, ignore_errors=True)
+    return call
+
+
+def day9_graph(options):
+    """The compiled StateGraph from the Day 9 app, imported headless from a scratch working directory."""
+    workdir = Path(tempfile.mkdtemp(prefix="bench-day9-"))
+    datasets = workdir / "data" / "reference_datasets"
+    datasets.mkdir(parents=True)
+    for path in (DAY9 / "data" / "reference_datasets").glob("*.csv"):
+        os.symlink(path, datasets / path.name)
+    if not (datasets / "yc_companies.csv").exists():
+        # Not shipped with the repo; a few rows keep the YC store (and its retrieval) in the path
+        (datasets / "yc_companies.csv").write_text(
+            "name,batch,description\n" + "\n".join(f"{idea.split()[0]}Co,W2{i},{idea}" for i, idea in enumerate(IDEAS)) + "\n",
+            encoding="utf-8",
+        )
+    (workdir / ".streamlit").mkdir()
+    (workdir / ".streamlit" / "secrets.toml").write_text('GOOGLE_API_KEY = "bench"\n', encoding="utf-8")
+    os.environ.update({"TRACE_DIR": "", "GRAPH_MODE": os.getenv("GRAPH_MODE", "deterministic")})
+    if not options.warm_cache:
+        os.environ["NODE_CACHE_MAX_ENTRIES"] = "0"
+    _patch_gemini(options)
+    _enter(DAY9, workdir)
+    import app as day9
+
+    def call(i):
+        idea = idea_for(i, options)
+        if day9.GRAPH_MODE == "deterministic":
+            day9.app.invoke({"idea": idea})
+        else:
+            from langchain_core.messages import HumanMessage
+            day9.app.invoke({"messages": [HumanMessage(content=idea)]})
+    return call
+
+
+def day6_evaluate(options):
+    """``evaluate_marketability`` end to end, with Tavily served by the fake server."""
+    _fake_tavily_env(options)
+    os.environ["TRACE_DIR"] = ""
+    _patch_gemini(options)
+    _enter(DAY6)
+    from chains.evaluate_chain import evaluate_marketability
+
+    def call(i):
+        evaluate_marketability(idea_for(i, options))
+    return call
+
+
+# name -> (setup, serial): serial targets ignore --concurrency and run one call at a time
+SCENARIOS = {
+    "day10-api": (day10_api, False),
+    "day10-index": (day10_index, True),
+    "day9-graph": (day9_graph, False),
+    "day6-evaluate": (day6_evaluate, False),
+}
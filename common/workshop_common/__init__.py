@@ -0,0 +1,7 @@
+"""Infrastructure shared by the Day projects.
+
+Each module is imported by its own path, e.g.
+``from workshop_common.eval_cache import EvaluationCache``; nothing is
+re-exported here, so importing one module doesn't pull in the others'
+dependencies.
+"""
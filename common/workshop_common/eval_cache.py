@@ -0,0 +1,135 @@
+"""Persistent cache of whole idea evaluations.
+
+Lookups first try an exact match on the normalized idea text, then fall back
+to the nearest cached idea by embedding cosine similarity. Entries live in a
+local SQLite file with a TTL and are evicted least-recently-used once the
+cache grows past ``max_entries``.
+"""
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+
+def normalize_idea(idea):
+    """Lowercase, drop punctuation and collapse whitespace so trivial rewrites share a key."""
+    idea = re.sub(r"[^\w\s]", " ", idea.lower())
+    return " ".join(idea.split())
+
+
+class EvaluationCache:
+    def __init__(self, path, embed_fn=None, ttl_seconds=7 * 24 * 3600, max_entries=5000, similarity_threshold=0.95):
+        self.embed_fn = embed_fn
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS evaluations (
+                key TEXT PRIMARY KEY,
+                idea TEXT NOT NULL,
+                vector BLOB,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_last_access ON evaluations (last_access)")
+        self._conn.commit()
+        self._vectors = None  # (keys, unit-normalized matrix), rebuilt lazily after writes
+
+    @staticmethod
+    def key_for(idea):
+        return hashlib.sha256(normalize_idea(idea).encode("utf-8")).hexdigest()
+
+    def embed(self, idea):
+        if self.embed_fn is None:
+            return None
+        return np.asarray(self.embed_fn(normalize_idea(idea)), dtype=np.float32)
+
+    def get(self, idea, vector=None):
+        """Return the cached result for ``idea`` (or a near-duplicate), or None on a miss."""
+        now = time.time()
+        key = self.key_for(idea)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM evaluations WHERE key = ? AND created_at > ?", (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row:
+                self._touch(key, now)
+                self.counters["exact_hits"] += 1
+                return json.loads(row[0])
+        if vector is None:
+            vector = self.embed(idea)
+        if vector is not None:
+            with self._lock:
+                match = self._nearest(vector, now)
+                if match:
+                    self._touch(match[0], now)
+                    self.counters["semantic_hits"] += 1
+                    return json.loads(match[1])
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, idea, result, vector=None):
+        now = time.time()
+        if vector is None:
+            vector = self.embed(idea)
+        blob = np.asarray(vector, dtype=np.float32).tobytes() if vector is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evaluations (key, idea, vector, result, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key_for(idea), idea, blob, json.dumps(result), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+            self._vectors = None
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+            lookups = sum(v for k, v in self.counters.items() if k != "evictions")
+            hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+            return {**self.counters, "entries": entries, "hit_rate": hits / lookups if lookups else 0.0}
+
+    def _touch(self, key, now):
+        self._conn.execute("UPDATE evaluations SET last_access = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+
+    def _nearest(self, vector, now):
+        if self._vectors is None:
+            rows = self._conn.execute("SELECT key, vector FROM evaluations WHERE vector IS NOT NULL").fetchall()
+            if not rows:
+                return None
+            matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+            self._vectors = ([key for key, _ in rows], matrix)
+        keys, matrix = self._vectors
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) + 1e-12)
+        scores = matrix @ query
+        for i in np.argsort(-scores):
+            if scores[i] < self.similarity_threshold:
+                break
+            row = self._conn.execute(
+                "SELECT result FROM evaluations WHERE key = ? AND created_at > ?", (keys[i], now - self.ttl_seconds)
+            ).fetchone()
+            if row:
+                return keys[i], row[0]
+        return None
+
+    def _evict(self, now):
+        expired = self._conn.execute("DELETE FROM evaluations WHERE created_at <= ?", (now - self.ttl_seconds,)).rowcount
+        overflow = self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM evaluations WHERE key IN (SELECT key FROM evaluations ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+        self.counters["evictions"] += expired + max(overflow, 0)
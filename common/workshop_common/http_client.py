@@ -0,0 +1,304 @@
+"""Shared async HTTP layer for external market-signal sources (Tavily, DuckDuckGo, ...).
+
+One pooled ``httpx.AsyncClient`` with keep-alive serves every provider. Each
+call goes through:
+
+- a per-provider token-bucket rate limiter,
+- retries with jittered exponential backoff on 429/5xx and transport errors
+  (``Retry-After`` is honoured),
+- a TTL cache with request coalescing: concurrent identical queries share one
+  in-flight call.
+
+Async apps own a ``SignalsClient`` on their own loop. Apps without one
+(Streamlit, CLIs) share a client that lives on a single background event
+loop, so its pooled connections survive reruns: sync code calls
+``run_sync(coro)`` and async code awaits ``run_async(coro)``, with the client
+from ``get_client()``.
+
+For offline work, ``SIGNALS_FAKE=1`` answers every request in-process with
+deterministic canned data, and ``python -m workshop_common.http_client
+fake-server`` serves the same data over HTTP (point ``TAVILY_BASE_URL`` at it).
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+PROVIDERS = {
+    "tavily": {
+        "base_url": os.getenv("TAVILY_BASE_URL", "https://api.tavily.com"),
+        "rate_per_second": float(os.getenv("TAVILY_RATE_PER_SECOND", "5")),
+        "burst": int(os.getenv("TAVILY_BURST", "10")),
+    },
+    # DuckDuckGo goes through its SDK (see ``SignalsClient.call``), so only the limiter applies
+    "duckduckgo": {
+        "base_url": "",
+        "rate_per_second": float(os.getenv("DDG_RATE_PER_SECOND", "1")),
+        "burst": int(os.getenv("DDG_BURST", "3")),
+    },
+    # Google Trends via pytrends (also through ``call``); it answers bursts with 429s
+    "trends": {
+        "base_url": "",
+        "rate_per_second": float(os.getenv("TRENDS_RATE_PER_SECOND", "0.5")),
+        "burst": int(os.getenv("TRENDS_BURST", "2")),
+    },
+}
+
+
+class SignalError(Exception):
+    """An external signal source failed after all retries."""
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second, burst):
+        self.rate = rate_per_second
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class SignalsClient:
+    def __init__(self, transport=None, max_retries=3, backoff_base=0.5, backoff_cap=8.0, cache_size=1024, timeout=10.0):
+        if transport is None and os.getenv("SIGNALS_FAKE") == "1":
+            transport = httpx.MockTransport(fake_handler)
+        self.http = httpx.AsyncClient(
+            transport=transport,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30),
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight = {}
+        self._buckets = {name: TokenBucket(cfg["rate_per_second"], cfg["burst"]) for name, cfg in PROVIDERS.items()}
+        self.stats = {"requests": 0, "retries": 0, "cache_hits": 0, "coalesced": 0, "failures": 0}
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def request_json(self, provider, method, path, ttl=300, **kwargs):
+        """Rate-limited, retried, cached JSON request against a configured provider."""
+        url = PROVIDERS[provider]["base_url"].rstrip("/") + path
+        key = hashlib.sha256(json.dumps([provider, method, url, kwargs.get("params"), kwargs.get("json")], sort_keys=True).encode()).hexdigest()
+        return await self.cached(key, lambda: self._send(provider, method, url, **kwargs), ttl)
+
+    async def call(self, provider, key, fn, ttl=300, retry_on=()):
+        """Run any async callable (e.g. an SDK call in a thread) through the limiter and cache.
+
+        Exceptions listed in ``retry_on`` are retried with the same backoff as HTTP
+        requests; the last one is raised as SignalError.
+        """
+        async def limited():
+            bucket = self._buckets.get(provider)
+            for attempt in range(self.max_retries + 1):
+                if bucket:
+                    await bucket.acquire()
+                self.stats["requests"] += 1
+                try:
+                    return await fn()
+                except retry_on as e:
+                    error = e
+                if attempt == self.max_retries:
+                    break
+                delay = self._backoff(attempt)
+                self.stats["retries"] += 1
+                logger.info("%s call failed (%r); retry %d in %.2fs", provider, error, attempt + 1, delay)
+                await asyncio.sleep(delay)
+            self.stats["failures"] += 1
+            raise SignalError(f"{provider}: {error!r} after {self.max_retries + 1} attempts") from error
+        return await self.cached(f"{provider}:{key}", limited, ttl)
+
+    def _backoff(self, attempt):
+        return min(self.backoff_cap, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def cached(self, key, fetch, ttl):
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return entry[1]
+        if key in self._in_flight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._in_flight[key])
+        task = asyncio.ensure_future(fetch())
+        self._in_flight[key] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            self._in_flight.pop(key, None)
+        self._cache[key] = (time.monotonic() + ttl, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    async def _send(self, provider, method, url, **kwargs):
+        bucket = self._buckets.get(provider)
+        for attempt in range(self.max_retries + 1):
+            if bucket:
+                await bucket.acquire()
+            self.stats["requests"] += 1
+            retry_after = None
+            try:
+                response = await self.http.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("Retry-After")
+            except httpx.TransportError as e:
+                error = repr(e)
+            except httpx.HTTPStatusError as e:
+                self.stats["failures"] += 1
+                raise SignalError(f"{provider}: {e}") from e
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            self.stats["retries"] += 1
+            logger.info("%s request failed (%s); retry %d in %.2fs", provider, error, attempt + 1, delay)
+            await asyncio.sleep(delay)
+        self.stats["failures"] += 1
+        raise SignalError(f"{provider}: {error} after {self.max_retries + 1} attempts")
+
+
+async def tavily_search(client, query, max_results=5, api_key=None):
+    """Snippets from a Tavily web search."""
+    data = await client.request_json(
+        "tavily", "POST", "/search",
+        headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
+        json={"query": query, "max_results": max_results},
+    )
+    return [r.get("content") or r.get("snippet", "") for r in data.get("results", [])]
+
+
+# --- One long-lived loop for a shared client ---
+_loop = None
+_client = None
+_loop_lock = threading.Lock()
+
+
+def _client_loop():
+    global _loop, _client
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="signals-loop", daemon=True).start()
+            _client = asyncio.run_coroutine_threadsafe(_make_client(), _loop).result()
+    return _loop
+
+
+async def _make_client():
+    return SignalsClient()
+
+
+def get_client():
+    _client_loop()
+    return _client
+
+
+def run_sync(coro):
+    """Run a coroutine that uses the shared client from synchronous code."""
+    return asyncio.run_coroutine_threadsafe(coro, _client_loop()).result()
+
+
+async def run_async(coro):
+    """Await a coroutine that uses the shared client from any other event loop."""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _client_loop()))
+
+
+# --- Offline fake provider ---
+def fake_tavily_response(query, max_results=5):
+    """Deterministic, plausible-looking search results derived from the query text."""
+    seed = int(hashlib.sha256(query.encode()).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    cities = ["Bengaluru", "Mumbai", "Delhi NCR", "Hyderabad", "Pune", "Chennai"]
+    rounds = ["Seed", "Pre-Series A", "Series A", "Series B"]
+    results = []
+    for i in range(max_results):
+        amount = rng.choice([1, 2, 5, 8, 12, 20, 35])
+        results.append({
+            "title": f"{query} - result {i + 1}",
+            "url": f"https://example.com/{seed}/{i}",
+            "content": f"A {rng.choice(cities)} startup working on {query} raised ${amount}M in a {rng.choice(rounds)} round in {rng.choice([2022, 2023, 2024, 2025])}.",
+            "score": round(1 - i * 0.1, 2),
+        })
+    return {"query": query, "results": results}
+
+
+def fake_handler(request):
+    """httpx.MockTransport handler implementing the fake provider in-process."""
+    if request.url.path == "/search":
+        body = json.loads(request.content or b"{}")
+        return httpx.Response(200, json=fake_tavily_response(body.get("query", ""), int(body.get("max_results", 5))))
+    return httpx.Response(404, json={"error": "not found"})
+
+
+class FakeSignalsHTTPHandler(BaseHTTPRequestHandler):
+    latency = 0.0  # seconds to wait before each reply
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path != "/search":
+            self.send_error(404)
+            return
+        time.sleep(self.latency)
+        payload = json.dumps(fake_tavily_response(body.get("query", ""), int(body.get("max_results", 5)))).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fake(port=8765, latency=0.0):
+    """Local fake server (``port=0`` picks a free one); call ``serve_forever()`` on the result (in a thread if needed)."""
+    handler = type("FakeSignalsHTTPHandler", (FakeSignalsHTTPHandler,), {"latency": latency})
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Market-signal HTTP utilities.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    fake = subparsers.add_parser("fake-server", help="Serve deterministic fake Tavily responses locally.")
+    fake.add_argument("--port", type=int, default=8765)
+    fake.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each reply")
+    args = parser.parse_args()
+    if args.command == "fake-server":
+        server = serve_fake(args.port, args.latency)
+        print(f"Fake signals server on http://127.0.0.1:{args.port} (set TAVILY_BASE_URL to use it)")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
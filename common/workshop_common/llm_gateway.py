@@ -0,0 +1,396 @@
+"""One process-wide gateway for every chat-model call.
+
+``wrap(model)`` returns a LangChain chat model that sends each call through
+the shared ``LLMGateway``. Chains, structured output and tool binding keep
+working unchanged. Per call, the gateway:
+
+- coalesces identical prompts already in flight (same model, messages and
+  call options) into one request;
+- reserves an estimate of the call's tokens against a tokens-per-minute
+  budget (``LLM_TOKENS_PER_MINUTE``, 0 = unlimited) and settles it with the
+  real usage afterwards;
+- waits for a slot under the global limit (``LLM_MAX_CONCURRENCY``) and the
+  per-model limit (``LLM_MODEL_CONCURRENCY``);
+- sends a hedged duplicate once the call has run past the model's observed
+  p95 latency, and keeps whichever reply lands first. Hedges only use spare
+  slots, so they never add load when the limits are saturated. A failed
+  attempt is retried the same way while attempts remain
+  (``LLM_MAX_ATTEMPTS``);
+- gives up after an adaptive timeout: ``LLM_TIMEOUT_MULTIPLIER`` × the
+  observed p99, clamped to ``LLM_MIN_TIMEOUT_SECONDS`` and
+  ``LLM_MAX_TIMEOUT_SECONDS``.
+
+Hedging and the adaptive timeout start once ``LATENCY_MIN_SAMPLES`` calls
+have been observed. Until then, calls are not hedged and time out at the
+maximum.
+
+Calls run on the gateway's own event loop thread. Sync callers (threads,
+Streamlit) and async callers on any loop therefore share the same limits.
+Streaming calls take a slot and budget but are neither coalesced nor hedged.
+The limits are per process; with several workers, divide the quota between
+them. ``LLM_GATEWAY=0`` makes ``wrap`` return the model unchanged.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Any
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.runnables import RunnableBinding, RunnableSequence
+
+LLM_GATEWAY = os.getenv("LLM_GATEWAY", "1") == "1"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MODEL_CONCURRENCY = int(os.getenv("LLM_MODEL_CONCURRENCY", "8"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "512"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "2"))  # first call plus hedges/retries
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_TIMEOUT_MULTIPLIER = float(os.getenv("LLM_TIMEOUT_MULTIPLIER", "3"))
+LLM_MIN_TIMEOUT_SECONDS = float(os.getenv("LLM_MIN_TIMEOUT_SECONDS", "5"))
+LLM_MAX_TIMEOUT_SECONDS = float(os.getenv("LLM_MAX_TIMEOUT_SECONDS", "120"))
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = int(os.getenv("LATENCY_MIN_SAMPLES", "20"))
+BUDGET_WINDOW_SECONDS = 60
+
+
+class LLMTimeout(TimeoutError):
+    pass
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies for one model"""
+
+    def __init__(self, window=LATENCY_WINDOW, min_samples=LATENCY_MIN_SAMPLES):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+
+    def quantile(self, q):
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self, q=LLM_HEDGE_QUANTILE):
+        return self.quantile(q)
+
+    def timeout(self):
+        p99 = self.quantile(0.99)
+        if p99 is None:
+            return LLM_MAX_TIMEOUT_SECONDS
+        return min(LLM_MAX_TIMEOUT_SECONDS, max(LLM_MIN_TIMEOUT_SECONDS, p99 * LLM_TIMEOUT_MULTIPLIER))
+
+
+class TokenBudget:
+    """Sliding one-minute window of reserved tokens; ``acquire`` waits until a reservation fits"""
+
+    def __init__(self, tokens_per_minute):
+        self.limit = tokens_per_minute
+        self.reservations = deque()  # [reserved_at, tokens]
+
+    def used(self, now):
+        while self.reservations and self.reservations[0][0] <= now - BUDGET_WINDOW_SECONDS:
+            self.reservations.popleft()
+        return sum(tokens for _, tokens in self.reservations)
+
+    async def acquire(self, tokens):
+        if not self.limit:
+            return None
+        tokens = min(tokens, self.limit)  # an oversized call still goes through once the window is empty
+        while True:
+            now = time.monotonic()
+            if self.used(now) + tokens <= self.limit:
+                reservation = [now, tokens]
+                self.reservations.append(reservation)
+                return reservation
+            await asyncio.sleep(self.reservations[0][0] + BUDGET_WINDOW_SECONDS - now)
+
+    @staticmethod
+    def settle(reservation, tokens):
+        if reservation is not None and tokens:
+            reservation[1] = tokens
+
+
+def estimate_tokens(messages):
+    return sum(len(str(message.content)) for message in messages) // 4 + LLM_COMPLETION_TOKEN_ESTIMATE
+
+
+def usage_tokens(result):
+    """Total tokens reported for a ChatResult, or None if the model didn't say"""
+    for generation in result.generations:
+        usage = getattr(generation.message, "usage_metadata", None)
+        if usage:
+            return usage.get("total_tokens")
+    return None
+
+
+def call_key(model_name, messages, stop, kwargs):
+    payload = json.dumps([model_name, [(message.type, message.content) for message in messages], stop, kwargs],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, model_concurrency=LLM_MODEL_CONCURRENCY,
+                 tokens_per_minute=LLM_TOKENS_PER_MINUTE, max_attempts=LLM_MAX_ATTEMPTS, metrics=None):
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency
+        self.budget = TokenBudget(tokens_per_minute)
+        self.max_attempts = max_attempts
+        self.metrics = metrics  # telemetry.Metrics, if the app exports them
+        self.latency = defaultdict(LatencyTracker)
+        self.counts = defaultdict(int)
+        self._global = None
+        self._per_model = {}
+        self._inflight = {}
+        self._loop = None
+        self._lock = threading.Lock()
+
+    # --- Event loop ---
+    def _event_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-gateway", daemon=True).start()
+                self._loop = loop
+        return self._loop
+
+    def run(self, coro):
+        """Run ``coro`` on the gateway loop and block for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._event_loop()).result()
+
+    async def arun(self, coro):
+        """Await ``coro`` on the gateway loop from any other loop"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._event_loop()))
+
+    # --- Bookkeeping (gateway loop only) ---
+    def _count(self, name, **labels):
+        self.counts[(name, *sorted(labels.items()))] += 1
+        if self.metrics is not None:
+            self.metrics.inc(f"llm_{name}_total", help=f"LLM gateway {name.replace('_', ' ')}.", **labels)
+
+    def _observe(self, name, seconds, **labels):
+        if self.metrics is not None:
+            self.metrics.observe(f"llm_{name}_seconds", seconds, help=f"LLM gateway {name.replace('_', ' ')} time.", **labels)
+
+    def _semaphores(self, model):
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        if model not in self._per_model:
+            self._per_model[model] = asyncio.Semaphore(self.model_concurrency)
+        return self._global, self._per_model[model]
+
+    @asynccontextmanager
+    async def _slot(self, model, tokens):
+        started = time.monotonic()
+        reservation = await self.budget.acquire(tokens)
+        global_slot, model_slot = self._semaphores(model)
+        async with global_slot, model_slot:
+            self._observe("wait", time.monotonic() - started, model=model)
+            yield reservation
+
+    # --- Calls ---
+    async def _attempt(self, model, call):
+        started = time.monotonic()
+        result = await call()
+        self.latency[model].observe(time.monotonic() - started)
+        return result
+
+    async def _spare_slot(self, model):
+        """Take a global and a model slot only if both are free right now"""
+        global_slot, model_slot = self._semaphores(model)
+        if global_slot.locked() or model_slot.locked():
+            return False
+        # Neither semaphore is locked, so both acquires return without suspending
+        await global_slot.acquire()
+        await model_slot.acquire()
+        return True
+
+    async def _hedged(self, model, call):
+        tracker = self.latency[model]
+        deadline = time.monotonic() + tracker.timeout()
+        pending, hedges, attempts, error = set(), 0, 0, None
+        next_hedge = None
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    self._count("calls", model=model, outcome="timeout")
+                    raise LLMTimeout(f"{model} did not answer within {tracker.timeout():.1f}s")
+                if attempts < self.max_attempts and (not pending or (next_hedge is not None and now >= next_hedge)):
+                    if pending and not await self._spare_slot(model):
+                        next_hedge = None  # saturated: let the running attempt finish alone
+                    else:
+                        if pending:
+                            hedges += 1
+                            self._count("hedges", model=model)
+                        pending.add(asyncio.ensure_future(self._attempt(model, call)))
+                        attempts += 1
+                        delay = tracker.hedge_delay()
+                        next_hedge = None if delay is None else now + delay
+                wake = deadline if next_hedge is None else min(deadline, next_hedge)
+                done, pending = await asyncio.wait(pending, timeout=wake - now, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._count("calls", model=model, outcome="ok")
+                        return task.result()
+                    error = task.exception()
+                if not pending and attempts >= self.max_attempts:
+                    self._count("calls", model=model, outcome="error")
+                    raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            global_slot, model_slot = self._semaphores(model)
+            for _ in range(hedges):
+                global_slot.release()
+                model_slot.release()
+
+    async def _generate(self, model, messages, call):
+        started = time.monotonic()
+        async with self._slot(model, estimate_tokens(messages)) as reservation:
+            result = await self._hedged(model, call)
+        TokenBudget.settle(reservation, usage_tokens(result))
+        self._observe("call", time.monotonic() - started, model=model)
+        return result
+
+    async def generate(self, model, messages, call, key=None):
+        """``call()`` (a coroutine function returning a ChatResult) under the gateway's limits; runs on the gateway loop"""
+        task = self._inflight.get(key) if key is not None else None
+        if task is not None:
+            self._count("coalesced", model=model)
+        else:
+            task = asyncio.ensure_future(self._generate(model, messages, call))
+            task.waiters = 0
+            if key is not None:
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        task.waiters += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Only stop the call once every caller sharing it has given up
+            if task.waiters == 1:
+                task.cancel()
+            raise
+        finally:
+            task.waiters -= 1
+
+    async def stream(self, model, messages, chunks):
+        """Relay ``chunks`` (an async iterator factory) from the gateway loop to the calling loop"""
+        caller = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async with self._slot(model, estimate_tokens(messages)):
+                    async for chunk in chunks():
+                        caller.call_soon_threadsafe(queue.put_nowait, chunk)
+            finally:
+                caller.call_soon_threadsafe(queue.put_nowait, done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._event_loop())
+        try:
+            while (chunk := await queue.get()) is not done:
+                yield chunk
+            await asyncio.wrap_future(future)  # re-raise a failure from the stream without blocking this loop
+        finally:
+            future.cancel()
+
+    def stats(self):
+        return {
+            "counts": {name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}": count
+                       for (name, *labels), count in sorted(self.counts.items())},
+            "hedge_delay": {model: tracker.hedge_delay() for model, tracker in self.latency.items()},
+            "timeout": {model: tracker.timeout() for model, tracker in self.latency.items()},
+            "inflight": len(self._inflight),
+        }
+
+
+class GatewayChatModel(BaseChatModel):
+    """Chat model that forwards every call to ``inner`` through an ``LLMGateway``"""
+
+    inner: BaseChatModel
+    gateway: Any = None
+
+    @property
+    def _llm_type(self):
+        return f"gateway-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self):
+        # Keeps LLM cache keys distinct per inner model and settings
+        return self.inner._identifying_params
+
+    @property
+    def model_key(self):
+        return str(getattr(self.inner, "model", None) or getattr(self.inner, "model_name", None) or self.inner._llm_type)
+
+    def _call(self, messages, stop, kwargs):
+        async def call():
+            return await self.inner._agenerate(messages, stop=stop, **kwargs)
+        key = call_key(self.model_key, messages, stop, kwargs)
+        return self.gateway.generate(self.model_key, messages, call, key)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return self.gateway.run(self._call(messages, stop, kwargs))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await self.gateway.arun(self._call(messages, stop, kwargs))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        # inner.astream falls back to a single chunk for models that can't stream
+        chunks = lambda: self.inner.astream(messages, stop=stop, **kwargs)
+        async for chunk in self.gateway.stream(self.model_key, messages, chunks):
+            if not isinstance(chunk, BaseMessageChunk):
+                chunk = AIMessageChunk(content=chunk.content, usage_metadata=getattr(chunk, "usage_metadata", None))
+            yield ChatGenerationChunk(message=chunk)
+
+    def bind_tools(self, tools, **kwargs):
+        # The inner model formats the tools; the bound call still goes through the gateway
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    def with_structured_output(self, schema, **kwargs):
+        """The inner model's structured-output chain, with its model step routed through the gateway"""
+        chain = self.inner.with_structured_output(schema, **kwargs)
+        steps = chain.steps if isinstance(chain, RunnableSequence) else [chain]
+        if steps[0] is self.inner:
+            head = self
+        elif isinstance(steps[0], RunnableBinding) and steps[0].bound is self.inner:
+            head = self.bind(**steps[0].kwargs)
+        else:
+            return chain  # a shape we don't recognise: keep the model's own chain, outside the gateway
+        return RunnableSequence(head, *steps[1:]) if len(steps) > 1 else head
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+    return _gateway
+
+
+def wrap(model, callbacks=None, metrics=None):
+    """``model`` behind the shared gateway, with ``callbacks`` (e.g. telemetry) on the wrapper"""
+    if not LLM_GATEWAY:
+        if callbacks:
+            model.callbacks = callbacks
+        return model
+    gateway = get_gateway()
+    if metrics is not None:
+        gateway.metrics = metrics
+    return GatewayChatModel(inner=model, gateway=gateway, callbacks=callbacks)
@@ -0,0 +1,163 @@
+"""Local idea parsing: domain by nearest centroid, theme by keyword extraction.
+
+The industry/domain labels already in the reference datasets are the
+classes. Each dataset row is embedded as a TF-IDF vector of its words, and
+each label's centroid is the normalised mean of its rows. A new idea gets
+the label whose centroid has the highest cosine similarity. Spelling
+variants of a label ("E-Commerce", "eCommerce") share one class. IDF is
+computed across labels, so words that single out a domain weigh most.
+
+An idea's similarity to a centroid counts all of its words: content words
+the datasets never use weigh as much as the rarest known word and match no
+label, so an idea that only shares a generic word ("tech") with a label
+scores low. A local result is used only when both the best similarity
+reaches ``LOCAL_PARSE_MIN_SIMILARITY`` and its margin over the runner-up
+(the confidence) reaches ``LOCAL_PARSE_MIN_CONFIDENCE``. Otherwise callers
+fall back to the LLM. Theme keywords are the idea's highest
+IDF phrases, i.e. runs of words between stopwords and punctuation (as in
+RAKE). Everything runs in-process with NumPy, in a few milliseconds.
+"""
+import os
+import re
+import csv
+import json
+import math
+import logging
+from collections import Counter, defaultdict
+import numpy as np
+
+LOCAL_PARSE_MIN_SIMILARITY = float(os.getenv("LOCAL_PARSE_MIN_SIMILARITY", "0.3"))
+LOCAL_PARSE_MIN_CONFIDENCE = float(os.getenv("LOCAL_PARSE_MIN_CONFIDENCE", "0.1"))
+THEME_KEYWORDS = 3
+MAX_PHRASE_WORDS = 3
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and app apps are as at based be by can for from has have help helps in into is it its of on or our platform
+powered service services solution solutions startup that the their them they this to using via which who with
+within without your you
+""".split())
+logger = logging.getLogger(__name__)
+
+
+def words(text):
+    return WORD_PATTERN.findall(str(text).lower())
+
+
+def label_key(label):
+    return re.sub(r"[^a-z0-9]", "", str(label).lower())
+
+
+def read_records(path):
+    """Rows of a JSON list or CSV file as dicts; CSV exports that quote every whole line are unwrapped"""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        lines = [line for line in csv.reader(f) if line]
+    if lines and len(lines[0]) == 1 and "," in lines[0][0]:
+        lines = [next(csv.reader([line[0]])) for line in lines]
+    return [dict(zip(lines[0], values)) for values in lines[1:]] if lines else []
+
+
+class LocalIdeaParser:
+    def __init__(self, examples, min_label_rows=1):
+        """``examples``: (label, text) pairs; a label's own name counts as part of its text.
+
+        Labels with fewer than ``min_label_rows`` rows are dropped: in long-tailed
+        exports, one-off labels otherwise win on a single shared word.
+        """
+        rows_by_label, spellings = defaultdict(list), defaultdict(Counter)
+        for label, text in examples:
+            key = label_key(label)
+            if key:
+                spellings[key][str(label).strip()] += 1
+                rows_by_label[key].append(Counter(words(f"{label} {text}")))
+        rows_by_label = {key: rows for key, rows in rows_by_label.items() if len(rows) >= min_label_rows}
+        self.labels = [spellings[key].most_common(1)[0][0] for key in rows_by_label]
+        document_frequency = Counter(word for rows in rows_by_label.values() for word in set().union(*rows))
+        self.vocabulary = {word: i for i, word in enumerate(document_frequency)}
+        self.idf = np.array([math.log((1 + len(rows_by_label)) / (1 + document_frequency[word])) + 1 for word in self.vocabulary],
+                            dtype=np.float32)
+        self.max_idf = float(self.idf.max()) if len(self.idf) else 1.0
+        self.centroids = np.zeros((len(self.labels), len(self.vocabulary)), dtype=np.float32)
+        for i, rows in enumerate(rows_by_label.values()):
+            for counts in rows:
+                self.centroids[i] += self.embed_counts(counts)
+        norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        self.centroids /= np.where(norms == 0, 1, norms)
+
+    @classmethod
+    def from_datasets(cls, sources, min_label_rows=1):
+        """``sources``: (path, label field, text fields) per dataset; missing files are skipped"""
+        examples = []
+        for path, label_field, text_fields in sources:
+            if not os.path.exists(path):
+                logger.warning("Dataset %s not found; its labels are left out of local parsing", path)
+                continue
+            for record in read_records(path):
+                label = str(record.get(label_field) or "").strip()
+                if label:
+                    examples.append((label, " ".join(str(record.get(field) or "") for field in text_fields)))
+        return cls(examples, min_label_rows)
+
+    def embed_counts(self, counts):
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for word, count in counts.items():
+            if word in self.vocabulary:
+                vector[self.vocabulary[word]] = 1 + math.log(count)
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def similarities(self, text):
+        """Cosine similarity of ``text`` to each centroid, with unknown content words left in the norm"""
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        unknown = 0.0
+        for word, count in Counter(words(text)).items():
+            if word in self.vocabulary:
+                vector[self.vocabulary[word]] = 1 + math.log(count)
+            elif word not in STOPWORDS:
+                unknown += ((1 + math.log(count)) * self.max_idf) ** 2
+        vector *= self.idf
+        norm = math.sqrt(float(vector @ vector) + unknown)
+        return self.centroids @ vector / norm if norm else self.centroids @ vector
+
+    def classify(self, text):
+        """(label, similarity, confidence); ("", 0.0, 0.0) when the text shares no words with any label"""
+        if not len(self.labels):
+            return "", 0.0, 0.0
+        scores = self.similarities(text)
+        order = np.argsort(scores)[::-1][:2]
+        best = float(scores[order[0]])
+        if best <= 0:
+            return "", 0.0, 0.0
+        runner_up = float(scores[order[1]]) if len(order) > 1 else 0.0
+        return self.labels[order[0]], best, best - runner_up
+
+    def keywords(self, text, limit=THEME_KEYWORDS):
+        """The idea's most distinctive phrases; words the datasets never use count as most distinctive"""
+        phrases = []
+        for chunk in re.split(r"[^\w\s'-]", str(text).lower()):
+            phrase = []
+            for word in words(chunk) + [None]:
+                if word is None or word in STOPWORDS or len(phrase) == MAX_PHRASE_WORDS:
+                    if phrase:
+                        phrases.append(" ".join(phrase))
+                    phrase = [] if word is None or word in STOPWORDS else [word]
+                else:
+                    phrase.append(word)
+        scored = {}
+        for phrase in phrases:
+            score = sum(self.idf[self.vocabulary[word]] if word in self.vocabulary else self.max_idf for word in phrase.split())
+            scored.setdefault(phrase, score)
+        return sorted(scored, key=scored.get, reverse=True)[:limit]
+
+    def parse(self, text):
+        """``{"domain", "theme", "keywords", "similarity", "confidence"}`` for an idea"""
+        domain, similarity, confidence = self.classify(text)
+        keywords = self.keywords(text)
+        return {"domain": domain, "theme": ", ".join(keywords), "keywords": keywords,
+                "similarity": round(similarity, 3), "confidence": round(confidence, 3)}
+
+    def confident(self, parsed, min_similarity=LOCAL_PARSE_MIN_SIMILARITY, min_confidence=LOCAL_PARSE_MIN_CONFIDENCE):
+        return bool(parsed["domain"]) and parsed["similarity"] >= min_similarity and parsed["confidence"] >= min_confidence
@@ -0,0 +1,231 @@
+"""Memory-mapped NumPy vector store for small reference corpora.
+
+The index is a directory:
+
+- ``vectors.npy``: unit-normalised embeddings, float16 by default, opened with
+  ``mmap_mode="r"``. Every worker process maps the same file, so the pages
+  are shared through the OS page cache instead of being copied per process.
+- ``documents.jsonl``: one ``[id, page_content, metadata]`` line per row, in
+  the same order as the vectors.
+- ``ivf.npz`` (optional): k-means centroids plus list offsets. Rows are stored
+  sorted by list, so each inverted list is one contiguous slice of the map.
+
+Exact search is one matrix-vector product over the rows that pass the
+metadata filter. IVF search scores the ``nprobe`` closest lists instead. If
+too few rows in those lists pass the filter, it falls back to an exact scan.
+Filters use Chroma's ``where`` syntax (``{"field": value}``, ``$in``,
+``$nin``, ``$eq``, ``$ne``, ``$and``, ``$or``), so ``HybridRetriever`` and
+``as_retriever(...)`` work unchanged.
+
+``add_texts`` embeds only the new texts and rewrites the index with them
+(rows with an existing id are replaced), through the same atomic rename as
+``build``. A rewrite costs time proportional to the whole index, so add rows
+in batches rather than one at a time.
+"""
+import os
+import json
+import uuid
+import shutil
+import tempfile
+from pathlib import Path
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+NUMPY_INDEX_DTYPE = os.getenv("NUMPY_INDEX_DTYPE", "float16")
+NUMPY_INDEX_IVF_LISTS = int(os.getenv("NUMPY_INDEX_IVF_LISTS", "0"))  # 0 = exact search only
+NUMPY_INDEX_NPROBE = int(os.getenv("NUMPY_INDEX_NPROBE", "4"))
+SCAN_CHUNK_ROWS = 4096  # rows upcast to float32 at a time
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def kmeans(vectors, lists, iterations=20, seed=0):
+    """Spherical k-means; returns (centroids, assignment per row)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=lists, replace=False)]
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        for i in range(lists):
+            members = vectors[assignment == i]
+            if len(members):
+                centroids[i] = members.sum(axis=0)
+        centroids = normalize(centroids)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+def _column_mask(values, condition):
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    mask = np.ones(len(values), dtype=bool)
+    for operator, expected in condition.items():
+        if operator == "$eq":
+            mask &= values == expected
+        elif operator == "$ne":
+            mask &= values != expected
+        elif operator == "$in":
+            mask &= np.isin(values, list(expected))
+        elif operator == "$nin":
+            mask &= ~np.isin(values, list(expected))
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+    return mask
+
+
+class NumpyVectorStore(VectorStore):
+    def __init__(self, directory, embedding=None, nprobe=NUMPY_INDEX_NPROBE):
+        self.directory = Path(directory)
+        self.embedding = embedding
+        self.nprobe = nprobe
+        self._vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+        self.ids, self.documents = [], []
+        with open(self.directory / "documents.jsonl", encoding="utf-8") as file:
+            for line in file:
+                row_id, content, metadata = json.loads(line)
+                self.ids.append(row_id)
+                self.documents.append(Document(page_content=content, metadata=metadata))
+        self._columns = {}  # metadata field -> object array, built on first filter
+        self.centroids = self.offsets = None
+        if (self.directory / "ivf.npz").exists():
+            with np.load(self.directory / "ivf.npz") as ivf:
+                self.centroids, self.offsets = ivf["centroids"], ivf["offsets"]
+
+    @staticmethod
+    def exists(directory):
+        return (Path(directory) / "vectors.npy").exists()
+
+    @classmethod
+    def build(cls, directory, ids, vectors, documents, embedding=None, ivf_lists=NUMPY_INDEX_IVF_LISTS, dtype=NUMPY_INDEX_DTYPE):
+        """Write a new index to ``directory``, replacing any existing one in a single rename."""
+        vectors = normalize(vectors)
+        order = np.arange(len(ids))
+        ivf = None
+        if ivf_lists and len(ids) > ivf_lists:
+            centroids, assignment = kmeans(vectors, ivf_lists)
+            order = np.argsort(assignment, kind="stable")
+            offsets = np.searchsorted(assignment[order], np.arange(ivf_lists + 1))
+            ivf = {"centroids": centroids, "offsets": offsets}
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=directory.name + ".", dir=directory.parent))
+        np.save(staging / "vectors.npy", vectors[order].astype(dtype))
+        with open(staging / "documents.jsonl", "w", encoding="utf-8") as file:
+            for i in order:
+                file.write(json.dumps([ids[i], documents[i].page_content, documents[i].metadata], ensure_ascii=False) + "\n")
+        if ivf:
+            np.savez(staging / "ivf.npz", **ivf)
+        if directory.exists():
+            # Readers that already mapped the old files keep them until they reopen
+            retired = directory.with_name(directory.name + ".old")
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(directory, retired)
+            os.replace(staging, directory)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(staging, directory)
+        return cls(directory, embedding)
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, directory="numpy_index", **kwargs):
+        texts = list(texts)
+        documents = [Document(page_content=text, metadata=(metadatas or [{}] * len(texts))[i]) for i, text in enumerate(texts)]
+        return cls.build(directory, ids or [str(i) for i in range(len(texts))], embedding.embed_documents(texts), documents, embedding, **kwargs)
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def vectors_by_id(self):
+        """id -> stored vector (float32), so a rebuild can skip rows that haven't changed."""
+        return {row_id: np.asarray(self._vectors[i], dtype=np.float32) for i, row_id in enumerate(self.ids)}
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        """Embed ``texts`` and rewrite the index with them appended; returns their ids."""
+        texts = list(texts)
+        if not texts:
+            return []
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        added = {
+            row_id: (vector, Document(page_content=text, metadata=(metadatas or [{}] * len(texts))[i]))
+            for i, (row_id, text, vector) in enumerate(zip(ids, texts, self.embedding.embed_documents(texts)))
+        }
+        kept = [i for i, row_id in enumerate(self.ids) if row_id not in added]
+        vectors = np.asarray([vector for vector, _ in added.values()], dtype=np.float32)
+        if kept:
+            vectors = np.concatenate([np.asarray(self._vectors[kept], dtype=np.float32), vectors])
+        rebuilt = self.build(
+            self.directory,
+            [self.ids[i] for i in kept] + list(added),
+            vectors,
+            [self.documents[i] for i in kept] + [document for _, document in added.values()],
+            self.embedding,
+            ivf_lists=0 if self.centroids is None else len(self.centroids),
+            dtype=self._vectors.dtype,
+        )
+        self.__dict__.update(rebuilt.__dict__, nprobe=self.nprobe)
+        return ids
+
+    # --- Search ---
+    def _filter_mask(self, where):
+        if not where:
+            return None
+        if "$and" in where:
+            return np.logical_and.reduce([self._filter_mask(clause) for clause in where["$and"]])
+        if "$or" in where:
+            return np.logical_or.reduce([self._filter_mask(clause) for clause in where["$or"]])
+        mask = np.ones(len(self.ids), dtype=bool)
+        for field, condition in where.items():
+            if field not in self._columns:
+                self._columns[field] = np.array([document.metadata.get(field) for document in self.documents], dtype=object)
+            mask &= _column_mask(self._columns[field], condition)
+        return mask
+
+    def _scores(self, rows, query):
+        if rows is None:
+            rows = np.arange(len(self.ids))
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), SCAN_CHUNK_ROWS):
+            chunk = rows[start:start + SCAN_CHUNK_ROWS]
+            # Contiguous row ranges read straight from the map; fancy indexing would copy twice
+            block = self._vectors[chunk[0]:chunk[-1] + 1] if chunk[-1] - chunk[0] + 1 == len(chunk) else self._vectors[chunk]
+            scores[start:start + len(chunk)] = np.asarray(block, dtype=np.float32) @ query
+        return rows, scores
+
+    def _candidate_rows(self, query, mask, k):
+        if self.centroids is None:
+            return None if mask is None else np.flatnonzero(mask)
+        lists = np.argsort(self.centroids @ query)[::-1][:self.nprobe]
+        rows = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists])
+        if mask is not None:
+            rows = rows[mask[rows]]
+            if len(rows) < k:
+                return np.flatnonzero(mask)  # the filter is too selective for the probed lists
+        return np.sort(rows)
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None):
+        if not self.ids:
+            return []
+        query = normalize(embedding)
+        rows, scores = self._scores(self._candidate_rows(query, self._filter_mask(filter), k), query)
+        if len(rows) == 0:
+            return []
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.documents[rows[i]], float(scores[i])) for i in top]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        return [document for document, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        return [document for document, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1) / 2
@@ -0,0 +1,122 @@
+"""In-memory reference datasets (JSON lists of records) with inverted trigram indexes.
+
+Each file is parsed once per process and shared by every caller through
+``get_store(path, fields)``. For each indexed field, every lower-cased
+three-character sequence maps to the sorted row numbers that contain it.
+A field can only contain the query if it contains all of the query's
+trigrams, so a lookup intersects those posting lists, smallest first, and
+runs the plain ``query in field`` check on the survivors only. Results are
+exactly those of a substring scan ("tech" still matches "fintech"), at a
+cost that follows the candidates rather than the whole file. Queries under
+three characters have no trigrams and fall back to the scan.
+
+Before each lookup the store compares the file's mtime and size with the
+loaded copy. When the file has changed, it rebuilds the indexes and swaps
+them in whole, so readers never see a half-built index.
+"""
+import os
+import json
+import itertools
+import threading
+from collections import defaultdict
+import numpy as np
+
+GRAM = 3
+
+
+def trigrams(text):
+    """Distinct ``GRAM``-character substrings of already lower-cased ``text``, in first-seen order"""
+    return dict.fromkeys(text[i:i + GRAM] for i in range(len(text) - GRAM + 1))
+
+
+def _intersect(candidates, sorted_rows):
+    """The ``candidates`` also in ``sorted_rows``, by binary search, so the cost follows the shorter array"""
+    positions = np.minimum(np.searchsorted(sorted_rows, candidates), len(sorted_rows) - 1)
+    return candidates[sorted_rows[positions] == candidates]
+
+
+class _Snapshot:
+    """One parsed version of the file: records, their lower-cased fields and the per-field indexes"""
+
+    def __init__(self, signature, records, fields):
+        self.signature = signature
+        self.records = records
+        self.texts = {field: [str(record.get(field, "")).lower() for record in records] for field in fields}
+        self.index = {}
+        for field, texts in self.texts.items():
+            postings = defaultdict(list)
+            for row, text in enumerate(texts):
+                for gram in trigrams(text):
+                    postings[gram].append(row)
+            self.index[field] = {gram: np.array(rows, dtype=np.int64) for gram, rows in postings.items()}
+
+
+class ReferenceStore:
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = tuple(fields)
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _signature(self):
+        stat = os.stat(self.path)  # FileNotFoundError if the dataset is missing, as open() would raise
+        return stat.st_mtime_ns, stat.st_size
+
+    def snapshot(self):
+        """The loaded file, reloading it first if it changed on disk"""
+        signature = self._signature()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.signature != signature:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.signature != signature:
+                    with open(self.path, encoding="utf-8") as f:
+                        records = json.load(f)
+                    snapshot = self._snapshot = _Snapshot(signature, records, self.fields)
+        return snapshot
+
+    def records(self):
+        return self.snapshot().records
+
+    def lookup(self, field, query, limit=None):
+        """Records whose ``field`` contains ``query`` (case-insensitive), in file order.
+
+        Same results as ``query.lower() in str(record[field]).lower()`` over
+        every record; an empty query matches them all.
+        """
+        snapshot = self.snapshot()
+        query = str(query).lower()
+        texts = snapshot.texts[field]
+        grams = trigrams(query)
+        if not grams:
+            candidates = range(len(texts))
+        else:
+            index = snapshot.index[field]
+            if any(gram not in index for gram in grams):
+                return []
+            postings = sorted((index[gram] for gram in grams), key=len)
+            candidates = postings[0]
+            for other in postings[1:]:
+                candidates = _intersect(candidates, other)
+            candidates = candidates.tolist()
+        rows = (row for row in candidates if query in texts[row])
+        if limit is not None:
+            rows = itertools.islice(rows, limit)
+        return [snapshot.records[row] for row in rows]
+
+    def count(self, field, query):
+        return len(self.lookup(field, query))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path, fields):
+    """The process-wide store for ``path``, indexing ``fields``"""
+    key = (os.path.abspath(path), tuple(fields))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ReferenceStore(key[0], fields)
+    return store
@@ -0,0 +1,455 @@
+"""Per-stage latency, token and failure telemetry.
+
+A ``trace(...)`` block covers one evaluation. Inside it, every ``stage(...)``
+span records:
+
+- wall time and time spent queued for a worker thread,
+- prompt/completion tokens (via ``TelemetryCallback`` on the LLM),
+- cache hits, retrieval k, JSON parse failures and prompt tokens saved by
+  context compaction, all added with ``record(...)``.
+
+Finished spans also update process-wide counters and histograms. These are
+exported in the Prometheus text format by ``metrics.render()``. Finished
+traces are kept in memory for ``recent_traces()`` and appended as JSON lines
+under ``TRACE_DIR`` by a background thread, so the caller (often an event
+loop) never waits on the disk. A file that reaches ``TRACE_MAX_BYTES`` is
+rotated, and only the newest ``TRACE_MAX_FILES`` older files are kept.
+``python -m workshop_common.telemetry report`` reads those files and prints
+p50/p95/p99 per stage. Apps without their own HTTP server (Streamlit) can
+expose the same endpoints with ``serve_metrics(port)``.
+
+Trace attributes named in ``TRACE_REDACT`` (the user's idea, by default) are
+stored as a short SHA-256 digest, so repeated ideas can still be correlated
+without their text reaching trace files or ``/traces``. ``/traces`` itself is
+only served when ``TRACES_ENDPOINT=1``.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import atexit
+import hashlib
+import inspect
+import argparse
+import functools
+import threading
+import contextvars
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.callbacks import BaseCallbackHandler
+
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")  # empty disables trace files
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024)))  # per file before rotation; 0 = never rotate
+TRACE_MAX_FILES = int(os.getenv("TRACE_MAX_FILES", "20"))  # older (rotated or previous-day) files kept; 0 = keep all
+TRACE_REDACT = {field.strip() for field in os.getenv("TRACE_REDACT", "idea").split(",") if field.strip()}
+TRACE_TEXT_PREVIEW = int(os.getenv("TRACE_TEXT_PREVIEW", "0"))  # leading characters kept next to the digest
+TRACES_ENDPOINT = os.getenv("TRACES_ENDPOINT", "0") == "1"  # serve /traces (unauthenticated) at all
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+STAGE_COUNTERS = ("prompt_tokens", "completion_tokens", "cache_hits", "parse_failures", "prompt_tokens_saved")
+SET_FIELDS = {"retrieval_k", "error"}  # recorded as-is rather than summed
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_stage = contextvars.ContextVar("current_stage", default=None)
+
+
+# --- Prometheus-style metrics ---
+class Metrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = defaultdict(float)  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, help="", **labels):
+        with self._lock:
+            self._help.setdefault(name, ("counter", help))
+            self._counters[name, tuple(sorted(labels.items()))] += value
+
+    def observe(self, name, value, help="", **labels):
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help))
+            series = self._histograms.setdefault((name, tuple(sorted(labels.items()))), [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        """Text exposition format (version 0.0.4)."""
+        def fmt(labels, **extra):
+            pairs = list(labels) + list(extra.items())
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+        lines = []
+        with self._lock:
+            for name, (kind, help) in sorted(self._help.items()):
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                if kind == "counter":
+                    lines += [f"{name}{fmt(labels)} {value:g}" for (n, labels), value in self._counters.items() if n == name]
+                    continue
+                for (n, labels), series in self._histograms.items():
+                    if n != name:
+                        continue
+                    for bound, count in zip(self.buckets, series):
+                        lines.append(f"{name}_bucket{fmt(labels, le=f'{bound:g}')} {count}")
+                    lines.append(f"{name}_bucket{fmt(labels, le='+Inf')} {series[-1]}")
+                    lines.append(f"{name}_sum{fmt(labels)} {series[-2]:g}")
+                    lines.append(f"{name}_count{fmt(labels)} {series[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# --- Traces and stage spans ---
+def redact(value):
+    """Short SHA-256 digest of ``value`` (plus a ``TRACE_TEXT_PREVIEW``-character prefix, if set)."""
+    text = str(value)
+    digest = "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    if TRACE_TEXT_PREVIEW and text:
+        return f"{text[:TRACE_TEXT_PREVIEW]}… {digest}" if len(text) > TRACE_TEXT_PREVIEW else f"{text} {digest}"
+    return digest
+
+
+class Trace:
+    def __init__(self, name, **attributes):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = {key: redact(value) if key in TRACE_REDACT else value for key, value in attributes.items()}
+        self.started_at = time.time()
+        self.duration = None
+        self.stages = []
+
+    def to_dict(self):
+        return {"trace_id": self.id, "name": self.name, "started_at": self.started_at, "duration": self.duration,
+                "attributes": self.attributes, "stages": list(self.stages)}
+
+
+_recent = OrderedDict()  # trace id -> dict
+_recent_lock = threading.Lock()
+_record_lock = threading.Lock()  # stages can record from worker threads
+
+
+def recent_traces(limit=20):
+    with _recent_lock:
+        return list(_recent.values())[-limit:][::-1]
+
+
+def get_trace(trace_id):
+    with _recent_lock:
+        return _recent.get(trace_id)
+
+
+class TraceWriter:
+    """Appends trace lines from a daemon thread, rotating files by size."""
+
+    def __init__(self, directory, max_bytes=TRACE_MAX_BYTES, max_files=TRACE_MAX_FILES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, data):
+        self._queue.put(json.dumps(data, default=str) + "\n")
+
+    def close(self, timeout=5):
+        """Write what is queued, then stop the thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while (line := self._queue.get()) is not None:
+            lines = [line]
+            # Drain what else is queued so a burst costs one open()
+            while not self._queue.empty() and (line := self._queue.get()) is not None:
+                lines.append(line)
+            try:
+                self._append("".join(lines))
+            except OSError as e:
+                print(f"telemetry: could not write traces: {e}", file=sys.stderr)
+            if line is None:
+                return
+
+    def _append(self, text):
+        path = self.directory / f"traces-{time.strftime('%Y%m%d')}.jsonl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self.max_bytes and path.exists() and path.stat().st_size >= self.max_bytes:
+            os.replace(path, path.with_name(f"{path.stem}.{time.strftime('%H%M%S')}-{uuid.uuid4().hex[:6]}.jsonl"))
+            self._prune()
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(text)
+
+    def _prune(self):
+        if not self.max_files:
+            return
+        files = sorted(self.directory.glob("traces-*.jsonl"), key=lambda path: path.stat().st_mtime)
+        for path in files[:-self.max_files]:
+            path.unlink(missing_ok=True)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _trace_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = TraceWriter(TRACE_DIR)
+        return _writer
+
+
+def _write_trace(data):
+    with _recent_lock:
+        _recent[data["trace_id"]] = data
+        while len(_recent) > TRACE_BUFFER_SIZE:
+            _recent.popitem(last=False)
+    if TRACE_DIR:
+        _trace_writer().write(data)
+
+
+@contextmanager
+def trace(name, **attributes):
+    """Collect every stage run inside the block into one trace, exported on exit."""
+    current = Trace(name, **attributes)
+    token = _current_trace.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_trace.reset(token)
+        current.duration = round(time.perf_counter() - started, 4)
+        metrics.observe("request_seconds", current.duration, help="End-to-end evaluation latency.", trace=name)
+        _write_trace(current.to_dict())
+
+
+@contextmanager
+def stage(name):
+    """Time one stage and attach it to the current trace (if any)."""
+    span = {"stage": name, "wall_seconds": None, "queue_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+            "cache_hits": 0, "retrieval_k": None, "parse_failures": 0, "prompt_tokens_saved": 0, "error": None}
+    current = _current_trace.get()
+    token = _current_stage.set(span)
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span["error"] = span["error"] or type(e).__name__
+        raise
+    finally:
+        _current_stage.reset(token)
+        span["wall_seconds"] = round(time.perf_counter() - started, 4)
+        span["queue_seconds"] = round(span["queue_seconds"], 4)
+        if current is not None:
+            with _record_lock:
+                current.stages.append(span)
+        _export_stage(span)
+
+
+def _export_stage(span):
+    name = span["stage"]
+    metrics.observe("stage_seconds", span["wall_seconds"], help="Stage wall time.", stage=name)
+    if span["queue_seconds"]:
+        metrics.observe("stage_queue_seconds", span["queue_seconds"], help="Time a stage waited for a worker thread.", stage=name)
+    for field in STAGE_COUNTERS:
+        if span[field]:
+            metrics.inc(f"stage_{field}_total", span[field], help=f"Stage {field.replace('_', ' ')}.", stage=name)
+    if span["error"]:
+        metrics.inc("stage_failures_total", help="Stages that raised or timed out.", stage=name, reason=span["error"])
+
+
+def traced(name):
+    """Decorator form of ``stage`` for sync and async functions."""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record(**fields):
+    """Add to the current stage's counters (or set ``retrieval_k``/``error``); a no-op outside a stage."""
+    span = _current_stage.get()
+    if span is None:
+        current = _current_trace.get()
+        if current is not None:
+            current.attributes.update(fields)
+        return
+    with _record_lock:
+        for field, value in fields.items():
+            if field in SET_FIELDS:
+                span[field] = value
+            else:
+                span[field] = span.get(field, 0) + value
+
+
+def bind_to_stage(func, *args):
+    """Callable for a worker thread: runs ``func`` in the caller's context and records how long it queued."""
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def run():
+        return context.run(_run_queued, submitted, func, args)
+    return run
+
+
+def _run_queued(submitted, func, args):
+    record(queue_seconds=time.perf_counter() - submitted)
+    return func(*args)
+
+
+class TelemetryCallback(BaseCallbackHandler):
+    """Adds each LLM call's token usage to the stage it ran in."""
+
+    run_inline = True  # no executor hop for async runs; keeps the caller's context
+
+    def on_llm_end(self, response, **kwargs):
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        if not (prompt_tokens or completion_tokens):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+        record(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, **kwargs):
+        record(error=type(error).__name__)
+
+
+# --- Standalone exporter ---
+class MetricsHTTPHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send(metrics.render().encode(), "text/plain; version=0.0.4")
+        elif not TRACES_ENDPOINT:
+            self.send_error(404)
+        elif self.path == "/traces":
+            self._send(json.dumps(recent_traces(), default=str).encode(), "application/json")
+        elif self.path.startswith("/traces/") and get_trace(self.path[len("/traces/"):]):
+            self._send(json.dumps(get_trace(self.path[len("/traces/"):]), default=str).encode(), "application/json")
+        else:
+            self.send_error(404)
+
+    def _send(self, payload, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="0.0.0.0"):
+    """Serve /metrics (and /traces if ``TRACES_ENDPOINT``) from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), MetricsHTTPHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
+
+
+# --- Local latency report ---
+def percentile(values, q):
+    """Linear-interpolated percentile of a non-empty list, ``q`` in [0, 100]."""
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def load_traces(trace_dir=TRACE_DIR):
+    traces = []
+    for path in sorted(Path(trace_dir).glob("traces-*.jsonl")):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    traces.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crashed process
+    return traces
+
+
+def stage_report(traces):
+    """Per-stage p50/p95/p99 wall and queue time, mean tokens (used and saved), and failure counts."""
+    by_stage = defaultdict(list)
+    for data in traces:
+        by_stage["(total)"].append({
+            "wall_seconds": data["duration"] or 0, "queue_seconds": 0, "error": data["attributes"].get("error"),
+            **{field: sum(span.get(field, 0) for span in data["stages"]) for field in ("prompt_tokens", "completion_tokens", "prompt_tokens_saved")},
+        })
+        for span in data["stages"]:
+            by_stage[span["stage"]].append(span)
+    rows = []
+    for name, spans in by_stage.items():
+        wall = [span["wall_seconds"] for span in spans]
+        queue = [span.get("queue_seconds") or 0 for span in spans]
+        rows.append({
+            "stage": name,
+            "n": len(spans),
+            **{f"p{q}": round(percentile(wall, q), 3) for q in (50, 95, 99)},
+            "queue_p95": round(percentile(queue, 95), 3),
+            "tokens_in": round(sum(span.get("prompt_tokens", 0) for span in spans) / len(spans)),
+            "tokens_out": round(sum(span.get("completion_tokens", 0) for span in spans) / len(spans)),
+            "tokens_saved": round(sum(span.get("prompt_tokens_saved", 0) for span in spans) / len(spans)),
+            "parse_failures": sum(span.get("parse_failures", 0) for span in spans),
+            "errors": sum(1 for span in spans if span.get("error")),
+        })
+    return sorted(rows, key=lambda row: -row["p95"])
+
+
+def print_report(rows, out=sys.stdout):
+    if not rows:
+        print("No traces found.", file=out)
+        return
+    columns = list(rows[0])
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns), file=out)
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(widths[column]) for column in columns), file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage latency report from recorded traces.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report = subparsers.add_parser("report", help="Print p50/p95/p99 per stage.")
+    report.add_argument("--dir", default=TRACE_DIR or "traces")
+    report.add_argument("--name", help="Only traces with this name")
+    report.add_argument("--json", action="store_true", help="Print rows as JSON")
+    args = parser.parse_args()
+    traces = [data for data in load_traces(args.dir) if not args.name or data["name"] == args.name]
+    rows = stage_report(traces)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
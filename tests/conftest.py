@@ -0,0 +1,13 @@
+"""Shared setup for the unit tests: the shared package, the benchmark fakes and
+the Day 10 service are imported straight from the source tree.
+
+Run from the repository root with ``python -m pytest tests``. The Day 10
+requirements (pydantic, tiktoken) and ``common/``'s dependencies must be installed.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT / "common", ROOT / "benchmarks", ROOT / "Day 10" / "agent-python"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
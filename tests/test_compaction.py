@@ -0,0 +1,74 @@
+import json
+import pytest
+from fakes import canned_reply
+from compaction import COMPACTION_LEVELS, STAGE_CONTEXT_FIELDS, compact_context, count_tokens
+
+STAGE_PROMPTS = {
+    "trends": "Analyze market demand",
+    "competitors": "Analyze competitive landscape",
+    "saturation": "Evaluate market saturation",
+    "novelty": "Score innovation and novelty",
+}
+LONG_TEXT = "Distribution through chartered accountants and bank branches across tier-2 and tier-3 towns. " * 30
+
+
+@pytest.fixture
+def context():
+    """Earlier stage outputs as the fake model returns them, with some long lists and text added."""
+    context = {name: json.loads(canned_reply(prompt)) for name, prompt in STAGE_PROMPTS.items()}
+    context["trends"]["top_regions"] = [f"City {i}" for i in range(40)]
+    context["saturation"]["barriers_to_entry"] = LONG_TEXT
+    context["novelty"]["differentiation_factors"] = [LONG_TEXT] * 8
+    return context
+
+
+def kept_fields(text):
+    return {name: list(fields) for name, fields in json.loads(text).items()}
+
+
+@pytest.mark.parametrize("stage", STAGE_CONTEXT_FIELDS)
+@pytest.mark.parametrize("budget", [60, 120, 250, 500, 1000])
+def test_fits_budget(context, stage, budget):
+    text = compact_context(context, STAGE_CONTEXT_FIELDS[stage], budget)
+    assert count_tokens(text) <= budget
+    for name, fields in kept_fields(text).items():
+        assert set(fields) <= set(STAGE_CONTEXT_FIELDS[stage][name])
+
+
+@pytest.mark.parametrize("stage", STAGE_CONTEXT_FIELDS)
+@pytest.mark.parametrize("budget", [60, 120, 250])
+def test_drops_least_important_fields_first(context, stage, budget):
+    """Whatever survives of a stage is a prefix of its fields in order of importance."""
+    stage_fields = STAGE_CONTEXT_FIELDS[stage]
+    for name, fields in kept_fields(compact_context(context, stage_fields, budget)).items():
+        present = [field for field in stage_fields[name] if context[name].get(field)]
+        assert fields == present[:len(fields)]
+
+
+def test_large_budget_keeps_every_field_at_the_loosest_level(context):
+    stage_fields = STAGE_CONTEXT_FIELDS["final_report"]
+    data = json.loads(compact_context(context, stage_fields, 100_000))
+    assert {name: list(fields) for name, fields in data.items()} == {
+        name: [field for field in fields if context[name].get(field)] for name, fields in stage_fields.items()
+    }
+    max_items, max_chars = COMPACTION_LEVELS[0]
+    assert len(data["trends"]["top_regions"]) == max_items
+    assert len(data["saturation"]["barriers_to_entry"]) == max_chars
+    assert data["competitors"]["direct_competitors"][0] == {"name": "Zoho Books", "description": "Accounting suite"}
+
+
+def test_tighter_budget_shortens_before_dropping(context):
+    stage_fields = STAGE_CONTEXT_FIELDS["final_report"]
+    loose = json.loads(compact_context(context, stage_fields, 100_000))
+    tight_text = compact_context(context, stage_fields, count_tokens(json.dumps(loose, separators=(",", ":"))) // 2)
+    tight = json.loads(tight_text)
+    assert kept_fields(tight_text) == {name: list(fields) for name, fields in loose.items()}
+    assert len(tight["novelty"]["differentiation_factors"]) < len(loose["novelty"]["differentiation_factors"])
+
+
+def test_extra_and_missing_stages(context):
+    del context["saturation"]
+    text = compact_context(context, STAGE_CONTEXT_FIELDS["final_report"], 500, extra={"idea": "GST invoicing"})
+    data = json.loads(text)
+    assert data["idea"] == "GST invoicing"
+    assert "saturation" not in data
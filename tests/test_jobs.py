@@ -0,0 +1,134 @@
+import time
+import asyncio
+import pytest
+from workshop_common.eval_cache import EvaluationCache
+from jobs import JobQueue, JobStore, QueueFull
+
+
+def job_for(idea, priority="normal"):
+    return {"id": f"job-{time.monotonic_ns()}", "idea": idea, "idea_key": EvaluationCache.key_for(idea),
+            "priority": priority, "created_at": time.time()}
+
+
+def make_queue(path, evaluate, **kwargs):
+    return JobQueue(evaluate, lambda: JobStore(path), asyncio.to_thread, poll_seconds=0.05, **kwargs)
+
+
+class Evaluator:
+    """Records each idea it is asked to score; blocks until ``release`` is set."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, idea):
+        self.calls.append(idea)
+        await self.release.wait()
+        return {"idea": idea, "viability_score": 67}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def test_store_deduplicates_and_promotes(db_path):
+    store = JobStore(db_path)
+    job_id, deduplicated = store.submit(job_for("GST invoicing for retailers", "low"), max_queued=10)
+    assert not deduplicated
+    assert store.submit(job_for("  gst INVOICING for retailers ", "high"), max_queued=10) == (job_id, True)
+    assert store.get(job_id)["priority"] == "high"
+    # A slower lane never demotes
+    store.submit(job_for("GST invoicing for retailers", "low"), max_queued=10)
+    assert store.get(job_id)["priority"] == "high"
+
+
+def test_store_refuses_when_full(db_path):
+    store = JobStore(db_path)
+    store.submit(job_for("first idea"), max_queued=1)
+    with pytest.raises(QueueFull):
+        store.submit(job_for("second idea"), max_queued=1)
+    # A duplicate of a queued idea is not a new job, so it is still accepted
+    assert store.submit(job_for("first idea"), max_queued=1)[1]
+
+
+def test_store_claims_fastest_lane_first(db_path):
+    store = JobStore(db_path)
+    low, _ = store.submit(job_for("low idea", "low"), max_queued=10)
+    normal, _ = store.submit(job_for("normal idea"), max_queued=10)
+    high, _ = store.submit(job_for("high idea", "high"), max_queued=10)
+    assert store.get(low)["queue_position"] == 2
+    assert [store.claim("worker", 60)["id"] for _ in range(3)] == [high, normal, low]
+    assert store.claim("worker", 60) is None
+
+
+def test_queues_sharing_a_store_run_duplicates_once(db_path):
+    async def scenario():
+        evaluate = Evaluator()
+        first, second = make_queue(db_path, evaluate), make_queue(db_path, evaluate)
+        try:
+            submitted = await asyncio.gather(first.submit("Same idea"), second.submit("same  IDEA"),
+                                             first.submit("Another idea"))
+            ids = [job_id for job_id, _ in submitted]
+            assert ids[0] == ids[1] != ids[2]
+            assert sorted(deduplicated for _, deduplicated in submitted) == [False, False, True]
+            evaluate.release.set()
+            done = await asyncio.wait_for(asyncio.gather(second.wait(ids[0]), first.wait(ids[2])), 5)
+            assert [job["status"] for job in done] == ["done", "done"]
+            assert done[0]["result"]["viability_score"] == 67
+            assert len(evaluate.calls) == 2
+        finally:
+            await first.stop()
+            await second.stop()
+    asyncio.run(scenario())
+
+
+def test_expired_lease_is_reclaimed(db_path):
+    # A process claimed the job and died: its lease is already over
+    store = JobStore(db_path)
+    job_id, _ = store.submit(job_for("Orphaned idea"), max_queued=10)
+    assert store.claim("dead-process", lease_seconds=-1)["id"] == job_id
+
+    async def scenario():
+        evaluate = Evaluator()
+        evaluate.release.set()
+        queue = make_queue(db_path, evaluate)
+        try:
+            job = await asyncio.wait_for(queue.wait(job_id), 5)
+        finally:
+            await queue.stop()
+        assert job["status"] == "done"
+        assert evaluate.calls == ["Orphaned idea"]
+    asyncio.run(scenario())
+    # The dead owner's late result is dropped
+    assert not store.finish(job_id, "dead-process", {"stale": True})
+    assert store.get(job_id)["result"]["viability_score"] == 67
+
+
+def test_live_lease_is_not_reclaimed(db_path):
+    store = JobStore(db_path)
+    store.submit(job_for("Busy idea"), max_queued=10)
+    assert store.claim("live-process", lease_seconds=60)
+    assert store.claim("other-process", lease_seconds=60) is None
+
+
+def test_stop_hands_running_jobs_back(db_path):
+    async def scenario():
+        stuck = Evaluator()
+        queue = make_queue(db_path, stuck)
+        job_id, _ = await queue.submit("Interrupted idea")
+        while not stuck.calls:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        assert (await asyncio.to_thread(JobStore(db_path).get, job_id))["status"] == "queued"
+
+        evaluate = Evaluator()
+        evaluate.release.set()
+        replacement = make_queue(db_path, evaluate)
+        try:
+            job = await asyncio.wait_for(replacement.wait(job_id), 5)
+        finally:
+            await replacement.stop()
+        assert job["status"] == "done"
+        assert evaluate.calls == ["Interrupted idea"]
+    asyncio.run(scenario())
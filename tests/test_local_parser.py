@@ -0,0 +1,55 @@
+import pytest
+from workshop_common.local_parser import LocalIdeaParser
+
+EXAMPLES = [
+    ("FinTech", "digital payments wallet for merchants"),
+    ("FinTech", "lending and credit scoring for small businesses"),
+    ("Fintech", "invoicing and accounting for retailers"),
+    ("HealthTech", "telemedicine consultations with doctors"),
+    ("HealthTech", "diagnostics lab booking for patients"),
+    ("EdTech", "online tutoring for school students"),
+    ("EdTech", "courses and exams preparation for students"),
+]
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return LocalIdeaParser(EXAMPLES)
+
+
+def test_clear_idea_is_confident(parser):
+    parsed = parser.parse("Telemedicine app connecting patients with doctors")
+    assert parsed["domain"] == "HealthTech"
+    assert parser.confident(parsed)
+
+
+def test_spelling_variants_share_a_label(parser):
+    assert parser.labels.count("FinTech") == 1 and "Fintech" not in parser.labels
+
+
+def test_unrelated_idea_is_not_confident(parser):
+    parsed = parser.parse("Reusable rockets launching satellites")
+    assert parsed["domain"] == ""
+    assert not parser.confident(parsed)
+
+
+def test_generic_overlap_is_not_confident(parser):
+    # Shares only "students" and "payments" with the labels, amid words the datasets never use
+    parsed = parser.parse("Blockchain metaverse gaming guild rewarding students with payments")
+    assert not parser.confident(parsed)
+
+
+def test_ambiguous_idea_is_not_confident(parser):
+    parsed = parser.parse("payments for doctors")
+    assert parsed["confidence"] < 0.1
+    assert not parser.confident(parsed)
+
+
+@pytest.mark.parametrize("parsed, expected", [
+    ({"domain": "FinTech", "similarity": 0.3, "confidence": 0.1}, True),
+    ({"domain": "FinTech", "similarity": 0.29, "confidence": 0.5}, False),
+    ({"domain": "FinTech", "similarity": 0.9, "confidence": 0.09}, False),
+    ({"domain": "", "similarity": 0.9, "confidence": 0.9}, False),
+])
+def test_thresholds(parser, parsed, expected):
+    assert parser.confident(parsed, min_similarity=0.3, min_confidence=0.1) is expected
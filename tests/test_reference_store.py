@@ -0,0 +1,60 @@
+import json
+import random
+import pytest
+from workshop_common.reference_store import ReferenceStore
+
+WORDS = ["fin", "tech", "fintech", "health", "care", "ed", "agri", "logistics", "saas", "ai", "pay", "e-commerce",
+         "Bengaluru", "Zürich", "İstanbul", "ÉCOLE", "d2c", "  ", "a"]
+
+
+def scan(records, field, query):
+    """What ``lookup`` must return: a case-insensitive substring test over every record."""
+    query = str(query).lower()
+    return [record for record in records if query in str(record.get(field, "")).lower()]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    rng = random.Random(7)
+    records = [{"name": "".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))),
+                "domain": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 3)))} for _ in range(400)]
+    records.append({"name": "no domain field"})
+    path = tmp_path / "companies.json"
+    path.write_text(json.dumps(records), encoding="utf-8")
+    return path, records
+
+
+def queries(records, rng):
+    texts = [str(record.get(field, "")) for record in records for field in ("name", "domain")]
+    for _ in range(300):
+        text = rng.choice(texts)
+        start = rng.randrange(len(text) + 1)
+        yield text[start:start + rng.randint(0, 8)]
+    yield from ["", "FINTECH", "tech", "zür", "i̇st", "xyz", "zzzzzz", "e-c"]
+
+
+@pytest.mark.parametrize("field", ["name", "domain"])
+def test_lookup_matches_brute_force_scan(dataset, field):
+    path, records = dataset
+    store = ReferenceStore(str(path), ["name", "domain"])
+    for query in queries(records, random.Random(field)):
+        assert store.lookup(field, query) == scan(records, field, query), query
+
+
+def test_limit_and_count(dataset):
+    path, records = dataset
+    store = ReferenceStore(str(path), ["name", "domain"])
+    expected = scan(records, "domain", "tech")
+    assert len(expected) > 5
+    assert store.lookup("domain", "tech", limit=5) == expected[:5]
+    assert store.count("domain", "tech") == len(expected)
+
+
+def test_reloads_when_file_changes(dataset):
+    path, records = dataset
+    store = ReferenceStore(str(path), ["name", "domain"])
+    assert store.lookup("name", "quantum") == []
+    records = records + [{"name": "Quantum Ledger", "domain": "fintech"}]
+    path.write_text(json.dumps(records), encoding="utf-8")
+    assert store.lookup("name", "quantum") == [{"name": "Quantum Ledger", "domain": "fintech"}]
+    assert store.lookup("domain", "fintech") == scan(records, "domain", "fintech")
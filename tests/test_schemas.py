@@ -0,0 +1,30 @@
+import pytest
+from pydantic import ValidationError
+from schemas import SaturationAnalysis, parse_score
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("65", 65.0),
+    ("65%", 65.0),
+    (" 72.5 ", 72.5),
+    ("65/100", 65.0),
+    ("8/10", 80.0),
+    ("7.5 / 10", 75.0),
+    ("2/3", 66.67),
+    (42, 42),
+    (None, None),
+])
+def test_parse_score(value, expected):
+    assert parse_score(value) == expected
+
+
+@pytest.mark.parametrize("value", ["high", "", "/10", "5/0"])
+def test_parse_score_rejects(value):
+    with pytest.raises(ValueError):
+        parse_score(value)
+
+
+def test_fraction_is_rescaled_before_range_check():
+    assert SaturationAnalysis(saturation_score="8/10").saturation_score == 80
+    with pytest.raises(ValidationError):
+        SaturationAnalysis(saturation_score="12/10")
@@ -0,0 +1,72 @@
+import json
+import pytest
+from fakes import canned_reply
+from schemas import STAGE_SCHEMAS, NoveltyAnalysis
+from structured_output import IncrementalJSONParser, parse_json_object, partial_errors, validate_output
+
+# The benchmark fake's canned reply for each Day 10 stage
+STAGE_PROMPTS = {
+    "trends": "Analyze market demand",
+    "competitors": "Analyze competitive landscape",
+    "saturation": "Evaluate market saturation",
+    "novelty": "Score innovation and novelty",
+    "final_report": "Generate a comprehensive startup viability report",
+}
+
+
+def feed_in_chunks(parser, text, size):
+    for i in range(0, len(text), size):
+        if parser.feed(text[i:i + size]):
+            return True
+    return parser.complete
+
+
+@pytest.mark.parametrize("stage", STAGE_PROMPTS)
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_canned_replies_parse_in_any_chunking(stage, size):
+    reply = canned_reply(STAGE_PROMPTS[stage])
+    parser = IncrementalJSONParser()
+    assert feed_in_chunks(parser, f"Here you go:\n```json\n{reply}\n```\nAnything else?", size)
+    assert parser.result() == json.loads(reply)
+    assert validate_output(STAGE_SCHEMAS[stage], reply)
+
+
+def test_brackets_and_quotes_inside_strings():
+    text = r'{"a": "}{ ][", "b": "say \"}\"", "c": [{"d": "\\"}]} {"second": 1}'
+    assert parse_json_object(text) == {"a": "}{ ][", "b": 'say "}"', "c": [{"d": "\\"}]}
+
+
+def test_stops_at_first_object():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1}')
+    assert parser.feed(' trailing {"b": 2}')
+    assert parser.result() == {"a": 1}
+
+
+def test_incomplete_or_missing_object():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": [1, 2')
+    assert not parser.complete
+    with pytest.raises(ValueError):
+        parser.result()
+    with pytest.raises(ValueError):
+        parse_json_object("[1, 2, 3]")
+
+
+def test_partial_drops_member_being_written():
+    parser = IncrementalJSONParser()
+    assert parser.partial() is None
+    parser.feed('prose {"novelty_score": 61, "differentiation_factors": ["off')
+    assert parser.at_member_boundary
+    assert parser.partial() == {"novelty_score": 61}
+    parser.feed('line-first"')
+    assert not parser.at_member_boundary
+    parser.feed('], "innovation_level": "incremental"}')
+    assert parser.partial() == {"novelty_score": 61, "differentiation_factors": ["offline-first"], "innovation_level": "incremental"}
+
+
+def test_partial_errors_ignore_missing_members():
+    assert partial_errors(NoveltyAnalysis, {}) is None
+    assert partial_errors(NoveltyAnalysis, {"innovation_level": "incremental"}) is None
+    errors = partial_errors(NoveltyAnalysis, {"novelty_score": "very high"})
+    assert errors and errors[0]["loc"] == ("novelty_score",)